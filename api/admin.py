@@ -1,3 +1,10 @@
 from django.contrib import admin
+from .models import Bookmaker, Event, Market, OddsChange, OddsKeyframe, OddsSnapshot
 
 # Register your models here.
+admin.site.register(Event)
+admin.site.register(Bookmaker)
+admin.site.register(Market)
+admin.site.register(OddsSnapshot)
+admin.site.register(OddsChange)
+admin.site.register(OddsKeyframe)
@@ -0,0 +1,72 @@
+import json
+import os
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from api.services.backtest import BACKTEST_SPORTS, grid_configs, load_grid, load_results, run_backtest
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the stored line-movement history of a sport through the dfs-player-props pricing and ranking, "
+        "grade the picks against a results CSV and report hit rate, ROI and calibration per configuration of a grid."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("sport", choices=BACKTEST_SPORTS)
+        parser.add_argument("--results", required=True, help="CSV of event_id, player_name, market, actual[, commence_time]")
+        parser.add_argument("--grid", help="JSON file of {key: [values]} over weights, min_books, required_books, top, "
+                                           "devig, rank_by, entry_type and legs (default: the sport's settings only)")
+        parser.add_argument("--start", help="ISO 8601 time to start from (default: the whole history)")
+        parser.add_argument("--end", help="ISO 8601 time to stop at (default: now)")
+        parser.add_argument("--interval", type=float, default=0, help="Seconds between evaluated snapshots (default: every poll)")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes to split the grid across")
+        parser.add_argument("--output", help="Write the full reports, calibration included, to this JSON file")
+
+    def handle(self, *args, **options):
+        try:
+            configs = grid_configs(options["sport"], load_grid(options["grid"]) if options["grid"] else None)
+            results, commence_times = load_results(options["results"])
+            start, end = _time(options, "start"), _time(options, "end")
+        except (OSError, ValueError) as e:
+            raise CommandError(e)
+
+        self.stdout.write(f"{len(configs)} configurations, {len(results)} graded results")
+        reports = run_backtest(options["sport"], configs, results, commence_times, start, end, options["interval"], options["workers"])
+
+        for number, report in enumerate(reports):
+            self.stdout.write(f"#{number}: {json.dumps(report['config'], sort_keys=True)}")
+
+        self.stdout.write(f"{'config':>6} {'site':>10} {'picks':>6} {'graded':>6} {'W-L-P':>12} {'hit %':>7} {'ROI %':>7} {'brier':>7}")
+        for number, report in enumerate(reports):
+            for site, metrics in report["sites"].items():
+                record = f"{metrics['wins']}-{metrics['losses']}-{metrics['pushes']}"
+                self.stdout.write(
+                    f"{'#' + str(number):>6} {site:>10} {metrics['picks']:>6} {metrics['graded']:>6} {record:>12} "
+                    f"{_number(metrics['hit_rate']):>7} {_number(metrics['roi']):>7} {_number(metrics['brier']):>7}"
+                )
+                if options["verbosity"] > 1:
+                    for bucket in metrics["calibration"]:
+                        self.stdout.write(f"{'':>18} {bucket['bucket']:>7}%: {bucket['picks']} picks, "
+                                          f"predicted {bucket['predicted']}%, hit {bucket['hit_rate']}%")
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(reports, f, indent=2)
+            self.stdout.write(f"Reports written to {options['output']}")
+
+
+def _time(options, name):
+    value = options[name]
+    if not value:
+        return None
+
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"--{name} must be an ISO 8601 time, got {value!r}")
+
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+
+def _number(value):
+    return "-" if value is None else f"{value:g}"
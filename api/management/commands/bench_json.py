@@ -0,0 +1,103 @@
+import importlib
+import json
+import os
+import time
+from urllib.parse import urlparse
+from django.core.management.base import BaseCommand
+from django.http import JsonResponse
+from api.services import fast_json
+from api.services.synthetic_slate import build_event_payload
+from api.services.prop_index import match_slate
+from api.services.odds_columns import OddsColumns
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the JSON decode/encode share of a dfs-player-props request with the stdlib "
+        "backend and with the fast backend (orjson). Network time is not included."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sport", default="nba")
+        parser.add_argument("--events", type=int, default=12, help="Events in the synthetic slate")
+        parser.add_argument("--players", type=int, default=16, help="Players per event")
+        parser.add_argument("--iterations", type=int, default=5)
+        parser.add_argument("--replay-dir", help="Use recorded event payloads from this directory instead")
+
+    def handle(self, *args, **options):
+        sport = options["sport"]
+        utils = importlib.import_module(f"api.{sport}.utils")
+        event_odds = importlib.import_module(f"api.{sport}.services.{sport}_event_odds")
+        split_event_odds = getattr(event_odds, f"split_{sport}_event_odds")
+
+        bodies = self._load_bodies(options, getattr(utils, f"{sport.upper()}_PLAYER_MARKETS").split(","))
+        self.stdout.write(f"{len(bodies)} payloads, {sum(len(b) for b in bodies) / 1e6:.1f} MB")
+
+        events = [split_event_odds(json.loads(body)) for body in bodies]
+        odds = OddsColumns.concat([event["odds"] for event in events])
+        dfs_lines = OddsColumns.concat([event["dfs_lines"] for event in events], like=odds)
+        self.stdout.write(
+            f"Columnar snapshot: {len(odds)} odds + {len(dfs_lines)} DFS rows, "
+            f"{(odds.nbytes() + dfs_lines.nbytes()) / 1e6:.2f} MB of columns"
+        )
+
+        backends = [("json", json.loads, self._encode_stdlib)]
+        if fast_json.orjson is not None:
+            backends.append(("orjson", fast_json.orjson.loads, self._encode_fast))
+        else:
+            self.stdout.write("orjson is not installed, only the stdlib backend is measured")
+
+        for name, decode, encode in backends:
+            decode_time = parse_time = encode_time = 0.0
+
+            for _ in range(options["iterations"]):
+                start = time.perf_counter()
+                payloads = [decode(body) for body in bodies]
+                decode_time += time.perf_counter() - start
+
+                start = time.perf_counter()
+                response_data = self._match(split_event_odds(payload) for payload in payloads)
+                parse_time += time.perf_counter() - start
+
+                start = time.perf_counter()
+                encode(response_data)
+                encode_time += time.perf_counter() - start
+
+            total = decode_time + parse_time + encode_time
+            iterations = options["iterations"]
+            self.stdout.write(
+                f"{name:>7}: decode {decode_time / iterations * 1000:8.1f} ms | "
+                f"parse+match {parse_time / iterations * 1000:8.1f} ms | "
+                f"encode {encode_time / iterations * 1000:8.1f} ms | "
+                f"JSON share {(decode_time + encode_time) / total:6.1%}"
+            )
+
+    def _load_bodies(self, options, markets):
+        if options["replay_dir"]:
+            bodies = []
+            for filename in sorted(os.listdir(options["replay_dir"])):
+                with open(os.path.join(options["replay_dir"], filename), encoding="utf-8") as f:
+                    recording = json.load(f)
+                if urlparse(recording["url"]).path.endswith("/odds"):  # Per-event odds only, not events lists
+                    bodies.append(recording["body"].encode("utf-8"))
+            return bodies
+
+        return [
+            json.dumps(build_event_payload(f"bench{i}", markets, players=options["players"])).encode("utf-8")
+            for i in range(options["events"])
+        ]
+
+    def _match(self, event_results):
+        # Same shape as the dfs-player-props response before ranking, i.e. the largest response we serve
+        matched_props = match_slate((i, event["odds"], event["dfs_lines"]) for i, event in enumerate(event_results))
+
+        return {
+            "underdog_props": matched_props.for_site("underdog").player_props(),
+            "prizepicks_props": matched_props.for_site("prizepicks").player_props(),
+        }
+
+    def _encode_stdlib(self, data):
+        return JsonResponse(data, safe=False).content
+
+    def _encode_fast(self, data):
+        return fast_json.FastJsonResponse(data, safe=False).content
@@ -0,0 +1,132 @@
+import importlib
+import time
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from api.services.pricing_engine import pack_entries, price_packed, price_matched
+from api.services.synthetic_slate import build_matched_props
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the batched NumPy pricing engine on the columnar snapshot against the scalar "
+        "per-prop loop on a synthetic slate, and check both produce identical results."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sport", default="nba", choices=["nba", "nfl", "mlb", "nhl"])
+        parser.add_argument("--props", type=int, default=5000, help="Matched props in the synthetic slate")
+        parser.add_argument("--iterations", type=int, default=10)
+
+    def handle(self, *args, **options):
+        sport = options["sport"]
+        weights = getattr(importlib.import_module(f"api.{sport}.utils"), f"{sport.upper()}_BOOKMAKER_WEIGHTS")
+        matched_props = build_matched_props(sport, options["props"])
+        player_props = matched_props.player_props()
+        entries = sum(len(prop["bookmaker_odds"]) for prop in player_props)
+        self.stdout.write(f"{len(player_props)} props, {entries} bookmaker odds")
+
+        priced = price_matched(matched_props, weights)
+        columnar = [
+            {"lean": priced.lean[i], "average_odds": priced.average_odds[i], "fair_probability": priced.value("fair_probability", i)}
+            for i in range(len(matched_props))
+        ]
+        if columnar != price_props_scalar(player_props, weights):
+            raise CommandError("The columnar and scalar pricing results differ")
+        self.stdout.write("Columnar and scalar results are identical")
+
+        odds, rows = matched_props.odds, matched_props.entries
+        book_weights = [weights.get(title, 0) for title in odds.bookmakers.values]
+        prices, packed_weights = pack_entries(
+            matched_props.entry_counts, np.nan_to_num(odds.price[rows], nan=0.0), odds.bookmaker[rows],
+            odds.side_kinds()[rows].astype(np.int64), book_weights,
+        )[:2]
+        timings = {}
+
+        for name, run in [
+            ("scalar", lambda: price_props_scalar(player_props, weights)),
+            ("columns", lambda: price_matched(matched_props, weights)),
+            ("kernel", lambda: price_packed(prices, packed_weights)),
+        ]:
+            best = None
+            for _ in range(options["iterations"]):
+                start = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)  # Best of N, least disturbed by other load
+            timings[name] = best
+            self.stdout.write(f"{name:>7}: {timings[name] * 1000:8.1f} ms per slate (best of {options['iterations']})")
+
+        self.stdout.write(
+            f"Speedup: {timings['scalar'] / timings['columns']:.1f}x from the columnar snapshot, "
+            f"{timings['scalar'] / timings['kernel']:.0f}x on already packed arrays"
+        )
+
+
+def price_props_scalar(player_props, bookmaker_weights):
+    """
+    Reference pricing, one prop at a time in plain Python as filter_better_odds_lean did before the NumPy engine.
+    player_props are the matched entries ({"bookmaker_odds": [{"lean", "odds", "bookmaker"...}]...}).
+    Returns one {lean, average_odds, fair_probability} dict per prop.
+    """
+    results = []
+
+    for prop in player_props:
+        bookmaker_groups = {}
+
+        for odds_entry in prop["bookmaker_odds"]:
+            bookmaker_groups.setdefault(odds_entry["bookmaker"], {"over": None, "under": None})
+            bookmaker_groups[odds_entry["bookmaker"]][odds_entry["lean"].lower()] = odds_entry["odds"]
+
+        weighted_fair_over = 0
+        weighted_fair_under = 0
+        total_weight = 0
+
+        for bookmaker, odds_pair in bookmaker_groups.items():
+            over_odds = odds_pair["over"]
+            under_odds = odds_pair["under"]
+
+            if over_odds and under_odds and bookmaker_weights.get(bookmaker, 0) > 0:
+                over_prob = 1 / over_odds
+                under_prob = 1 / under_odds
+                total_prob = over_prob + under_prob
+
+                weight = bookmaker_weights[bookmaker]
+                weighted_fair_over += 1 / (over_prob / total_prob) * weight
+                weighted_fair_under += 1 / (under_prob / total_prob) * weight
+                total_weight += weight
+
+        lean = "n/a"
+        average_odds = None
+
+        if total_weight > 0:
+            avg_fair_over_odds = round(weighted_fair_over / total_weight, 2)
+            avg_fair_under_odds = round(weighted_fair_under / total_weight, 2)
+
+            if avg_fair_over_odds < avg_fair_under_odds:
+                lean = "over"
+            elif avg_fair_over_odds > avg_fair_under_odds:
+                lean = "under"
+
+            average_odds = _decimal_to_american(avg_fair_over_odds if lean == "over" else avg_fair_under_odds)
+
+        results.append({
+            "lean": lean,
+            "average_odds": average_odds,
+            "fair_probability": _implied_probability(average_odds) if average_odds else None,
+        })
+
+    return results
+
+
+def _decimal_to_american(decimal_odds):
+    if decimal_odds >= 2.0:
+        return round((decimal_odds - 1) * 100)
+    return round(-(100 / (decimal_odds - 1)))
+
+
+def _implied_probability(american_odds):
+    if american_odds > 0:
+        probability = 100 / (american_odds + 100)
+    else:
+        probability = -american_odds / (-american_odds + 100)
+    return round(probability * 100, 2)
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from oddsApi.settings import PLAYER_ALIASES_FILE, ODDS_POLL_SPORTS
+from api.services.odds_store import load_latest_slate
+from api.services.player_index import PLAYER_ALIASES, normalize_player_name, player_key, save_alias, suggest_alias
+
+
+class Command(BaseCommand):
+    help = (
+        "List the player alias table, or add an alias so a DFS spelling joins the sportsbook player "
+        f"it belongs to (saved to {PLAYER_ALIASES_FILE}). With --suggest, propose aliases for the DFS "
+        "names of a sport's stored slate that no sportsbook name matches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("alias", nargs="?", help="Name as one feed spells it, e.g. \"Nic Claxton\"")
+        parser.add_argument("canonical", nargs="?", help="Name it stands for, e.g. \"Nicolas Claxton\"")
+        parser.add_argument("--suggest", choices=ODDS_POLL_SPORTS, help="Sport whose latest stored slate to look for aliases in")
+
+    def handle(self, *args, **options):
+        alias, canonical = options["alias"], options["canonical"]
+
+        if options["suggest"]:
+            self.suggest(options["suggest"])
+            return
+
+        if alias is None:
+            for key, canonical_key in sorted(PLAYER_ALIASES.items()):
+                self.stdout.write(f"{key} -> {canonical_key}")
+            return
+
+        if canonical is None:
+            self.stdout.write(f"{alias!r} normalizes to {normalize_player_name(alias)!r}")
+            return
+
+        save_alias(alias, canonical)
+        self.stdout.write(f"{normalize_player_name(alias)} -> {normalize_player_name(canonical)}")
+
+    def suggest(self, sport):
+        slate = load_latest_slate(sport)
+        if not slate:
+            self.stdout.write(f"No stored {sport} slate (the poller stores one with ODDS_STORE_ENABLED)")
+            return
+
+        suggested = 0
+        for event_id, odds, dfs_lines in slate:
+            sportsbook_names = {name for name, *_ in odds.rows()}
+            sportsbook_keys = {player_key(name) for name in sportsbook_names}
+            unmatched = sorted({name for name, *_ in dfs_lines.rows() if player_key(name) not in sportsbook_keys})
+
+            for name in unmatched:
+                canonical = suggest_alias(name, sportsbook_names)
+                if canonical is not None:
+                    suggested += 1
+                    self.stdout.write(f"{event_id}: manage.py player_alias \"{name}\" \"{canonical}\"")
+
+        self.stdout.write(f"{suggested} aliases suggested, check each before adding it")
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.services.poller import SnapshotPoller, acquire_poller_lock
+
+
+class Command(BaseCommand):
+    help = (
+        "Keep a fresh priced dfs-player-props snapshot per sport. "
+        "Run with ODDS_CACHE_BACKEND=sqlite so the web workers can read the snapshots. "
+        "Only one poller runs per host, the web workers don't start theirs while this one holds the lock."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sports", help="Comma-separated sports to poll (default: ODDS_POLL_SPORTS)")
+        parser.add_argument("--once", action="store_true", help="Poll every sport once and exit")
+
+    def handle(self, *args, **options):
+        if not acquire_poller_lock():
+            raise CommandError("A snapshot poller is already running on this host (see ODDS_POLLER_LOCK_FILE)")
+
+        sports = options["sports"].split(",") if options["sports"] else None
+        poller = SnapshotPoller(sports)
+
+        if options["once"]:
+            for sport in poller.sports:
+                interval = poller.poll(sport)
+                self.stdout.write(f"{sport}: next poll in {interval:.0f}s")
+            return
+
+        self.stdout.write(f"Polling {', '.join(poller.sports)}")
+        try:
+            poller.run()
+        except KeyboardInterrupt:
+            poller.stop()
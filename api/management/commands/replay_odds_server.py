@@ -0,0 +1,60 @@
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from django.core.management.base import BaseCommand
+from api.services.replay import ReplayStore, FaultInjector
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve recorded odds API responses (see ODDS_RECORD_DIR) over HTTP. "
+        "Point the <SPORT>_EVENTS_API_URL / <SPORT>_PLAYER_PROPS_URL settings at it to run offline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", help="Directory of recorded responses")
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8001)
+        parser.add_argument("--latency-ms", type=float, default=0, help="Fixed latency added to every response")
+        parser.add_argument("--jitter-ms", type=float, default=0, help="Random extra latency, up to this many ms")
+        parser.add_argument("--error-rate", type=float, default=0, help="Share of requests (0..1) answered with an error")
+        parser.add_argument("--error-status", type=int, default=503)
+
+    def handle(self, *args, **options):
+        store = ReplayStore(options["directory"])
+        faults = FaultInjector(options["latency_ms"], options["jitter_ms"], options["error_rate"], options["error_status"])
+
+        class ReplayHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(faults.delay())
+
+                if faults.should_fail():
+                    return self._respond(faults.error_status, {"content-type": "application/json"},
+                                         json.dumps({"message": "Injected replay error"}))
+
+                recording = store.lookup(self.path)
+                if recording is None:
+                    return self._respond(404, {"content-type": "application/json"},
+                                         json.dumps({"message": "No recording for this request"}))
+
+                self._respond(recording["status"], recording["headers"], recording["body"])
+
+            def _respond(self, status, headers, body):
+                body = body.encode("utf-8")
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("content-length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep load tests quiet
+
+        server = ThreadingHTTPServer((options["host"], options["port"]), ReplayHandler)
+        self.stdout.write(f"Replaying {options['directory']} on http://{options['host']}:{options['port']}")
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.shutdown()
@@ -0,0 +1,62 @@
+# Generated by Django 5.1.5 on 2026-10-18 12:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Bookmaker',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=64, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Market',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Event',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sport', models.CharField(max_length=16)),
+                ('event_id', models.CharField(max_length=64)),
+                ('home_team', models.CharField(blank=True, default='', max_length=128)),
+                ('away_team', models.CharField(blank=True, default='', max_length=128)),
+                ('commence_time', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['sport', 'commence_time'], name='api_event_sport_62066c_idx')],
+                'constraints': [models.UniqueConstraint(fields=('sport', 'event_id'), name='unique_sport_event')],
+            },
+        ),
+        migrations.CreateModel(
+            name='OddsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('player', models.CharField(max_length=128)),
+                ('side', models.CharField(max_length=16)),
+                ('point', models.FloatField(null=True)),
+                ('price', models.FloatField(null=True)),
+                ('is_dfs', models.BooleanField(default=False)),
+                ('fetched_at', models.DateTimeField()),
+                ('bookmaker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='odds', to='api.bookmaker')),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='odds', to='api.event')),
+                ('market', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='odds', to='api.market')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['event', 'player', 'market', 'point', 'fetched_at'], name='odds_line_history'), models.Index(fields=['event', 'fetched_at'], name='odds_event_latest')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.5 on 2026-10-18 12:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OddsChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('player', models.CharField(max_length=128)),
+                ('player_key', models.CharField(max_length=128)),
+                ('side', models.CharField(max_length=16)),
+                ('point', models.FloatField(null=True)),
+                ('price', models.FloatField(null=True)),
+                ('is_dfs', models.BooleanField(default=False)),
+                ('removed', models.BooleanField(default=False)),
+                ('keyframe', models.BooleanField(default=False)),
+                ('changed_at', models.DateTimeField()),
+                ('bookmaker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='odds_changes', to='api.bookmaker')),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='odds_changes', to='api.event')),
+                ('market', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='odds_changes', to='api.market')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['player_key', 'event', 'changed_at'], name='odds_change_player'), models.Index(fields=['event', 'changed_at'], name='odds_change_event')],
+            },
+        ),
+        migrations.CreateModel(
+            name='OddsKeyframe',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taken_at', models.DateTimeField()),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='keyframes', to='api.event')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['event', 'taken_at'], name='odds_keyframe_event')],
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+from oddsApi.settings import API_KEY, MLB_PLAYER_PROPS_URL, ODDS_PROPS_CACHE_TTL
+from api.services.http_client import fetch_json
+from api.services.quota import get_quota_tracker
+from ..utils import *
+from .mlb_player_props_odds import parse_mlb_player_props_odds
+from .mlb_dfs_player_prop_lines import parse_dfs_player_props_lines
+import requests
+
+def get_mlb_event_odds(request, event_id):
+    """
+    Fetch sportsbook odds and DFS lines for a given MLB event ID in a single call.
+    The payload is parsed once and split into columnar sportsbook odds ("odds")
+    and columnar DFS lines ("dfs_lines").
+    """
+    player_name_filter = request.GET.get("player_name", None)  # Optional player filter
+    params = {
+        "apiKey": API_KEY,
+        "regions": f"{MLB_PLAYER_ODDS_REGIONS},{MLB_PLAYER_DFS_REGIONS}",  # Sportsbooks and DFS sites together
+        "markets": get_quota_tracker().select_markets(MLB_PLAYER_MARKETS, MLB_LOW_VALUE_MARKETS),  # Fetch player props
+        "oddsFormat": MLB_PLAYER_ODDS_FORMAT,  # Decimal odds format
+    }
+
+    try:
+        url = MLB_PLAYER_PROPS_URL.format(eventId=event_id)
+        data = fetch_json(url, params=params, ttl=ODDS_PROPS_CACHE_TTL, quota_key=("mlb", "event_odds", event_id))
+
+        return split_mlb_event_odds(data, player_name_filter)
+
+    except requests.exceptions.RequestException as e:
+        return {"error": str(e)}
+
+
+def split_mlb_event_odds(data, player_name_filter=None):
+    """
+    Split a combined event odds payload into columnar sportsbook odds and DFS lines.
+    """
+    sportsbook_bookmakers = []
+    dfs_bookmakers = []
+
+    for bookmaker in data.get("bookmakers", []):
+        if bookmaker.get("key", "") in MLB_DFS_BOOKMAKERS:
+            dfs_bookmakers.append(bookmaker)
+        else:
+            sportsbook_bookmakers.append(bookmaker)
+
+    return {
+        "odds": parse_mlb_player_props_odds({"bookmakers": sportsbook_bookmakers}, player_name_filter),
+        "dfs_lines": parse_dfs_player_props_lines({"bookmakers": dfs_bookmakers}),
+    }
@@ -1,5 +1,7 @@
-from django.http import JsonResponse
-from oddsApi.settings import API_KEY, MLB_EVENTS_API_URL
+from api.services.fast_json import FastJsonResponse
+from oddsApi.settings import API_KEY, MLB_EVENTS_API_URL, ODDS_EVENTS_CACHE_TTL
+from api.services.http_client import fetch_json
+from api.services.event_fetcher import filter_upcoming_events
 import requests
 
 def get_mlb_events_ids(request):
@@ -11,9 +13,7 @@ def get_mlb_events_ids(request):
     }
 
     try:
-        response = requests.get(MLB_EVENTS_API_URL, params=params)
-        response.raise_for_status()
-        data = response.json()
+        data = fetch_json(MLB_EVENTS_API_URL, params=params, ttl=ODDS_EVENTS_CACHE_TTL, quota_key=("mlb", "events", None))
 
         if isinstance(data, dict) and "events" in data:
             data = data["events"]
@@ -34,14 +34,33 @@ def get_mlb_events(request):
     }
 
     try:
-        response = requests.get(MLB_EVENTS_API_URL, params=params)
-        response.raise_for_status()
-        data = response.json()
+        data = fetch_json(MLB_EVENTS_API_URL, params=params, ttl=ODDS_EVENTS_CACHE_TTL, quota_key=("mlb", "events", None))
 
         # Extract event IDs
         events = [{"id": event["id"], "matchup": f"{event['home_team']} vs {event['away_team']}"} for event in data]
 
-        return JsonResponse({"mlb_events": events}, safe=False)
+        return FastJsonResponse({"mlb_events": events}, safe=False)
 
     except requests.exceptions.RequestException as e:
-        return JsonResponse({"error": str(e)}, status=500)
\ No newline at end of file
+        return FastJsonResponse({"error": str(e)}, status=500)
+
+
+def get_mlb_upcoming_events(request):
+    """
+    Fetch the MLB games that haven't started yet, with their commence times.
+    """
+    params = {
+        "apiKey": API_KEY,
+    }
+
+    try:
+        data = fetch_json(MLB_EVENTS_API_URL, params=params, ttl=ODDS_EVENTS_CACHE_TTL, quota_key=("mlb", "events", None))
+
+        if isinstance(data, dict) and "events" in data:
+            data = data["events"]
+
+        return filter_upcoming_events(data)
+
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching MLB events: {e}")  # Log error for debugging
+        return []
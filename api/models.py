@@ -1,3 +1,107 @@
 from django.db import models
 
-# Create your models here.
+
+class Event(models.Model):
+    """
+    An odds API event (game) of a sport.
+    """
+    sport = models.CharField(max_length=16)
+    event_id = models.CharField(max_length=64)
+    home_team = models.CharField(max_length=128, blank=True, default="")
+    away_team = models.CharField(max_length=128, blank=True, default="")
+    commence_time = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["sport", "event_id"], name="unique_sport_event")]
+        indexes = [models.Index(fields=["sport", "commence_time"])]
+
+    def __str__(self):
+        return f"{self.sport} {self.event_id}"
+
+
+class Bookmaker(models.Model):
+    """
+    A sportsbook or DFS site, by the title the odds API gives it.
+    """
+    title = models.CharField(max_length=64, unique=True)
+
+    def __str__(self):
+        return self.title
+
+
+class Market(models.Model):
+    """
+    A player prop market key ("player_points"...).
+    """
+    key = models.CharField(max_length=64, unique=True)
+
+    def __str__(self):
+        return self.key
+
+
+class OddsSnapshot(models.Model):
+    """
+    One outcome as a bookmaker quoted it at fetched_at. Every outcome of an event fetched in the
+    same poll cycle shares fetched_at, so an event's latest snapshot is the rows of its newest fetched_at.
+    """
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="odds")
+    bookmaker = models.ForeignKey(Bookmaker, on_delete=models.CASCADE, related_name="odds")
+    market = models.ForeignKey(Market, on_delete=models.CASCADE, related_name="odds")
+    player = models.CharField(max_length=128)
+    side = models.CharField(max_length=16)  # Outcome name, "Over"/"Under"
+    point = models.FloatField(null=True)
+    price = models.FloatField(null=True)  # Decimal odds
+    is_dfs = models.BooleanField(default=False)  # DFS line rather than sportsbook odds
+    fetched_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["event", "player", "market", "point", "fetched_at"], name="odds_line_history"),
+            models.Index(fields=["event", "fetched_at"], name="odds_event_latest"),
+        ]
+
+    def __str__(self):
+        return f"{self.player} {self.market_id} {self.side} {self.point} @ {self.price}"
+
+
+class OddsChange(models.Model):
+    """
+    One entry of the line-movement history: an outcome whose price changed, appeared or (removed) went away
+    since the event's previous snapshot, or, on keyframe rows, every outcome of the event as it stood at changed_at.
+    Replaying an event's rows from its latest keyframe up to a time gives its state at that time.
+    """
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="odds_changes")
+    bookmaker = models.ForeignKey(Bookmaker, on_delete=models.CASCADE, related_name="odds_changes")
+    market = models.ForeignKey(Market, on_delete=models.CASCADE, related_name="odds_changes")
+    player = models.CharField(max_length=128)
+    player_key = models.CharField(max_length=128)  # normalize_player_name(player), what ?player= is looked up by
+    side = models.CharField(max_length=16)
+    point = models.FloatField(null=True)
+    price = models.FloatField(null=True)  # Decimal odds
+    is_dfs = models.BooleanField(default=False)
+    removed = models.BooleanField(default=False)  # The outcome is no longer quoted
+    keyframe = models.BooleanField(default=False)  # Part of a full snapshot of the event
+    changed_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["player_key", "event", "changed_at"], name="odds_change_player"),
+            models.Index(fields=["event", "changed_at"], name="odds_change_event"),
+        ]
+
+    def __str__(self):
+        return f"{self.player} {self.market_id} {self.side} {self.point} @ {self.price} ({self.changed_at})"
+
+
+class OddsKeyframe(models.Model):
+    """
+    When a full snapshot of an event was written to the history (its keyframe rows share taken_at).
+    """
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="keyframes")
+    taken_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=["event", "taken_at"], name="odds_keyframe_event")]
+
+    def __str__(self):
+        return f"{self.event} keyframe {self.taken_at}"
@@ -0,0 +1,52 @@
+from oddsApi.settings import API_KEY, NBA_PLAYER_PROPS_URL, ODDS_PROPS_CACHE_TTL
+from api.services.http_client import fetch_json
+from api.services.quota import get_quota_tracker
+from api.services.alt_lines import alt_lines_option, with_alternate_markets
+from ..utils import *
+from .nba_player_props_odds import parse_nba_player_props_odds
+from .nba_dfs_player_prop_lines import parse_dfs_player_props_lines
+import requests
+
+def get_nba_event_odds(request, event_id):
+    """
+    Fetch sportsbook odds and DFS lines for a given NBA event ID in a single call.
+    The payload is parsed once and split into columnar sportsbook odds ("odds")
+    and columnar DFS lines ("dfs_lines").
+    """
+    player_name_filter = request.GET.get("player_name", None)  # Optional player filter
+    # The alternate markets (?alt_lines=true) are dropped first when the quota runs low
+    markets = with_alternate_markets(NBA_PLAYER_MARKETS, NBA_ALTERNATE_PLAYER_MARKETS, alt_lines_option(request, NBA_ALTERNATE_LINES))
+    params = {
+        "apiKey": API_KEY,
+        "regions": f"{NBA_PLAYER_ODDS_REGIONS},{NBA_PLAYER_DFS_REGIONS}",  # Sportsbooks and DFS sites together
+        "markets": get_quota_tracker().select_markets(markets, NBA_LOW_VALUE_MARKETS + NBA_ALTERNATE_PLAYER_MARKETS.split(",")),  # Fetch player props
+        "oddsFormat": NBA_PLAYER_ODDS_FORMAT,  # Decimal odds format
+    }
+
+    try:
+        url = NBA_PLAYER_PROPS_URL.format(eventId=event_id)
+        data = fetch_json(url, params=params, ttl=ODDS_PROPS_CACHE_TTL, quota_key=("nba", "event_odds", event_id))
+
+        return split_nba_event_odds(data, player_name_filter)
+
+    except requests.exceptions.RequestException as e:
+        return {"error": str(e)}
+
+
+def split_nba_event_odds(data, player_name_filter=None):
+    """
+    Split a combined event odds payload into columnar sportsbook odds and DFS lines.
+    """
+    sportsbook_bookmakers = []
+    dfs_bookmakers = []
+
+    for bookmaker in data.get("bookmakers", []):
+        if bookmaker.get("key", "") in NBA_DFS_BOOKMAKERS:
+            dfs_bookmakers.append(bookmaker)
+        else:
+            sportsbook_bookmakers.append(bookmaker)
+
+    return {
+        "odds": parse_nba_player_props_odds({"bookmakers": sportsbook_bookmakers}, player_name_filter),
+        "dfs_lines": parse_dfs_player_props_lines({"bookmakers": dfs_bookmakers}),
+    }
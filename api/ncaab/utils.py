@@ -1,7 +1,9 @@
 # utils.py
-import openpyxl
-from openpyxl.styles import Alignment
 from oddsApi.settings import NCAAB_UNDERDOG_PROPS_FILE_PATH, NCAAB_PRIZEPICKS_PROPS_FILE_PATH
+from api.services.ranking import top_k_rows
+from api.services.pricing_engine import average_matched
+from api.services.excel_writer import queue_excel_export
+from api.services.parquet_archive import archive_priced
 # markets => 
 # [ player_points, player_rebounds, player_assists, player_points_rebounds_assists,
 # player_points_rebounds, player_points_assists, player_rebounds_assists, player_blocks, player_steals, 
@@ -15,99 +17,64 @@ NCAAB_PLAYER_MARKETS = "player_assists"
 NCAAB_ALTERNATE_PLAYER_MARKETS = ""
 NCAAB_PLAYER_ODDS_REGIONS = "us"
 NCAAB_PLAYER_DFS_REGIONS = "us_dfs"
+NCAAB_DFS_BOOKMAKERS = ["underdog", "prizepicks", "pick6", "betr_us_dfs"]  # Bookmakers returned by the DFS region
+NCAAB_LOW_VALUE_MARKETS = []  # Dropped first when the API quota runs low
 NCAAB_PLAYER_ODDS_FORMAT = "decimal"
+NCAAB_TOP_PROPS = 20  # Props kept per DFS site, overridable with ?top=
+NCAAB_RANK_BY = "implied_probability"  # Overridable with ?rank_by=
+NCAAB_RANK_BY_OPTIONS = ["implied_probability"]
+NCAAB_DEVIG_METHOD = None  # Raw average odds; ?devig= de-vigs every book first (multiplicative, additive, power, shin)
 
-def filter_better_odds_selection(player_props, dfs_site):
+def filter_better_odds_selection(matched_props, dfs_site, top=NCAAB_TOP_PROPS, rank_by=NCAAB_RANK_BY, tie_break=None, devig=NCAAB_DEVIG_METHOD):
     """
     Filters out the worse odds for each player by comparing 'over' and 'under' odds for each bookmaker.
     Keeps only the better (more negative) odds per bookmaker, based on the overall best selection.
+    matched_props are one site's DFS lines matched to the columnar bookmaker odds (MatchedProps).
     """
     filtered_props = []
 
-    for prop in player_props:
-        player_name = prop["player_name"]
-        market = prop["market"]
-        prop_line = prop["prop_line"]
-        bookmaker_odds = prop["bookmaker_odds"]
+    # Average each side's odds (de-vigged when a method is set) and pick the better selection of all props in one batch
+    priced = average_matched(matched_props, devig)
 
-        market = format_market(market.lower())
-        
-        over_odds_total = 0
-        under_odds_total = 0
-        over_count = 0
-        under_count = 0
-        better_selection = ""
-
-        # Organize odds by bookmaker
-        for odds_entry in bookmaker_odds:
-            selection = odds_entry["selection"].lower()  # "over" or "under"
-            odds = odds_entry["odds"]
+    # Props where both sides average the same have no better selection
+    eligible = [selection in ("over", "under") for selection in priced.lean]
 
-            # Track sum and count for averaging
-            if selection == "over":
-                over_odds_total += odds
-                over_count += 1
-            elif selection == "under":
-                under_odds_total += odds
-                under_count += 1
+    # Rank once over the whole slate, only the top props are built
+    for i in top_k_rows(priced, top, rank_by, tie_break, eligible):
+        player_name, market, prop_line = matched_props.prop(i)
+        better_selection = priced.lean[i]
 
-        # Calculate average odds, avoid division by zero
-        avg_over_odds = over_odds_total / over_count if over_count > 0 else None
-        avg_under_odds = under_odds_total / under_count if under_count > 0 else None
-
-        # Round average odds to two decimal places
-        avg_over_odds = round(avg_over_odds, 2) if avg_over_odds is not None else None
-        avg_under_odds = round(avg_under_odds, 2) if avg_under_odds is not None else None
-
-        # Determine better selection based on averages
-        if avg_over_odds and avg_under_odds:
-            if avg_over_odds < avg_under_odds:
-                better_selection = "over"
-            elif avg_over_odds > avg_under_odds:
-                better_selection = "under"
-            else:
-                better_selection = "n/a"
-        elif avg_over_odds:  # If there's no under odds, pick over
-            better_selection = "over"
-        elif avg_under_odds:  # If there's no over odds, pick under
-            better_selection = "under"
+        market = format_market(market.lower())
 
-        if better_selection == "n/a":
-            continue
-        
         # Filter bookmaker odds for the better selection
         selected_bookmaker_odds = []
-        for odds_entry in bookmaker_odds:
-            if odds_entry["selection"].lower() == better_selection:
+        for position, selection, bookmaker, odds in matched_props.entries_of(i):
+            if selection.lower() == better_selection:
                 selected_bookmaker_odds.append({
-                    "selection": odds_entry["selection"],
+                    "selection": selection,
                     "market": market,
                     "point": prop_line,
-                    "odds": decimal_to_american(odds_entry["odds"]),
-                    "bookmaker": odds_entry["bookmaker"]
+                    "odds": priced.entry_odds[position],
+                    "bookmaker": bookmaker
                 })
 
-        average_odds = decimal_to_american(avg_over_odds) if better_selection == "over" else decimal_to_american(avg_under_odds)
-
         filtered_props.append({
             "player_name": player_name,
             "market": market,
             "point": prop_line,
             "lean": better_selection,
-            "average_odds": average_odds,
-            "implied_probability": implied_probability(average_odds),
+            "average_odds": priced.average_odds[i],
+            "implied_probability": priced.value("implied_probability", i),
             "bookmaker_odds": selected_bookmaker_odds
         })
 
-        filtered_props.sort(key=lambda x: x["implied_probability"], reverse=True)
-
-        # Keep only the top 20 elements if there are more than 20
-        filtered_props = filtered_props[:20]
+    # Archive every priced prop, not only the top ones (when ODDS_ARCHIVE_DIR is set)
+    archive_priced("ncaab", dfs_site, priced, eligible, devig=devig)
 
-        if dfs_site.lower() == "ud":
-            export_to_excel(filtered_props, NCAAB_UNDERDOG_PROPS_FILE_PATH)
-        elif dfs_site.lower() == "pp":
-            export_to_excel(filtered_props, NCAAB_PRIZEPICKS_PROPS_FILE_PATH)
+    if dfs_site.lower() == "ud":
+        export_to_excel(filtered_props, NCAAB_UNDERDOG_PROPS_FILE_PATH)
+    elif dfs_site.lower() == "pp":
+        export_to_excel(filtered_props, NCAAB_PRIZEPICKS_PROPS_FILE_PATH)
 
     return filtered_props
 
@@ -164,72 +131,45 @@ def implied_probability(average_odds):
     return round(probability * 100, 2)  # Return as percentage, rounded to 2 decimal places
 
 def export_to_excel(data, filename):
+    """
+    Queue the props for the background Excel writer, which writes the workbook off the request path.
+    """
     # Define the headers as you requested
     headers = ["Player Name", "Lean", "Prop Line", "Market", "DraftKings", "FanDuel", "BetRivers", "BetOnline.ag", "Bovada", "BetMGM", "Implied Probability"]
 
-    try:
-        # Create a new workbook and active sheet
-        wb = openpyxl.Workbook()
-        sheet = wb.active
-        sheet.title = "Player Props"
-
-        # Add the headers to the first row and center align them
-        for col_num, header in enumerate(headers, 1):
-            sheet.cell(row=1, column=col_num, value=header)
-            # Apply center alignment for headers
-            sheet.cell(row=1, column=col_num).alignment = Alignment(horizontal="center")
-
-        # Loop through the data and add rows for each prop
-        for row_num, prop in enumerate(data, 2):
-            player_name = prop.get("player_name", "n/a")
-            market = prop.get("market", "n/a")
-            lean = prop.get("lean", "n/a")
-            prop_line = prop.get("point", "n/a")
-            implied_probability = prop.get("implied_probability", "n/a")
-            bookmaker_odds = prop.get("bookmaker_odds", [])
-
-            # combined_prop_line_market = f"{prop_line} {market}"
-
-            # Initialize the odds dictionary with "n/a" for each bookmaker
-            bookmaker_columns = {
-                "DraftKings": "n/a",
-                "FanDuel": "n/a",
-                "BetRivers": "n/a",
-                "BetOnline.ag": "n/a",
-                "Bovada": "n/a",
-                "BetMGM": "n/a"
-            }
-
-            # Loop through each bookmaker and add the odds to the correct column
-            for odds_entry in bookmaker_odds:
-                bookmaker_name = odds_entry["bookmaker"]
-                if bookmaker_name in bookmaker_columns:
-                    bookmaker_columns[bookmaker_name] = odds_entry["odds"]
-
-            # Flatten the odds and implied probabilities for the row
-            row = [player_name, lean.capitalize(), prop_line, market] + list(bookmaker_columns.values()) + [implied_probability]
-
-            # Add the row data to the sheet and apply center alignment
-            for col_num, cell_value in enumerate(row, 1):
-                cell = sheet.cell(row=row_num, column=col_num, value=cell_value)
-                cell.alignment = Alignment(horizontal="center")
-
-        # Adjust column width based on the longest cell content
-        for col_num in range(1, len(headers) + 1):
-            max_length = 0
-            for row_num in range(1, len(data) + 1):  # +2 for headers and rows
-                cell_value = str(sheet.cell(row=row_num, column=col_num).value)
-                max_length = max(max_length, len(cell_value))
-            adjusted_width = (max_length + 2)  # Add a little padding
-            sheet.column_dimensions[openpyxl.utils.get_column_letter(col_num)].width = adjusted_width
-
-        # Save the workbook to the specified filename
-        wb.save(filename)
+    rows = []
+
+    # Loop through the data and add a row for each prop
+    for prop in data:
+        player_name = prop.get("player_name", "n/a")
+        market = prop.get("market", "n/a")
+        lean = prop.get("lean", "n/a")
+        prop_line = prop.get("point", "n/a")
+        implied_probability = prop.get("implied_probability", "n/a")
+        bookmaker_odds = prop.get("bookmaker_odds", [])
+
+        # combined_prop_line_market = f"{prop_line} {market}"
+
+        # Initialize the odds dictionary with "n/a" for each bookmaker
+        bookmaker_columns = {
+            "DraftKings": "n/a",
+            "FanDuel": "n/a",
+            "BetRivers": "n/a",
+            "BetOnline.ag": "n/a",
+            "Bovada": "n/a",
+            "BetMGM": "n/a"
+        }
+
+        # Loop through each bookmaker and add the odds to the correct column
+        for odds_entry in bookmaker_odds:
+            bookmaker_name = odds_entry["bookmaker"]
+            if bookmaker_name in bookmaker_columns:
+                bookmaker_columns[bookmaker_name] = odds_entry["odds"]
 
-        print(f"Data successfully exported")
+        # Flatten the odds and implied probabilities for the row
+        rows.append([player_name, lean.capitalize(), prop_line, market] + list(bookmaker_columns.values()) + [implied_probability])
 
-    except Exception as e:
-        print(f"Error exporting data: {e}")
+    queue_excel_export(filename, headers, rows)
 
 
 # def export_to_csv(data, filename):
@@ -1,17 +1,24 @@
-from django.http import JsonResponse
+from api.services.fast_json import FastJsonResponse
 from django.views import View
 import requests
 import json
 from openpyxl.utils.dataframe import dataframe_to_rows
 import pandas as pd
 from .services.ncaab_events import *
-from .services.ncaab_player_props_odds import get_ncaab_player_props_odds
-from .services.ncaab_dfs_player_prop_lines import get_dfs_player_props_lines
+from .services.ncaab_event_odds import get_ncaab_event_odds
 from .utils import *
+from oddsApi.settings import NCAAB_MAX_CONCURRENT_EVENTS
+from api.services.event_fetcher import fetch_events_concurrently
+from api.services.snapshots import get_snapshot
+from api.services.prop_index import match_slate
+from api.services.odds_store import load_latest_slate, record_slate, store_option
+from api.services.odds_history import history_options, player_history
+from api.services.ranking import ranking_options
+from api.services.devig import devig_option
 
 class HomeView(View):
     def get(self, request, *args, **kwargs):
-        return JsonResponse({"message": "Hello, World!"})
+        return FastJsonResponse({"message": "Hello, World!"})
     
 def get_ncaab_events_info(request):
     return get_ncaab_events(request)
@@ -23,57 +30,69 @@ def get_ncaab_player_props_value(request):
     Filters out bookmaker odds that don't match the DFS prop line.
     """
     try:
-        event_ids = get_ncaab_events_ids(request)
-        event_ids = [event_ids[18]] # Remove when ready for production
+        # Unfiltered requests are answered from the background poller's latest snapshot when it is fresh
+        if not request.GET:
+            snapshot = get_snapshot("ncaab")
+            if snapshot is not None:
+                return FastJsonResponse(snapshot, safe=False)
 
-        underdog_props = []
-        prizepicks_props = []
+        return FastJsonResponse(compute_ncaab_player_props_value(request), safe=False)
+
+    except Exception as e:
+        print("Error:", e)  # Debugging line
+        return FastJsonResponse({"error": str(e)}, safe=False)
 
-        for event_id in event_ids:
-            player_props_odds = get_ncaab_player_props_odds(request, event_id).get("player_props", {})
 
-            if not player_props_odds:
-                continue
+def compute_ncaab_player_props_value(request, event_ids=None, events=None):
+    """
+    Fetch, match and price the props of every NCAAB event (or only event_ids when given).
+    Used by the dfs-player-props view and by the background snapshot poller, which passes its upcoming
+    events so the full slate it fetched is recorded in the odds store.
+    """
+    # ?top=, ?rank_by= and ?tie_break= override the sport's ranking defaults
+    top, rank_by, tie_break = ranking_options(request, NCAAB_TOP_PROPS, NCAAB_RANK_BY, NCAAB_RANK_BY_OPTIONS)
+    devig = devig_option(request, NCAAB_DEVIG_METHOD)  # ?devig= overrides the sport's de-vig method
 
-            dfs_data = get_dfs_player_props_lines(request, event_id).get("player_props", {})
-            
-            for player_name, dfs_lines in dfs_data.items():
-                if player_name not in player_props_odds:
-                    continue  # Skip if no matching bookmaker data
+    if store_option(request):
+        # ?source=store: the latest stored snapshot of every event, one indexed query and no upstream calls
+        event_results = load_latest_slate("ncaab", event_ids, player_name_filter=request.GET.get("player_name"))
+    else:
+        if event_ids is None:
+            event_ids = get_ncaab_events_ids(request)
 
-                for dfs_line in dfs_lines:
-                    prop_line = dfs_line["prop_line"]
-                    market = dfs_line["market"]
-                    bookmaker = dfs_line["bookmaker"].lower()
+        def fetch_event(event_id):
+            # One upstream call returns both the sportsbook odds and the DFS lines
+            event_odds = get_ncaab_event_odds(request, event_id)
+            return event_id, event_odds.get("odds"), event_odds.get("dfs_lines")
 
-                    matching_odds = [
-                        odds for odds in player_props_odds[player_name]
-                        if odds["point"] == prop_line and odds["market"] == market
-                    ]
+        # Fetch every event in parallel, results come back in event order
+        event_results = fetch_events_concurrently(event_ids, fetch_event, NCAAB_MAX_CONCURRENT_EVENTS)
 
-                    if not matching_odds:
-                        continue
+        # Only the poller's unfiltered cycles go to the odds store (when ODDS_STORE_ENABLED), written off the request path
+        if events is not None:
+            record_slate("ncaab", event_results, events)
 
-                    player_entry = {
-                        "player_name": player_name,
-                        "market": market,
-                        "prop_line": prop_line,
-                        "bookmaker_odds": matching_odds
-                    }
+    # Stack the events into one columnar slate and match every DFS line to the bookmaker odds
+    # for the same player, market and line in one pass
+    matched_props = match_slate(event_results, sort_players=True)
 
-                    if bookmaker == "underdog":
-                        underdog_props.append(player_entry)
-                    elif bookmaker == "prizepicks":
-                        prizepicks_props.append(player_entry)
+    underdog_props = filter_better_odds_selection(matched_props.for_site("underdog"), "ud", top, rank_by, tie_break, devig)
+    prizepicks_props = filter_better_odds_selection(matched_props.for_site("prizepicks"), "pp", top, rank_by, tie_break, devig)
 
-        underdog_props = filter_better_odds_selection(underdog_props, "ud")
-        prizepicks_props = filter_better_odds_selection(prizepicks_props, "pp")
+    return {
+        "underdog_props": underdog_props,
+        "prizepicks_props": prizepicks_props
+    }
 
-        return JsonResponse({
-            "underdog_props": underdog_props,
-            "prizepicks_props": prizepicks_props
-        }, safe=False)
+
+def get_ncaab_history(request):
+    """
+    How a player's NCAAB lines and prices moved (?player=, optional ?market=, ?bookmaker=, ?since=, ?at=),
+    answered from the stored line-movement history.
+    """
+    try:
+        return FastJsonResponse(player_history("ncaab", *history_options(request)), safe=False)
 
     except Exception as e:
         print("Error:", e)  # Debugging line
-        return JsonResponse({"error": str(e)}, safe=False)
\ No newline at end of file
+        return FastJsonResponse({"error": str(e)}, safe=False)
@@ -1,5 +1,7 @@
-from django.http import JsonResponse
-from oddsApi.settings import API_KEY, NCAAF_EVENTS_API_URL
+from api.services.fast_json import FastJsonResponse
+from oddsApi.settings import API_KEY, NCAAF_EVENTS_API_URL, ODDS_EVENTS_CACHE_TTL
+from api.services.http_client import fetch_json
+from api.services.event_fetcher import filter_upcoming_events
 import requests
 
 def get_ncaaf_events_ids(request):
@@ -11,9 +13,7 @@ def get_ncaaf_events_ids(request):
     }
 
     try:
-        response = requests.get(NCAAF_EVENTS_API_URL, params=params)
-        response.raise_for_status()
-        data = response.json()
+        data = fetch_json(NCAAF_EVENTS_API_URL, params=params, ttl=ODDS_EVENTS_CACHE_TTL, quota_key=("ncaaf", "events", None))
 
         if isinstance(data, dict) and "events" in data:
             data = data["events"]
@@ -34,14 +34,33 @@ def get_ncaaf_events(request):
     }
 
     try:
-        response = requests.get(NCAAF_EVENTS_API_URL, params=params)
-        response.raise_for_status()
-        data = response.json()
+        data = fetch_json(NCAAF_EVENTS_API_URL, params=params, ttl=ODDS_EVENTS_CACHE_TTL, quota_key=("ncaaf", "events", None))
 
         # Extract event IDs
         events = [{"id": event["id"], "matchup": f"{event['home_team']} vs {event['away_team']}"} for event in data]
 
-        return JsonResponse({"ncaaf_events": events}, safe=False)
+        return FastJsonResponse({"ncaaf_events": events}, safe=False)
 
     except requests.exceptions.RequestException as e:
-        return JsonResponse({"error": str(e)}, status=500)
\ No newline at end of file
+        return FastJsonResponse({"error": str(e)}, status=500)
+
+
+def get_ncaaf_upcoming_events(request):
+    """
+    Fetch the NCAAF games that haven't started yet, with their commence times.
+    """
+    params = {
+        "apiKey": API_KEY,
+    }
+
+    try:
+        data = fetch_json(NCAAF_EVENTS_API_URL, params=params, ttl=ODDS_EVENTS_CACHE_TTL, quota_key=("ncaaf", "events", None))
+
+        if isinstance(data, dict) and "events" in data:
+            data = data["events"]
+
+        return filter_upcoming_events(data)
+
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching NCAAF events: {e}")  # Log error for debugging
+        return []
@@ -1,9 +1,18 @@
-from django.http import JsonResponse
+from api.services.fast_json import FastJsonResponse
 from django.views import View
 from .services.nfl_events import *
-from .services.nfl_player_props_odds import get_nfl_player_props_odds
-from .services.nfl_dfs_player_prop_lines import get_dfs_player_props_lines
+from .services.nfl_event_odds import get_nfl_event_odds
 from .utils import *
+from oddsApi.settings import NFL_MAX_CONCURRENT_EVENTS
+from api.services.event_fetcher import fetch_events_concurrently
+from api.services.snapshots import get_snapshot
+from api.services.prop_index import match_slate
+from api.services.odds_store import load_latest_slate, record_slate, store_option
+from api.services.odds_history import history_options, player_history
+from api.services.ranking import ranking_options
+from api.services.devig import devig_option
+from api.services.expected_value import ev_options
+from api.services.entry_optimizer import entry_options
     
 def get_nfl_events_info(request):
     return get_nfl_events(request)
@@ -14,56 +23,105 @@ def get_nfl_player_props_value(request):
     Filters out bookmaker odds that don't match the DFS prop line.
     """
     try:
-        event_ids = get_nfl_events_ids(request)
-
-        underdog_props = []
-        prizepicks_props = []
-
-        for event_id in event_ids:
-            player_props_odds = get_nfl_player_props_odds(request, event_id).get("player_props", {})
-            
-            if not player_props_odds:
-                continue
-            
-            dfs_data = get_dfs_player_props_lines(request, event_id).get("player_props", {})
-
-            for player_name, dfs_lines in dfs_data.items():
-                if player_name not in player_props_odds:
-                    continue  # Skip if no matching bookmaker data
-
-                for dfs_line in dfs_lines:
-                    prop_line = dfs_line["prop_line"]
-                    market = dfs_line["market"]
-                    bookmaker = dfs_line["bookmaker"].lower()
-
-                    matching_odds = [
-                        odds for odds in player_props_odds[player_name]
-                        if odds["point"] == prop_line and odds["market"] == market
-                    ]
-
-                    if not matching_odds:
-                        continue
-
-                    player_entry = {
-                        "player_name": player_name,
-                        "market": market,
-                        "prop_line": prop_line,
-                        "bookmaker_odds": matching_odds
-                    }
-
-                    if bookmaker == "underdog":
-                        underdog_props.append(player_entry)
-                    elif bookmaker == "prizepicks":
-                        prizepicks_props.append(player_entry)
-
-        underdog_props = filter_better_odds_lean(underdog_props, "ud")
-        prizepicks_props = filter_better_odds_lean(prizepicks_props, "pp")
-
-        return JsonResponse({
-            "underdog_props": underdog_props,
-            "prizepicks_props": prizepicks_props
+        # Unfiltered requests are answered from the background poller's latest snapshot when it is fresh
+        if not request.GET:
+            snapshot = get_snapshot("nfl")
+            if snapshot is not None:
+                return FastJsonResponse(snapshot, safe=False)
+
+        return FastJsonResponse(compute_nfl_player_props_value(request), safe=False)
+
+    except Exception as e:
+        print("Error:", e)  # Debugging line
+        return FastJsonResponse({"error": str(e)}, safe=False)
+
+
+def compute_nfl_player_props_value(request, event_ids=None, events=None):
+    """
+    Fetch, match and price the props of every NFL event (or only event_ids when given).
+    Used by the dfs-player-props view and by the background snapshot poller, which passes its upcoming
+    events so the full slate it fetched is recorded in the odds store.
+    """
+    # ?top=, ?rank_by= and ?tie_break= override the sport's ranking defaults
+    top, rank_by, tie_break = ranking_options(request, NFL_TOP_PROPS, NFL_RANK_BY, NFL_RANK_BY_OPTIONS)
+    devig = devig_option(request, NFL_DEVIG_METHOD)  # ?devig= overrides the sport's de-vig method
+    entry_type, legs = ev_options(request)  # ?entry= and ?legs= pick the DFS payout table EV is priced against
+
+    matched_props = fetch_nfl_matched_props(request, event_ids, events)
+
+    underdog_props = filter_better_odds_lean(matched_props.for_site("underdog"), "ud", top, rank_by, tie_break, devig, entry_type, legs)
+    prizepicks_props = filter_better_odds_lean(matched_props.for_site("prizepicks"), "pp", top, rank_by, tie_break, devig, entry_type, legs)
+
+    return {
+        "underdog_props": underdog_props,
+        "prizepicks_props": prizepicks_props
+    }
+
+
+def fetch_nfl_matched_props(request, event_ids=None, events=None):
+    """
+    Fetch every NFL event (or only event_ids when given) and match their DFS lines to the bookmaker odds (MatchedProps).
+    The slate is recorded in the odds store only for the poller (events given).
+    """
+    if store_option(request):
+        # ?source=store: the latest stored snapshot of every event, one indexed query and no upstream calls
+        event_results = load_latest_slate("nfl", event_ids, player_name_filter=request.GET.get("player_name"))
+    else:
+        if event_ids is None:
+            event_ids = get_nfl_events_ids(request)
+
+        def fetch_event(event_id):
+            # One upstream call returns both the sportsbook odds and the DFS lines
+            event_odds = get_nfl_event_odds(request, event_id)
+            return event_id, event_odds.get("odds"), event_odds.get("dfs_lines")
+
+        # Fetch every event in parallel, results come back in event order
+        event_results = fetch_events_concurrently(event_ids, fetch_event, NFL_MAX_CONCURRENT_EVENTS)
+
+        # Only the poller's unfiltered cycles go to the odds store (when ODDS_STORE_ENABLED), written off the request path
+        if events is not None:
+            record_slate("nfl", event_results, events)
+
+    # Stack the events into one columnar slate and match every DFS line to the bookmaker odds
+    # for the same player, market and line in one pass
+    matched_props = match_slate(event_results)
+
+    return matched_props
+
+
+def get_nfl_dfs_entries(request):
+    """
+    Build the best Underdog and PrizePicks entries from the NFL props by expected return.
+    ?entry=, ?legs=, ?count=, ?min_games= and ?max_per_game= shape the entries.
+    """
+    try:
+        devig = devig_option(request, NFL_DEVIG_METHOD)
+        entry_type, legs = ev_options(request)
+        count, min_games, max_per_game = entry_options(request)
+
+        matched_props = fetch_nfl_matched_props(request)
+
+        underdog_entries = build_nfl_entries(matched_props.for_site("underdog"), "ud", count, devig, entry_type, legs, min_games, max_per_game)
+        prizepicks_entries = build_nfl_entries(matched_props.for_site("prizepicks"), "pp", count, devig, entry_type, legs, min_games, max_per_game)
+
+        return FastJsonResponse({
+            "underdog_entries": underdog_entries,
+            "prizepicks_entries": prizepicks_entries
         }, safe=False)
 
     except Exception as e:
         print("Error:", e)  # Debugging line
-        return JsonResponse({"error": str(e)}, safe=False)
\ No newline at end of file
+        return FastJsonResponse({"error": str(e)}, safe=False)
+
+
+def get_nfl_history(request):
+    """
+    How a player's NFL lines and prices moved (?player=, optional ?market=, ?bookmaker=, ?since=, ?at=),
+    answered from the stored line-movement history.
+    """
+    try:
+        return FastJsonResponse(player_history("nfl", *history_options(request)), safe=False)
+
+    except Exception as e:
+        print("Error:", e)  # Debugging line
+        return FastJsonResponse({"error": str(e)}, safe=False)
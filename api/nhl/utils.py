@@ -1,13 +1,25 @@
 # utils.py
-import openpyxl
-from openpyxl.styles import Alignment
-from oddsApi.settings import NHL_UNDERDOG_PROPS_FILE_PATH, NHL_PRIZEPICKS_PROPS_FILE_PATH
+import numpy as np
+from oddsApi.settings import NHL_UNDERDOG_PROPS_FILE_PATH, NHL_PRIZEPICKS_PROPS_FILE_PATH, DFS_ENTRY_TYPE, DFS_ENTRY_LEGS, DFS_ENTRY_MIN_GAMES, DFS_ENTRY_MAX_PER_GAME
+from api.services.excel_writer import queue_excel_export
+from api.services.parquet_archive import archive_priced
+from api.services.incremental_pricing import price_incremental, top_k_incremental
+from api.services.expected_value import add_expected_value
+from api.services.entry_optimizer import optimize_entries, DEFAULT_ENTRY_COUNT
 # markets => 
 # [ player_points, player_assists, player_blocked_shots, player_shots_on_goal, player_goals, player_total_saves ]
 NHL_PLAYER_MARKETS = "player_points"
 NHL_PLAYER_ODDS_REGIONS = "us,eu"
 NHL_PLAYER_DFS_REGIONS = "us_dfs"
+NHL_DFS_BOOKMAKERS = ["underdog", "prizepicks", "pick6", "betr_us_dfs"]  # Bookmakers returned by the DFS region
+NHL_LOW_VALUE_MARKETS = []  # Dropped first when the API quota runs low
 NHL_PLAYER_ODDS_FORMAT = "decimal"
+NHL_TOP_PROPS = 15  # Props kept per DFS site, overridable with ?top=
+NHL_RANK_BY = "fair_probability"  # Overridable with ?rank_by=
+NHL_RANK_BY_OPTIONS = ["fair_probability", "edge", "ev"]
+NHL_DEVIG_METHOD = "multiplicative"  # Overridable with ?devig= (multiplicative, additive, power, shin)
+NHL_MIN_BOOKMAKERS = 0  # Bookmakers a prop must be quoted by to be ranked
+NHL_REQUIRED_BOOKMAKERS = []  # When set, a ranked prop must be quoted by one of them
 NHL_BOOKMAKERS = ["pinnacle", "williamhill_us", "draftkings", "fanduel"]  # Filter list
 NHL_BOOKMAKER_WEIGHTS = {
         "Pinnacle": 0.45,
@@ -17,133 +29,111 @@ NHL_BOOKMAKER_WEIGHTS = {
     }
 
 
-def filter_better_odds_lean(player_props, dfs_site):
+def price_nhl_props(matched_props, dfs_site, devig=NHL_DEVIG_METHOD, entry_type=DFS_ENTRY_TYPE, legs=DFS_ENTRY_LEGS,
+                    bookmaker_weights=NHL_BOOKMAKER_WEIGHTS, min_bookmakers=NHL_MIN_BOOKMAKERS, required_bookmakers=NHL_REQUIRED_BOOKMAKERS):
     """
-    Filters out the worse odds for each player by comparing 'over' and 'under' odds for each bookmaker.
-    Keeps only the better (more negative) odds per bookmaker, based on the overall best lean.
+    Price one site's matched props (PricedProps) and flag the ones eligible for ranking.
+    Shared by the dfs-player-props ranking, the entry optimizer and the backtest (which varies the weights and the bookmaker rule).
     """
-    filtered_props = []
-
-    for prop in player_props:
-        player_name = prop["player_name"]
-        market = prop["market"]
-        prop_line = prop["prop_line"]
-        bookmaker_odds = prop["bookmaker_odds"]
+    # De-vig every bookmaker, weight the fair odds and pick the lean of all props in one batch,
+    # only re-pricing the props whose odds changed since the previous snapshot of this site and options
+    priced = price_incremental(("nhl", dfs_site, entry_type, legs), matched_props, bookmaker_weights, devig)
 
-        market = format_market(market.lower())
-        
-        bookmaker_groups = {}  # Store "over" and "under" odds together by bookmaker
+    # Break-even, edge and EV against the site's payout table, straight from the fair probabilities above
+    add_expected_value(priced, dfs_site, entry_type, legs)
 
-        # Group odds by bookmaker
-        for odds_entry in bookmaker_odds:
-            bookmaker = odds_entry["bookmaker"]
-            lean = odds_entry["lean"].lower()  # "over" or "under"
-            odds = odds_entry["odds"]
+    # Props without a better lean are dropped, and so are those quoted by too few (or none of the required) bookmakers
+    eligible = (np.array(priced.lean) != "n/a") & (priced.bookmaker_counts >= min_bookmakers)
+    if required_bookmakers:
+        eligible = eligible & priced.quoted_by_any(required_bookmakers)
 
-            if bookmaker not in bookmaker_groups:
-                bookmaker_groups[bookmaker] = {"over": None, "under": None}
+    return priced, eligible
 
-            bookmaker_groups[bookmaker][lean] = odds
 
-        # Calculate fair odds for each bookmaker
-        fair_odds_per_bookmaker = []
-        for bookmaker, odds_pair in bookmaker_groups.items():
-            over_odds = odds_pair["over"]
-            under_odds = odds_pair["under"]
+def filter_better_odds_lean(matched_props, dfs_site, top=NHL_TOP_PROPS, rank_by=NHL_RANK_BY, tie_break=None, devig=NHL_DEVIG_METHOD,
+                            entry_type=DFS_ENTRY_TYPE, legs=DFS_ENTRY_LEGS):
+    """
+    Filters out the worse odds for each player by comparing 'over' and 'under' odds for each bookmaker.
+    Keeps only the better (more negative) odds per bookmaker, based on the overall best lean.
+    matched_props are one site's DFS lines matched to the columnar bookmaker odds (MatchedProps).
+    """
+    filtered_props = []
 
-            if over_odds and under_odds:  # Ensure both exist
-                fair_over, fair_under = calculate_fair_odds(over_odds, under_odds)
+    # De-vig, weight and pick the lean of all props in one batch, with their EV against the site's payout table
+    priced, eligible = price_nhl_props(matched_props, dfs_site, devig, entry_type, legs)
 
-                fair_odds_per_bookmaker.append({
-                    "bookmaker": bookmaker,
-                    "fair_over": fair_over,
-                    "fair_under": fair_under
-                })
+    # Rank once over the whole slate (by fair probability unless overridden with edge or ev), only the top props are built
+    for i in top_k_incremental(priced, top, rank_by, tie_break, eligible):
+        player_name, market, prop_line = matched_props.prop(i)
+        better_lean = priced.lean[i]
 
-        # Calculate weighted fair odds (only consider bookmakers that exist in the odds data)
-        weighted_fair_over = 0
-        weighted_fair_under = 0
-        total_weight = 0
-
-        for fair_odds in fair_odds_per_bookmaker:
-            bookmaker = fair_odds["bookmaker"]
-
-            # Check if the bookmaker exists in our weights list
-            if bookmaker in NHL_BOOKMAKER_WEIGHTS:
-                weight = NHL_BOOKMAKER_WEIGHTS[bookmaker]
-                weighted_fair_over += fair_odds["fair_over"] * weight
-                weighted_fair_under += fair_odds["fair_under"] * weight
-                total_weight += weight
-            
-        # Normalize by the total weight (if total_weight > 0, to prevent division by zero)
-        avg_fair_over_odds = weighted_fair_over / total_weight if total_weight > 0 else None
-        avg_fair_under_odds = weighted_fair_under / total_weight if total_weight > 0 else None
-
-        avg_fair_over_odds = round(avg_fair_over_odds, 2) if avg_fair_over_odds is not None else None
-        avg_fair_under_odds = round(avg_fair_under_odds, 2) if avg_fair_under_odds is not None else None
-
-        # Determine better lean based on fair odds averages
-        better_lean = ""
-        if avg_fair_over_odds is not None and avg_fair_under_odds is not None:
-            if avg_fair_over_odds < avg_fair_under_odds:
-                better_lean = "over"
-            elif avg_fair_over_odds > avg_fair_under_odds:
-                better_lean = "under"
-            else:
-                better_lean = "n/a"
-        elif avg_fair_over_odds:  # If there's no under odds, pick over
-            better_lean = "over"
-        elif avg_fair_under_odds:  # If there's no over odds, pick under
-            better_lean = "under"
-        else:
-            better_lean = "n/a"
-
-        if better_lean == "n/a":
-            continue
+        market = format_market(market.lower())
 
         # Filter bookmaker odds for the better lean
         selected_bookmaker_odds = []
-        for odds_entry in bookmaker_odds:
-            if odds_entry["lean"].lower() == better_lean:
+        for position, lean, bookmaker, odds in matched_props.entries_of(i):
+            if lean.lower() == better_lean:
                 selected_bookmaker_odds.append({
-                    "lean": odds_entry["lean"],
+                    "lean": lean,
                     "market": market,
                     "point": prop_line,
-                    "odds": decimal_to_american(odds_entry["odds"]) if odds_entry.get("odds") else None,
-                    "bookmaker": odds_entry["bookmaker"]
+                    "odds": priced.entry_odds[position] if odds else None,
+                    "bookmaker": bookmaker
                 })
 
-        # Determine the average odds
-        if avg_fair_over_odds:
-            average_odds = decimal_to_american(avg_fair_over_odds) if better_lean == "over" else decimal_to_american(avg_fair_under_odds)
-        else: 
-            average_odds = None
-
-        # Check if at least two bookmakers exist, and one of them must be Pinnacle, BetMGM, or Caesars
         filtered_props.append({
             "player_name": player_name,
             "market": market,
             "point": prop_line,
             "lean": better_lean,
-            "average_fair_odds": average_odds,
-            "fair_probability": implied_probability(average_odds) if average_odds else None,
+            "average_fair_odds": priced.average_odds[i],
+            "fair_probability": priced.value("fair_probability", i),
+            "break_even": priced.value("break_even", i),
+            "edge": priced.value("edge", i),
+            "ev": priced.value("ev", i),
             "bookmaker_odds": selected_bookmaker_odds
         })
 
+    # Archive every priced prop, not only the top ones (when ODDS_ARCHIVE_DIR is set)
+    archive_priced("nhl", dfs_site, priced, eligible, devig=devig, entry_type=entry_type, legs=legs)
 
-        # Sort by implied probability in descending order
-        filtered_props.sort(key=lambda x: x["fair_probability"], reverse=True)
+    # Export to the respective site
+    if dfs_site.lower() == "ud":
+        export_to_excel(filtered_props, NHL_UNDERDOG_PROPS_FILE_PATH)
+    elif dfs_site.lower() == "pp":
+        export_to_excel(filtered_props, NHL_PRIZEPICKS_PROPS_FILE_PATH)
 
-        # Keep only the top 20 elements if there are more than 20
-        filtered_props = filtered_props[:15]
+    return filtered_props
 
-        # Export to the respective site
-        if dfs_site.lower() == "ud":
-            export_to_excel(filtered_props, NHL_UNDERDOG_PROPS_FILE_PATH)
-        elif dfs_site.lower() == "pp":
-            export_to_excel(filtered_props, NHL_PRIZEPICKS_PROPS_FILE_PATH)
 
-    return filtered_props
+def build_nhl_entries(matched_props, dfs_site, count=DEFAULT_ENTRY_COUNT, devig=NHL_DEVIG_METHOD, entry_type=DFS_ENTRY_TYPE,
+                       legs=DFS_ENTRY_LEGS, min_games=DFS_ENTRY_MIN_GAMES, max_per_game=DFS_ENTRY_MAX_PER_GAME):
+    """
+    The count best entries (entry_type, legs) for a DFS site by expected return, from its priced props.
+    """
+    priced, eligible = price_nhl_props(matched_props, dfs_site, devig, entry_type, legs)
+    entries = []
+
+    for expected_return, positions in optimize_entries(priced, dfs_site, entry_type, legs, count, eligible, min_games, max_per_game):
+        entry_legs = []
+        for i in positions:
+            player_name, market, prop_line = matched_props.prop(i)
+            entry_legs.append({
+                "player_name": player_name,
+                "market": format_market(market.lower()),
+                "point": prop_line,
+                "lean": priced.lean[i],
+                "fair_probability": priced.value("fair_probability", i),
+                "event_id": matched_props.dfs.events[matched_props.dfs.event[matched_props.dfs_rows[i]]],
+            })
+
+        entries.append({
+            "legs": entry_legs,
+            "expected_return": round(expected_return, 4),  # Payout per unit staked
+            "ev": round((expected_return - 1) * 100, 2),
+        })
+
+    return entries
 
 
 def decimal_to_american(decimal_odds):
@@ -188,70 +178,43 @@ def implied_probability(average_odds):
 
 
 def export_to_excel(data, filename):
+    """
+    Queue the props for the background Excel writer, which writes the workbook off the request path.
+    """
     # Define the headers as you requested
     headers = ["Player Name", "Lean", "Prop Line", "Market", "Pinnacle", "Caesars", "DraftKings", "FanDuel", "Fair Probability"]
 
-    try:
-        # Create a new workbook and active sheet
-        wb = openpyxl.Workbook()
-        sheet = wb.active
-        sheet.title = "Player Props"
-
-        # Add the headers to the first row and center align them
-        for col_num, header in enumerate(headers, 1):
-            sheet.cell(row=1, column=col_num, value=header)
-            # Apply center alignment for headers
-            sheet.cell(row=1, column=col_num).alignment = Alignment(horizontal="center")
-
-        # Loop through the data and add rows for each prop
-        for row_num, prop in enumerate(data, 2):
-            player_name = prop.get("player_name", "n/a")
-            market = prop.get("market", "n/a")
-            lean = prop.get("lean", "n/a")
-            prop_line = prop.get("point", "n/a")
-            fair_probability = prop.get("fair_probability", "n/a")
-            bookmaker_odds = prop.get("bookmaker_odds", [])
-
-            # combined_prop_line_market = f"{prop_line} {market}"
-
-            # Initialize the odds dictionary with "n/a" for each bookmaker
-            bookmaker_columns = {
-                "Pinnacle": "",
-                "Caesars": "",
-                "DraftKings": "",
-                "FanDuel": "",
-            }
-
-            # Loop through each bookmaker and add the odds to the correct column
-            for odds_entry in bookmaker_odds:
-                bookmaker_name = odds_entry["bookmaker"]
-                if bookmaker_name in bookmaker_columns:
-                    bookmaker_columns[bookmaker_name] = odds_entry["odds"]
-
-            # Flatten the odds and implied probabilities for the row
-            row = [player_name, lean.capitalize(), prop_line, market] + list(bookmaker_columns.values()) + [fair_probability]
-
-            # Add the row data to the sheet and apply center alignment
-            for col_num, cell_value in enumerate(row, 1):
-                cell = sheet.cell(row=row_num, column=col_num, value=cell_value)
-                cell.alignment = Alignment(horizontal="center")
-
-        # Adjust column width based on the longest cell content
-        for col_num in range(1, len(headers) + 1):
-            max_length = 0
-            for row_num in range(1, len(data) + 1):  # +2 for headers and rows
-                cell_value = str(sheet.cell(row=row_num, column=col_num).value)
-                max_length = max(max_length, len(cell_value))
-            adjusted_width = (max_length + 2)  # Add a little padding
-            sheet.column_dimensions[openpyxl.utils.get_column_letter(col_num)].width = adjusted_width
-
-        # Save the workbook to the specified filename
-        wb.save(filename)
-
-        print(f"Data successfully exported")
-
-    except Exception as e:
-        print(f"Error exporting data: {e}")
+    rows = []
+
+    # Loop through the data and add a row for each prop
+    for prop in data:
+        player_name = prop.get("player_name", "n/a")
+        market = prop.get("market", "n/a")
+        lean = prop.get("lean", "n/a")
+        prop_line = prop.get("point", "n/a")
+        fair_probability = prop.get("fair_probability", "n/a")
+        bookmaker_odds = prop.get("bookmaker_odds", [])
+
+        # combined_prop_line_market = f"{prop_line} {market}"
+
+        # Initialize the odds dictionary with "n/a" for each bookmaker
+        bookmaker_columns = {
+            "Pinnacle": "",
+            "Caesars": "",
+            "DraftKings": "",
+            "FanDuel": "",
+        }
+
+        # Loop through each bookmaker and add the odds to the correct column
+        for odds_entry in bookmaker_odds:
+            bookmaker_name = odds_entry["bookmaker"]
+            if bookmaker_name in bookmaker_columns:
+                bookmaker_columns[bookmaker_name] = odds_entry["odds"]
+
+        # Flatten the odds and implied probabilities for the row
+        rows.append([player_name, lean.capitalize(), prop_line, market] + list(bookmaker_columns.values()) + [fair_probability])
+
+    queue_excel_export(filename, headers, rows)
 
 
 def calculate_fair_odds(over_odds, under_odds):
@@ -0,0 +1,152 @@
+import numpy as np
+from .devig import MULTIPLICATIVE
+from .odds_columns import OVER, UNDER
+from .pricing_engine import PricedProps, pack_entries, weighted_fair_odds, _decimal_to_american, _implied_probabilities, _round_2dp
+from .prop_index import POINT_KEY_SCALE, MatchedProps, _ranges
+
+ALTERNATE_SUFFIX = "_alternate"
+
+
+def interpolate_unmatched(matched, bookmaker_weights, method=MULTIPLICATIVE):
+    """
+    Price the DFS lines no sportsbook quotes exactly (matched.unmatched_rows) off alternate-line ladders.
+
+    Every quoted line of a player/market (main and *_alternate markets together) becomes a rung holding
+    the weighted fair over probability of the books quoting both sides there, priced like any prop.
+    A DFS line between two rungs gets the over probability interpolated linearly between them, a line
+    sitting on a rung (an alternate market quoting it) takes that rung as is. Lines outside a ladder
+    are left unpriced. All lines of the slate are looked up in one searchsorted.
+
+    Returns PricedProps for the lines that could be priced, with "fair_probability" as the rankable value
+    and interpolated set where the line fell between rungs. Their entries are the quotes of the rungs used.
+    """
+    odds = matched.odds
+    dfs = matched.dfs
+    book_weights = [bookmaker_weights.get(title, 0) for title in odds.bookmakers.values]
+
+    # Alternate markets share the ladder of their main market
+    base_markets = np.array([
+        odds.markets.code(market[:-len(ALTERNATE_SUFFIX)]) if market.endswith(ALTERNATE_SUFFIX) else code
+        for code, market in enumerate(list(odds.markets.values))
+    ] or [0], dtype=np.int64)
+
+    sides = odds.side_kinds()
+    rows = np.flatnonzero(((sides == OVER) | (sides == UNDER)) & ~np.isnan(odds.point) & ~np.isnan(odds.price))
+    points = np.rint(odds.point[rows] * POINT_KEY_SCALE).astype(np.int64)
+
+    player_count = max(len(odds.players), 1)
+    market_count = max(len(odds.markets), 1)
+    groups = (odds.event[rows].astype(np.int64) * player_count + matched.player_ids[odds.player[rows]]) * market_count + base_markets[odds.market[rows]]
+
+    # Rungs: one per (player/market ladder, line), rows grouped by rung in the order the parser saw them
+    low_point = int(points.min()) if len(points) else 0
+    point_span = int(points.max()) - low_point + 1 if len(points) else 1
+    row_keys = groups * point_span + (points - low_point)
+    order = np.argsort(row_keys, kind="stable")
+    rung_keys, rung_starts, rung_counts = np.unique(row_keys[order], return_index=True, return_counts=True)
+    rung_rows = rows[order]
+
+    prices, weights, _, _ = pack_entries(
+        rung_counts, odds.price[rung_rows], odds.bookmaker[rung_rows], sides[rung_rows].astype(np.int64), book_weights
+    )
+    priced, avg_over, avg_under = weighted_fair_odds(prices, weights, method)
+
+    # Keep the rungs with a price; their over probability from the weighted fair odds of both sides
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rung_prob = (1 / avg_over) / (1 / avg_over + 1 / avg_under)
+    rung_keys, rung_starts, rung_counts, rung_prob = rung_keys[priced], rung_starts[priced], rung_counts[priced], rung_prob[priced]
+    rung_groups = rung_keys // point_span
+    rung_points = rung_keys % point_span + low_point
+
+    # Look every unmatched DFS line up on its ladder
+    lines = matched.unmatched_rows
+    line_points = np.rint(dfs.point[lines] * POINT_KEY_SCALE).astype(np.int64)
+    line_groups = (dfs.event[lines].astype(np.int64) * player_count + matched.player_ids[dfs.player[lines]]) * market_count + dfs.market[lines]
+    in_span = (line_points >= low_point) & (line_points < low_point + point_span)
+    line_keys = line_groups * point_span + np.clip(line_points - low_point, 0, point_span - 1)
+
+    upper = np.searchsorted(rung_keys, line_keys, side="left")
+    lower = upper - 1
+    has_upper = upper < len(rung_keys)
+    upper = np.minimum(upper, max(len(rung_keys) - 1, 0))
+    lower = np.maximum(lower, 0)
+
+    on_rung = in_span & has_upper & (rung_keys[upper] == line_keys) if len(rung_keys) else np.zeros(len(lines), dtype=bool)
+    between = (
+        in_span & has_upper & ~on_rung & (upper > 0) & (rung_groups[upper] == line_groups) & (rung_groups[lower] == line_groups)
+        if len(rung_keys) else np.zeros(len(lines), dtype=bool)
+    )
+    usable = on_rung | between
+
+    lines, line_points, upper, lower, on_rung = lines[usable], line_points[usable], upper[usable], lower[usable], on_rung[usable]
+    lower = np.where(on_rung, upper, lower)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        share = np.where(on_rung, 0.0, (line_points - rung_points[lower]) / (rung_points[upper] - rung_points[lower]))
+    over_prob = rung_prob[lower] + (rung_prob[upper] - rung_prob[lower]) * share
+
+    # Fair odds of each side, rounded like the weighted fair odds of a quoted line, then the same lean rule
+    with np.errstate(divide="ignore"):
+        fair_over = _round_2dp(1 / over_prob)
+        fair_under = _round_2dp(1 / (1 - over_prob))
+    lean_over = fair_over < fair_under
+    lean_under = fair_over > fair_under
+    average_odds = _decimal_to_american(np.where(lean_over, fair_over, fair_under))
+
+    # Entries: the quotes of the rung(s) each line was priced from
+    entry_counts = np.where(on_rung, rung_counts[upper], rung_counts[lower] + rung_counts[upper])
+    rung_pairs = np.stack((lower, upper), axis=1).reshape(-1)
+    pair_counts = np.stack((rung_counts[lower], np.where(on_rung, 0, rung_counts[upper])), axis=1).reshape(-1)
+    entries = rung_rows[_ranges(rung_starts[rung_pairs], pair_counts)]
+
+    interpolated_props = MatchedProps(odds, dfs, lines, entry_counts, entries, player_ids=matched.player_ids)
+    entry_odds = np.nan_to_num(odds.price[entries], nan=0.0)
+    _, _, bookmaker_counts, bookmaker_codes = pack_entries(
+        entry_counts, entry_odds, odds.bookmaker[entries], sides[entries].astype(np.int64), book_weights
+    )
+
+    return PricedProps(
+        interpolated_props,
+        lean=np.where(lean_over, "over", np.where(lean_under, "under", "n/a")).tolist(),
+        average_odds=[int(american) for american in average_odds.tolist()],
+        values={"fair_probability": _implied_probabilities(average_odds)},
+        bookmaker_counts=bookmaker_counts,
+        bookmaker_codes=bookmaker_codes,
+        entry_odds=_decimal_to_american(entry_odds).tolist(),
+        interpolated=~on_rung,
+    )
+
+
+def price_with_alternates(priced, bookmaker_weights, method=MULTIPLICATIVE):
+    """
+    A PricedProps batch followed by its unmatched DFS lines priced off the alternate-line ladders.
+    """
+    interpolated = interpolate_unmatched(priced.matched, bookmaker_weights, method or MULTIPLICATIVE)
+    combined = PricedProps.concat([priced, interpolated])
+    combined.matched.unmatched_rows = np.setdiff1d(priced.matched.unmatched_rows, interpolated.matched.dfs_rows)
+    return combined
+
+
+def with_alternate_markets(markets, alternate_markets, enabled):
+    """
+    The markets to request: the alternate markets are added after the main ones when enabled.
+    """
+    if not enabled or not alternate_markets:
+        return markets
+    return f"{markets},{alternate_markets}"
+
+
+def alt_lines_option(request, default):
+    """
+    Read the ?alt_lines= override of a request (true/false). Raises ValueError on anything else.
+    """
+    value = request.GET.get("alt_lines", None)
+
+    if value is None:
+        return default
+    if value.lower() in ("true", "1", "yes"):
+        return True
+    if value.lower() in ("false", "0", "no"):
+        return False
+
+    raise ValueError(f"alt_lines must be true or false, got {value!r}")
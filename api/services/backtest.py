@@ -0,0 +1,341 @@
+import csv
+import importlib
+import itertools
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from django.db import connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from api.models import Bookmaker, Event, Market, OddsChange
+from oddsApi.settings import DFS_ENTRY_TYPE, DFS_ENTRY_LEGS, ODDS_HISTORY_KEYFRAME_INTERVAL, ODDS_STORE_BATCH_SIZE
+from .devig import DEVIG_METHODS
+from .expected_value import DFS_SITES, break_even_probability
+from .odds_columns import OddsColumns
+from .odds_history import load_event_states
+from .player_index import player_key
+from .prop_index import match_slate
+from .ranking import top_k_rows
+
+BACKTEST_SPORTS = ["nba", "nfl", "mlb", "nhl"]  # The sports ranked by filter_better_odds_lean
+GRID_KEYS = ["weights", "min_books", "required_books", "top", "devig", "rank_by", "entry_type", "legs"]
+RANK_BY_OPTIONS = ["fair_probability", "edge", "ev"]
+CALIBRATION_BUCKET = 5  # percentage points of fair probability per calibration bucket
+
+
+def default_grid(sport):
+    """
+    The single configuration the sport's dfs-player-props endpoint runs with, as a grid of one value per key.
+    """
+    utils = importlib.import_module(f"api.{sport}.utils")
+    prefix = sport.upper()
+
+    return {
+        "weights": [getattr(utils, f"{prefix}_BOOKMAKER_WEIGHTS")],
+        "min_books": [getattr(utils, f"{prefix}_MIN_BOOKMAKERS")],
+        "required_books": [getattr(utils, f"{prefix}_REQUIRED_BOOKMAKERS")],
+        "top": [getattr(utils, f"{prefix}_TOP_PROPS")],
+        "devig": [getattr(utils, f"{prefix}_DEVIG_METHOD")],
+        "rank_by": [getattr(utils, f"{prefix}_RANK_BY")],
+        "entry_type": [DFS_ENTRY_TYPE],
+        "legs": [DFS_ENTRY_LEGS],
+    }
+
+
+def grid_configs(sport, grid=None):
+    """
+    Every configuration of a grid ({key: [values]}, the keys it leaves out take the sport's defaults), in order.
+    Raises ValueError on an unknown sport, key or value.
+    """
+    if sport not in BACKTEST_SPORTS:
+        raise ValueError(f"sport must be one of {', '.join(BACKTEST_SPORTS)}")
+
+    grid = {**default_grid(sport), **(grid or {})}
+    unknown = set(grid) - set(GRID_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown grid keys: {', '.join(sorted(unknown))}")
+
+    for key, values in grid.items():
+        if not isinstance(values, list) or not values:
+            raise ValueError(f"grid {key} must be a non-empty list")
+
+    configs = [dict(zip(GRID_KEYS, values)) for values in itertools.product(*(grid[key] for key in GRID_KEYS))]
+    for config in configs:
+        if not isinstance(config["weights"], dict):
+            raise ValueError("grid weights must be {bookmaker title: weight} objects")
+        if config["devig"] not in DEVIG_METHODS:
+            raise ValueError(f"devig must be one of {', '.join(DEVIG_METHODS)}")
+        if config["rank_by"] not in RANK_BY_OPTIONS:
+            raise ValueError(f"rank_by must be one of {', '.join(RANK_BY_OPTIONS)}")
+        for site in DFS_SITES.values():
+            break_even_probability(site, config["entry_type"], config["legs"])  # Raises without a payout table
+
+    return configs
+
+
+def load_grid(path):
+    """
+    Read a grid from a JSON file.
+    """
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_results(path):
+    """
+    Graded results from a CSV with event_id, player_name, market (odds API key) and actual (the stat the player
+    finished with) columns, and optionally commence_time (ISO 8601). Returns ({(event_id, player key, market): actual},
+    {event_id: commence_time}); player names are compared normalized and through the alias table.
+    """
+    results, commence_times = {}, {}
+
+    with open(path, newline="", encoding="utf-8") as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            try:
+                results[(row["event_id"], player_key(row["player_name"]), row["market"])] = float(row["actual"])
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"{path}:{line}: needs event_id, player_name, market and a numeric actual")
+
+            commence_time = parse_datetime(row.get("commence_time") or "")
+            if commence_time is not None:
+                commence_times[row["event_id"]] = commence_time if timezone.is_aware(commence_time) else timezone.make_aware(commence_time)
+
+    return results, commence_times
+
+
+def replay_slates(sport, start=None, end=None, interval=0, commence_times=None):
+    """
+    Replay the line-movement history of a sport as the slates the views would have priced, yielding
+    (time, [(event_id, odds, dfs_lines)]) after every stored poll from start to end, at most one per interval seconds.
+
+    Streams the history rows in order with a server-side cursor, so memory holds the live events only:
+    events are seeded with their state at start, and dropped once they started (commence_times, else the
+    stored commence time) or went two keyframe intervals without a row, which is when the poller stopped quoting them.
+    """
+    end = end or timezone.now()
+    commence_times = commence_times or {}
+    bookmakers = dict(Bookmaker.objects.values_list("id", "title"))
+    markets = dict(Market.objects.values_list("id", "key"))
+
+    rows = OddsChange.objects.filter(event__sport=sport, changed_at__lte=end)
+    states = {}  # event pk -> {outcome key: price}
+    if start is not None:
+        rows = rows.filter(changed_at__gt=start)
+        states = load_event_states(rows.values("event").distinct(), at=start)
+
+    event_ids = {}
+    stored_commence_times = {}
+    columns = {}  # event pk -> (odds, dfs_lines), rebuilt when the event changes
+    last_seen = {event: 0 for event in states}
+    polls = 0
+    last_yield = None
+
+    def slate(at):
+        missing = [event for event in states if event not in event_ids]
+        if missing:
+            for pk, event_id, commence_time in Event.objects.filter(id__in=missing).values_list("id", "event_id", "commence_time"):
+                event_ids[pk] = event_id
+                stored_commence_times[pk] = commence_time
+
+        event_results = []
+        for event, state in list(states.items()):
+            commence_time = commence_times.get(event_ids[event]) or stored_commence_times.get(event)
+            if polls - last_seen[event] > 2 * ODDS_HISTORY_KEYFRAME_INTERVAL or (commence_time is not None and at >= commence_time):
+                for live in (states, last_seen, columns, event_ids, stored_commence_times):
+                    live.pop(event, None)
+                continue
+            if event not in columns:
+                columns[event] = _event_columns(state, bookmakers, markets)
+            event_results.append((event_ids[event], *columns[event]))
+        return event_results
+
+    time = None
+    rows = rows.order_by("changed_at", "id").values_list(
+        "event", "bookmaker", "market", "player", "side", "point", "price", "is_dfs", "removed", "changed_at"
+    )
+    for event, bookmaker, market, player, side, point, price, is_dfs, removed, changed_at in rows.iterator(chunk_size=ODDS_STORE_BATCH_SIZE):
+        if changed_at != time:
+            if time is not None and (last_yield is None or (time - last_yield).total_seconds() >= interval):
+                last_yield = time
+                yield time, slate(time)
+            time = changed_at
+            polls += 1
+
+        if bookmaker not in bookmakers or market not in markets:
+            bookmakers = dict(Bookmaker.objects.values_list("id", "title"))
+            markets = dict(Market.objects.values_list("id", "key"))
+
+        # Later keyframe rows repeat the deltas of their poll, applying them again changes nothing
+        key = (bookmaker, market, player, side, point, is_dfs)
+        state = states.setdefault(event, {})
+        if removed:
+            state.pop(key, None)
+        else:
+            state[key] = price
+        last_seen[event] = polls
+        columns.pop(event, None)
+
+    if time is not None:
+        yield time, slate(time)
+
+
+def _event_columns(state, bookmakers, markets):
+    odds, dfs_lines = OddsColumns(), OddsColumns()
+    for (bookmaker, market, player, side, point, is_dfs), price in state.items():
+        (dfs_lines if is_dfs else odds).append(player, markets[market], bookmakers[bookmaker], side, point, price)
+    return odds.freeze(), dfs_lines.freeze()
+
+
+class ConfigRun:
+    """
+    One configuration of a backtest and the props it picked. A prop is picked once, the first time it makes
+    the configuration's top.
+    """
+
+    def __init__(self, sport, config):
+        self.config = config
+        self.price_props = getattr(importlib.import_module(f"api.{sport}.utils"), f"price_{sport}_props")
+        self.picks = {dfs_site: {} for dfs_site in DFS_SITES}  # (event_id, player key, market, point) -> (lean, fair probability)
+
+    def evaluate(self, site_props):
+        """
+        Price and rank one snapshot ({dfs_site: MatchedProps}) the way filter_better_odds_lean does, through
+        the sport's own price_<sport>_props with the configuration's weights and bookmaker rule.
+        """
+        config = self.config
+
+        for dfs_site, matched in site_props.items():
+            priced, eligible = self.price_props(
+                matched, dfs_site, config["devig"], config["entry_type"], config["legs"], bookmaker_weights=config["weights"],
+                min_bookmakers=config["min_books"], required_bookmakers=config["required_books"],
+            )
+            matched = priced.matched
+
+            # A full ranking rather than top_k_incremental: the configurations share the pricers of their streams
+            # and rank with their own rules, so a pricer's previous top k is usually another configuration's
+            picks = self.picks[dfs_site]
+            dfs = matched.dfs
+            for i in top_k_rows(priced, config["top"], config["rank_by"], None, eligible):
+                player_name, market, point = matched.prop(i)
+                key = (dfs.events[dfs.event[matched.dfs_rows[i]]], player_key(player_name), market, point)
+                if key not in picks:
+                    picks[key] = (priced.lean[i], priced.value("fair_probability", i))
+
+    def report(self, results, snapshots):
+        return {
+            "config": self.config,
+            "snapshots": snapshots,
+            "sites": {
+                DFS_SITES[dfs_site]: grade_picks(picks, results, DFS_SITES[dfs_site], self.config["entry_type"], self.config["legs"])
+                for dfs_site, picks in self.picks.items()
+            },
+        }
+
+
+def grade_picks(picks, results, site, entry_type, legs):
+    """
+    Hit rate, ROI and calibration of a configuration's picks on one site against the graded results.
+    An over wins above the line, an under below it, a result on the line is a push (stake back).
+    Picks without a lean (ranked by NBA, whose rule doesn't drop them) are counted but not graded.
+    ROI stakes one unit per graded pick paid at the per-leg odds an entry of this type breaks even at
+    (1 / break-even probability), so a configuration beating the break-even rate shows a positive ROI.
+    Calibration buckets the picks by fair probability (CALIBRATION_BUCKET points wide) against their hit rate.
+    """
+    payout = 1 / break_even_probability(site, entry_type, legs)
+    wins = losses = pushes = no_lean = 0
+    squared_errors = []
+    buckets = {}  # lower bound -> [picks, sum of fair probabilities, wins]
+
+    for (event_id, player, market, point), (lean, probability) in picks.items():
+        actual = results.get((event_id, player, market))
+        if actual is None:
+            continue
+        if lean not in ("over", "under"):
+            no_lean += 1
+            continue
+        if actual == point:
+            pushes += 1
+            continue
+
+        hit = (actual > point) == (lean == "over")
+        wins += hit
+        losses += not hit
+        squared_errors.append((probability / 100 - hit) ** 2)
+
+        bucket = buckets.setdefault(int(probability // CALIBRATION_BUCKET) * CALIBRATION_BUCKET, [0, 0.0, 0])
+        bucket[0] += 1
+        bucket[1] += probability
+        bucket[2] += hit
+
+    graded = wins + losses + pushes
+    decided = wins + losses
+
+    return {
+        "picks": len(picks),
+        "graded": graded,
+        "no_lean": no_lean,
+        "wins": wins,
+        "losses": losses,
+        "pushes": pushes,
+        "hit_rate": round(wins / decided * 100, 2) if decided else None,
+        "roi": round((wins * payout + pushes - graded) / graded * 100, 2) if graded else None,
+        "brier": round(sum(squared_errors) / decided, 4) if decided else None,
+        "calibration": [
+            {
+                "bucket": f"{low}-{low + CALIBRATION_BUCKET}",
+                "picks": count,
+                "predicted": round(total / count, 2),
+                "hit_rate": round(hits / count * 100, 2),
+            }
+            for low, (count, total, hits) in sorted(buckets.items())
+        ],
+    }
+
+
+def backtest_configs(sport, configs, results, commence_times=None, start=None, end=None, interval=0):
+    """
+    Replay a sport's history once and evaluate every configuration on each snapshot. Returns a report per configuration.
+    """
+    runs = [ConfigRun(sport, config) for config in configs]
+    snapshots = 0
+
+    for _, event_results in replay_slates(sport, start, end, interval, commence_times):
+        if not any(len(odds) for _, odds, _ in event_results):
+            continue
+
+        matched = match_slate(event_results)
+        site_props = {dfs_site: matched.for_site(site) for dfs_site, site in DFS_SITES.items()}
+        site_props = {dfs_site: props for dfs_site, props in site_props.items() if len(props)}
+        snapshots += 1
+
+        for run in runs:
+            run.evaluate(site_props)
+
+    return [run.report(results, snapshots) for run in runs]
+
+
+def run_backtest(sport, configs, results, commence_times=None, start=None, end=None, interval=0, workers=1):
+    """
+    backtest_configs over a grid split across worker processes, each streaming the history on its own.
+    Reports come back in the order of configs.
+    """
+    workers = max(1, min(workers, len(configs)))
+    if workers == 1:
+        return backtest_configs(sport, configs, results, commence_times, start, end, interval)
+
+    # The children must open their own connections rather than share the parent's
+    connections.close_all()
+    chunks = [list(range(worker, len(configs), workers)) for worker in range(workers)]
+    context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+
+    reports = [None] * len(configs)
+    with ProcessPoolExecutor(workers, mp_context=context) as pool:
+        futures = [
+            (chunk, pool.submit(backtest_configs, sport, [configs[i] for i in chunk], results, commence_times, start, end, interval))
+            for chunk in chunks
+        ]
+        for chunk, future in futures:
+            for i, report in zip(chunk, future.result()):
+                reports[i] = report
+
+    return reports
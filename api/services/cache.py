@@ -0,0 +1,184 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+from oddsApi.settings import ODDS_CACHE_BACKEND, ODDS_CACHE_PATH, ODDS_CACHE_MAX_ENTRIES
+from .fast_json import loads, dumps
+
+
+def make_cache_key(url, params=None):
+    """
+    Build a cache key from the URL and its query params.
+    The apiKey is dropped and params are normalized (sorted keys, sorted comma-separated values),
+    so "regions=us,eu" and "regions=eu,us" share an entry.
+    """
+    normalized = []
+    for key, value in sorted((params or {}).items()):
+        if key == "apiKey" or value is None:
+            continue
+        value = ",".join(sorted(part.strip() for part in str(value).split(",")))
+        normalized.append((key, value))
+
+    return f"{url}?{urlencode(normalized)}"
+
+
+class MemoryCache:
+    """
+    In-process TTL cache with LRU eviction once max_entries is reached.
+    Expired entries stay around until evicted so they can still be served stale (get(..., allow_stale=True)).
+    """
+
+    def __init__(self, max_entries=ODDS_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, allow_stale=False):
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or (entry[0] <= time.time() and not allow_stale):
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)  # Mark as most recently used
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)  # Drop the least recently used entry
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "memory",
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class SQLiteCache:
+    """
+    TTL cache stored in a SQLite file so every worker process on the host shares one copy.
+    Entries are evicted least recently used first once max_entries is reached.
+    Hit/miss counters are tracked per process.
+    """
+
+    def __init__(self, path=ODDS_CACHE_PATH, max_entries=ODDS_CACHE_MAX_ENTRIES):
+        self.path = str(path)
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS response_cache_last_access ON response_cache (last_access)")
+
+    def _connection(self):
+        # sqlite3 connections can't be shared across threads, so keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get(self, key, allow_stale=False):
+        now = time.time()
+        with self._connection() as conn:
+            row = conn.execute("SELECT value, expires_at FROM response_cache WHERE key = ?", (key,)).fetchone()
+
+            if row is None or (row[1] <= now and not allow_stale):
+                self._count("misses")
+                return None
+
+            conn.execute("UPDATE response_cache SET last_access = ? WHERE key = ?", (now, key))
+
+        self._count("hits")
+        return loads(row[0])
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, dumps(value).decode("utf-8"), now + ttl, now),
+            )
+
+            overflow = conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM response_cache WHERE key IN "
+                    "(SELECT key FROM response_cache ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,),
+                )
+                with self._lock:
+                    self.evictions += overflow
+
+    def clear(self):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM response_cache")
+
+    def stats(self):
+        size = self._connection().execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+        with self._lock:
+            return {
+                "backend": "sqlite",
+                "size": size,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Return the process-wide response cache configured by ODDS_CACHE_BACKEND,
+    or None when caching is disabled.
+    """
+    global _cache
+
+    if ODDS_CACHE_BACKEND == "none":
+        return None
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                if ODDS_CACHE_BACKEND == "sqlite":
+                    _cache = SQLiteCache()
+                else:
+                    _cache = MemoryCache()
+
+    return _cache
@@ -0,0 +1,98 @@
+import numpy as np
+
+MULTIPLICATIVE = "multiplicative"
+ADDITIVE = "additive"
+POWER = "power"
+SHIN = "shin"
+DEVIG_METHODS = [MULTIPLICATIVE, ADDITIVE, POWER, SHIN]
+
+POWER_TOLERANCE = 1e-12
+POWER_MAX_ITERATIONS = 50
+
+
+def fair_probabilities(over_prob, under_prob, method=MULTIPLICATIVE):
+    """
+    Remove the vig from two-way markets given as arrays of implied probabilities (1 / decimal odds).
+    Returns (fair_over_prob, fair_under_prob), NaN where a market can't be de-vigged
+    (a side missing, or a method that would give a probability outside (0, 1)).
+
+        multiplicative: scale both sides by the overround
+        additive: take half the overround off each side
+        power: raise both sides to the power k that makes them sum to 1
+        shin: Shin's insider-trading model, which moves more of the vig onto the longshot
+    """
+    over_prob = np.asarray(over_prob, dtype=float)
+    under_prob = np.asarray(under_prob, dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if method == MULTIPLICATIVE:
+            total_prob = over_prob + under_prob
+            fair_over, fair_under = over_prob / total_prob, under_prob / total_prob
+        elif method == ADDITIVE:
+            half_margin = (over_prob + under_prob - 1) / 2
+            fair_over, fair_under = over_prob - half_margin, under_prob - half_margin
+        elif method == POWER:
+            fair_over, fair_under = _power(over_prob, under_prob)
+        elif method == SHIN:
+            fair_over, fair_under = _shin(over_prob, under_prob)
+        else:
+            raise ValueError(f"Unknown de-vig method {method!r}")
+
+    valid = (fair_over > 0) & (fair_over < 1) & (fair_under > 0) & (fair_under < 1)
+    return np.where(valid, fair_over, np.nan), np.where(valid, fair_under, np.nan)
+
+
+def _power(over_prob, under_prob):
+    """
+    Solve over^k + under^k = 1 for k with Newton's method, on every market at once.
+    f(k) is convex and decreasing, so from k = 1 the iterates close in on the root monotonically.
+    Converged markets stop moving; the loop ends when all of them have converged.
+    """
+    solvable = (over_prob > 0) & (over_prob < 1) & (under_prob > 0) & (under_prob < 1)
+    over = np.where(solvable, over_prob, 0.5)
+    under = np.where(solvable, under_prob, 0.5)
+    log_over, log_under = np.log(over), np.log(under)
+
+    k = np.ones_like(over)
+    active = np.ones(over.shape, dtype=bool)
+
+    for _ in range(POWER_MAX_ITERATIONS):
+        fair_over, fair_under = over ** k, under ** k
+        error = fair_over + fair_under - 1
+        active &= np.abs(error) > POWER_TOLERANCE
+        if not active.any():
+            break
+        slope = fair_over * log_over + fair_under * log_under
+        k = np.where(active, k - error / slope, k)
+
+    fair_over, fair_under = over ** k, under ** k
+    return np.where(solvable, fair_over, np.nan), np.where(solvable, fair_under, np.nan)
+
+
+def _shin(over_prob, under_prob):
+    """
+    Shin probabilities. For two outcomes the insider share z has a closed form (Jullien & Salanie),
+    so the whole slate is solved in one pass with no root finding. (In two-way markets the result
+    coincides with the additive method; they differ once a market has more outcomes.)
+    """
+    total_prob = over_prob + under_prob
+    spread = (over_prob - under_prob) ** 2
+    z = (total_prob - 1) * (spread - total_prob) / (total_prob * (spread - 1))
+
+    def shin_probability(prob):
+        return (np.sqrt(z ** 2 + 4 * (1 - z) * prob ** 2 / total_prob) - z) / (2 * (1 - z))
+
+    return shin_probability(over_prob), shin_probability(under_prob)
+
+
+def devig_option(request, default_method):
+    """
+    Read the ?devig= override of a request, falling back to the sport's default.
+    Raises ValueError on an unknown method.
+    """
+    method = request.GET.get("devig", default_method)
+
+    if method is not None and method not in DEVIG_METHODS:
+        raise ValueError(f"devig must be one of {', '.join(DEVIG_METHODS)}")
+
+    return method
@@ -0,0 +1,124 @@
+import heapq
+import numpy as np
+from oddsApi.settings import DFS_ENTRY_POOL_SIZE, DFS_ENTRY_MIN_GAMES, DFS_ENTRY_MAX_PER_GAME
+from .expected_value import DFS_SITES, payout_table
+from .ranking import top_k_rows
+
+DEFAULT_ENTRY_COUNT = 10  # Entries returned per DFS site, overridable with ?count=
+MAX_ENTRY_COUNT = 100
+
+
+def optimize_entries(priced, dfs_site, entry_type, legs, count=DEFAULT_ENTRY_COUNT, eligible=None,
+                     min_games=DFS_ENTRY_MIN_GAMES, max_per_game=DFS_ENTRY_MAX_PER_GAME, pool=DFS_ENTRY_POOL_SIZE):
+    """
+    Find the count entries of `legs` props with the highest expected return under the site's payout table,
+    from the eligible props of a PricedProps batch (each leg hits with its fair_probability).
+    Returns [(expected_return, [prop positions])], best first.
+
+    Constraints: at most one leg per player, legs from at least min_games games and at most max_per_game
+    legs from the same game (0 for no limit). The odds feed has no teams for player props, so games stand in for them.
+
+    Branch-and-bound over the pool best props by fair probability, sorted from most to least likely:
+    an entry's expected return only grows with the probability of its legs (payouts don't drop with
+    more hits), so filling the open slots with the next props of the list bounds every entry below
+    a branch. Once that bound can't beat the worst entry kept so far, neither can any later sibling.
+    """
+    payouts = payout_table(DFS_SITES.get(dfs_site.lower(), dfs_site.lower()), entry_type, legs)
+    matched = priced.matched
+
+    candidates = np.asarray(top_k_rows(priced, pool, "fair_probability", eligible=eligible), dtype=np.int64)
+    candidates = candidates[~np.isnan(priced.values["fair_probability"][candidates])]
+
+    probabilities = (priced.values["fair_probability"][candidates] / 100).tolist()
+    players = matched.player_ids[matched.dfs.player[matched.dfs_rows[candidates]]].tolist()
+    games = matched.dfs.event[matched.dfs_rows[candidates]].tolist()
+    candidate_count = len(candidates)
+
+    game_count = len(set(games))
+    if game_count < min_games or (max_per_game and game_count * max_per_game < legs):
+        return []  # No entry can meet the game constraints
+
+    best = []  # Min-heap of (expected_return, -found, legs), the root is the entry to beat
+    found = [0]
+
+    def search(start, chosen, hits, used_players, game_legs):
+        slots = legs - len(chosen)
+
+        if slots == 0:
+            if len(game_legs) >= min_games:
+                entry = (_expected_return(hits, payouts), -found[0], list(chosen))
+                found[0] += 1
+                if len(best) < count:
+                    heapq.heappush(best, entry)
+                else:
+                    heapq.heapreplace(best, entry)
+            return
+
+        for j in range(start, candidate_count - slots + 1):
+            if len(best) == count:
+                bound = _expected_return(_add_legs(hits, probabilities[j:j + slots]), payouts)
+                if bound <= best[0][0]:
+                    break  # Later props are no more likely, so no later branch can do better either
+
+            player, game = players[j], games[j]
+            if player in used_players:
+                continue
+            if max_per_game and game_legs.get(game, 0) >= max_per_game:
+                continue
+            if len(game_legs) + (game not in game_legs) + slots - 1 < min_games:
+                continue  # Not enough legs left to reach min_games
+
+            chosen.append(candidates[j].item())
+            used_players.add(player)
+            game_legs[game] = game_legs.get(game, 0) + 1
+
+            search(j + 1, chosen, _add_legs(hits, [probabilities[j]]), used_players, game_legs)
+
+            chosen.pop()
+            used_players.discard(player)
+            game_legs[game] -= 1
+            if not game_legs[game]:
+                del game_legs[game]
+
+    search(0, [], [1.0], set(), {})
+
+    return [(expected_return, chosen) for expected_return, _, chosen in sorted(best, reverse=True)]
+
+
+def _add_legs(hits, probabilities):
+    """
+    Distribution of the number of hits (hits[h] = P(h legs hit)) once legs with the given probabilities are added.
+    """
+    for probability in probabilities:
+        miss = 1 - probability
+        hits = [h * miss + (hits[i - 1] * probability if i else 0) for i, h in enumerate(hits)] + [hits[-1] * probability]
+    return hits
+
+
+def _expected_return(hits, payouts):
+    return sum(multiplier * hits[count] for count, multiplier in payouts.items() if count < len(hits))
+
+
+def entry_options(request, default_count=DEFAULT_ENTRY_COUNT, default_min_games=DFS_ENTRY_MIN_GAMES,
+                  default_max_per_game=DFS_ENTRY_MAX_PER_GAME):
+    """
+    Read the ?count=, ?min_games= and ?max_per_game= overrides of an optimizer request.
+    Raises ValueError on an invalid value.
+    """
+    options = []
+
+    for name, default, low, high in [
+        ("count", default_count, 1, MAX_ENTRY_COUNT),
+        ("min_games", default_min_games, 1, None),
+        ("max_per_game", default_max_per_game, 0, None),
+    ]:
+        value = request.GET.get(name, default)
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} must be an integer, got {value!r}")
+        if value < low or (high is not None and value > high):
+            raise ValueError(f"{name} must be between {low} and {high}" if high is not None else f"{name} must be at least {low}")
+        options.append(value)
+
+    return tuple(options)
@@ -0,0 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+
+def fetch_events_concurrently(event_ids, fetch_event, max_workers):
+    """
+    Run fetch_event(event_id) for every event on a bounded thread pool.
+    Results are returned in the same order as event_ids, no matter which fetch finishes first,
+    so the merged response is deterministic.
+    """
+    if not event_ids:
+        return []
+
+    # Never spin up more threads than there are events to fetch
+    max_workers = max(1, min(max_workers, len(event_ids)))
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="event-fetch") as executor:
+        return list(executor.map(fetch_event, event_ids))
+
+
+def filter_upcoming_events(events):
+    """
+    Keep only the events that haven't started yet, with their teams and commence_time parsed to a datetime.
+    """
+    now = timezone.now()
+    upcoming = []
+
+    for event in events:
+        commence_time = parse_datetime(event.get("commence_time") or "")
+
+        if commence_time is None or commence_time <= now:
+            continue  # Already started (or no start time), nothing left to price pre-game
+
+        upcoming.append({
+            "id": event["id"],
+            "home_team": event.get("home_team") or "",
+            "away_team": event.get("away_team") or "",
+            "commence_time": commence_time,
+        })
+
+    return upcoming
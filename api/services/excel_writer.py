@@ -0,0 +1,147 @@
+import atexit
+import os
+import threading
+import time
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment
+from openpyxl.utils import get_column_letter
+from oddsApi.settings import ODDS_EXPORT_COALESCE_SECONDS
+
+CENTER = Alignment(horizontal="center")
+
+
+def write_workbook(path, headers, rows, title="Player Props"):
+    """
+    Write a one-sheet workbook with openpyxl's write-only (streaming) mode.
+    The workbook goes to a temp file next to path and is swapped in with os.replace,
+    so readers never open a half-written file.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    sheet = wb.create_sheet(title)
+
+    # Column width from the longest cell content, plus a little padding (must be set before any row)
+    for col_num, values in enumerate(zip(headers, *rows), 1):
+        sheet.column_dimensions[get_column_letter(col_num)].width = max(len(str(value)) for value in values) + 2
+
+    for row in [headers] + rows:
+        cells = []
+        for value in row:
+            cell = WriteOnlyCell(sheet, value=value)
+            cell.alignment = CENTER
+            cells.append(cell)
+        sheet.append(cells)
+
+    directory, filename = os.path.split(os.path.abspath(path))
+    tmp_path = os.path.join(directory, f".{filename}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+    try:
+        wb.save(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class ExcelExportWriter:
+    """
+    Writes Excel exports on a background thread, off the request path.
+    Exports of the same file submitted within coalesce_seconds of each other are merged:
+    only the latest rows are written, once.
+    """
+
+    def __init__(self, coalesce_seconds=ODDS_EXPORT_COALESCE_SECONDS):
+        self.coalesce_seconds = coalesce_seconds
+        self._pending = {}  # path -> (due_at, headers, rows)
+        self._writing = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self.written = 0
+        self.coalesced = 0
+
+    def submit(self, path, headers, rows):
+        with self._cond:
+            if path in self._pending:
+                due_at = self._pending[path][0]  # Keep the original deadline so bursts can't postpone the write forever
+                self.coalesced += 1
+            else:
+                due_at = time.monotonic() + self.coalesce_seconds
+
+            self._pending[path] = (due_at, headers, rows)
+
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="excel-writer", daemon=True)
+                self._thread.start()
+
+            self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """
+        Write everything pending now and wait for it. Returns False if it didn't finish within timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._cond:
+            self._pending = {path: (0, headers, rows) for path, (_, headers, rows) in self._pending.items()}
+            self._cond.notify_all()
+
+            while self._pending or self._writing:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+
+                path, (due_at, headers, rows) = min(self._pending.items(), key=lambda item: item[1][0])
+                delay = due_at - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+
+                del self._pending[path]
+                self._writing += 1
+
+            try:
+                write_workbook(path, headers, rows)
+                self.written += 1
+                print(f"Data successfully exported")
+            except Exception as e:
+                print(f"Error exporting data: {e}")
+            finally:
+                with self._cond:
+                    self._writing -= 1
+                    self._cond.notify_all()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_excel_writer():
+    """
+    Return the process-wide background Excel writer.
+    """
+    global _writer
+
+    with _writer_lock:
+        if _writer is None:
+            _writer = ExcelExportWriter()
+            atexit.register(_writer.flush, 10)  # Don't lose the last export when the process stops
+
+    return _writer
+
+
+def queue_excel_export(path, headers, rows):
+    """
+    Queue rows for the background writer. Does nothing when no export path is configured.
+    """
+    if not path:
+        return
+    get_excel_writer().submit(path, headers, rows)
@@ -0,0 +1,118 @@
+import json
+from functools import lru_cache
+from math import comb
+import numpy as np
+from oddsApi.settings import DFS_ENTRY_TYPE, DFS_ENTRY_LEGS, DFS_PAYOUT_TABLES_FILE
+
+# Multiplier paid by number of correct picks, per site, entry type and entry size (legs).
+# The sites change these often: point DFS_PAYOUT_TABLES_FILE at a JSON file of the same shape to override them.
+DEFAULT_PAYOUT_TABLES = {
+    "prizepicks": {
+        "power": {2: {2: 3}, 3: {3: 5}, 4: {4: 10}, 5: {5: 20}, 6: {6: 37.5}},
+        "flex": {3: {3: 2.25, 2: 1.25}, 4: {4: 5, 3: 1.5}, 5: {5: 10, 4: 2, 3: 0.4}, 6: {6: 25, 5: 2, 4: 0.4}},
+    },
+    "underdog": {
+        "power": {2: {2: 3}, 3: {3: 6}, 4: {4: 10}, 5: {5: 20}, 6: {6: 35}},
+        "flex": {3: {3: 3, 2: 1}, 4: {4: 6, 3: 1.5}, 5: {5: 10, 4: 2.5}, 6: {6: 25, 5: 2.6, 4: 0.25}},
+    },
+}
+DFS_SITES = {"ud": "underdog", "pp": "prizepicks"}
+EV_FIELDS = ["break_even", "edge", "ev"]
+
+
+def load_payout_tables(path=DFS_PAYOUT_TABLES_FILE):
+    """
+    The payout tables from a JSON file ({site: {entry_type: {legs: {hits: multiplier}}}}), or the built-in ones.
+    """
+    if not path:
+        return DEFAULT_PAYOUT_TABLES
+
+    with open(path, encoding="utf-8") as f:
+        tables = json.load(f)
+
+    return {
+        site: {
+            entry_type: {int(legs): {int(hits): float(multiplier) for hits, multiplier in payouts.items()} for legs, payouts in sizes.items()}
+            for entry_type, sizes in entry_types.items()
+        }
+        for site, entry_types in tables.items()
+    }
+
+
+PAYOUT_TABLES = load_payout_tables()
+
+
+def payout_table(site, entry_type, legs):
+    """
+    {hits: multiplier} for an entry. Raises ValueError when the site doesn't offer it.
+    """
+    try:
+        return PAYOUT_TABLES[site][entry_type][legs]
+    except KeyError:
+        raise ValueError(f"No {entry_type} payout table for {legs}-pick {site} entries")
+
+
+def expected_return(probability, site, entry_type, legs):
+    """
+    Expected payout per unit staked of an entry whose legs each hit with the given probability (0..1, array or scalar).
+    """
+    probability = np.asarray(probability, dtype=float)
+    total = np.zeros_like(probability)
+
+    for hits, multiplier in payout_table(site, entry_type, legs).items():
+        total = total + multiplier * comb(legs, hits) * probability ** hits * (1 - probability) ** (legs - hits)
+
+    return total
+
+
+@lru_cache(maxsize=None)
+def break_even_probability(site, entry_type, legs):
+    """
+    Per-leg hit probability at which an entry returns exactly its stake.
+    The expected return rises with the hit probability, so it is found by bisection, once per table.
+    """
+    low, high = 0.0, 1.0
+    for _ in range(60):
+        middle = (low + high) / 2
+        if expected_return(middle, site, entry_type, legs) < 1:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+def add_expected_value(priced, dfs_site, entry_type=DFS_ENTRY_TYPE, legs=DFS_ENTRY_LEGS):
+    """
+    EV stage after fair pricing. From the fair_probability of every prop of a PricedProps batch, adds
+    in one pass (as rankable values, NaN where the prop couldn't be priced):
+        break_even: per-leg hit probability the entry needs to break even, as a percentage
+        edge: fair probability minus break_even, in percentage points
+        ev: expected return of the entry if every leg hit at this prop's fair probability, in percent of the stake
+    """
+    site = DFS_SITES.get(dfs_site.lower(), dfs_site.lower())
+    probability = priced.values["fair_probability"]
+    break_even = break_even_probability(site, entry_type, legs) * 100
+
+    priced.values["break_even"] = np.where(np.isnan(probability), np.nan, round(break_even, 2))
+    priced.values["edge"] = np.round(probability - break_even, 2)
+    priced.values["ev"] = np.round((expected_return(probability / 100, site, entry_type, legs) - 1) * 100, 2)
+
+    return priced
+
+
+def ev_options(request, default_entry_type=DFS_ENTRY_TYPE, default_legs=DFS_ENTRY_LEGS):
+    """
+    Read the ?entry= and ?legs= overrides of a request. Raises ValueError when either site has no payout table for them.
+    """
+    entry_type = request.GET.get("entry", default_entry_type)
+    legs = request.GET.get("legs", default_legs)
+
+    try:
+        legs = int(legs)
+    except (TypeError, ValueError):
+        raise ValueError(f"legs must be an integer, got {legs!r}")
+
+    for site in DFS_SITES.values():
+        payout_table(site, entry_type, legs)
+
+    return entry_type, legs
@@ -0,0 +1,123 @@
+import asyncio
+import threading
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from .cache import get_cache, make_cache_key
+from .singleflight import SingleFlight
+from .quota import get_quota_tracker
+from .replay import ReplayAdapter, FaultInjector, record_response
+from .fast_json import loads
+from .resilience import call_with_retries, get_breaker, is_transient, CircuitOpenError
+from oddsApi.settings import (
+    ODDS_API_POOL_SIZE, ODDS_API_CONNECT_TIMEOUT, ODDS_API_READ_TIMEOUT, ODDS_RECORD_DIR, ODDS_REPLAY_DIR,
+    ODDS_REPLAY_LATENCY_MS, ODDS_REPLAY_JITTER_MS, ODDS_REPLAY_ERROR_RATE, ODDS_REPLAY_ERROR_STATUS,
+)
+
+_session = None
+_session_lock = threading.Lock()
+_flight = SingleFlight()
+
+
+def get_session():
+    """
+    Return the process-wide requests session used for every call to the odds API.
+    Connections are kept alive and pooled per host, so repeated calls skip the TCP+TLS handshake.
+    """
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+
+                if ODDS_REPLAY_DIR:
+                    # Offline mode: answer from recorded responses, with optional latency and error injection
+                    faults = FaultInjector(ODDS_REPLAY_LATENCY_MS, ODDS_REPLAY_JITTER_MS, ODDS_REPLAY_ERROR_RATE, ODDS_REPLAY_ERROR_STATUS)
+                    adapter = ReplayAdapter(ODDS_REPLAY_DIR, faults, pool_connections=ODDS_API_POOL_SIZE, pool_maxsize=ODDS_API_POOL_SIZE)
+                else:
+                    adapter = HTTPAdapter(pool_connections=ODDS_API_POOL_SIZE, pool_maxsize=ODDS_API_POOL_SIZE)
+
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+
+    return _session
+
+
+def fetch_json(url, params=None, timeout=None, ttl=None, quota_key=None):
+    """
+    GET a URL through the shared session and return the decoded JSON body.
+    When a ttl (seconds) is given, the body is served from / stored in the response cache.
+    Identical requests that are already in flight share one upstream call.
+    Transient failures are retried with backoff; if the upstream host stays down (or its circuit is open),
+    the last good cached body is returned instead, however old.
+    quota_key is an optional (sport, endpoint, event_id) tuple the call's quota cost is recorded under.
+    Raises requests.exceptions.RequestException on connection errors, timeouts and non-2xx responses.
+    """
+    quota = get_quota_tracker()
+    cache = get_cache() if ttl else None
+    cache_key = make_cache_key(url, params)
+    ttl = quota.adjust_ttl(ttl)
+
+    if cache:
+        # With the budget nearly spent, any cached copy beats another upstream call
+        cached = cache.get(cache_key, allow_stale=quota.serve_stale())
+        if cached is not None:
+            return cached
+
+    return _flight.do(cache_key, _request_json, url, params, timeout, cache, cache_key, ttl, quota_key)
+
+
+async def fetch_json_async(url, params=None, timeout=None, ttl=None, quota_key=None):
+    """
+    asyncio version of fetch_json. Coalesces with in-flight requests from both threads and coroutines.
+    """
+    quota = get_quota_tracker()
+    cache = get_cache() if ttl else None
+    cache_key = make_cache_key(url, params)
+    ttl = quota.adjust_ttl(ttl)
+
+    if cache:
+        cached = await asyncio.to_thread(cache.get, cache_key, quota.serve_stale())
+        if cached is not None:
+            return cached
+
+    return await _flight.do_async(cache_key, _request_json, url, params, timeout, cache, cache_key, ttl, quota_key)
+
+
+def _request_json(url, params, timeout, cache, cache_key, ttl, quota_key):
+    breaker = get_breaker(urlparse(url).netloc)
+
+    try:
+        data = call_with_retries(lambda: _get_json(url, params, timeout, quota_key), breaker)
+    except requests.exceptions.RequestException as e:
+        if cache and (isinstance(e, CircuitOpenError) or is_transient(e)):
+            stale = cache.get(cache_key, allow_stale=True)
+            if stale is not None:
+                print(f"Serving stale response for {url}: {e}")
+                return stale
+        raise
+
+    if cache:
+        cache.set(cache_key, data, ttl)
+
+    return data
+
+
+def _get_json(url, params, timeout, quota_key):
+    if timeout is None:
+        timeout = (ODDS_API_CONNECT_TIMEOUT, ODDS_API_READ_TIMEOUT)
+
+    response = get_session().get(url, params=params, timeout=timeout)
+    get_quota_tracker().record(response.headers, quota_key, params)
+
+    if ODDS_RECORD_DIR:
+        record_response(ODDS_RECORD_DIR, url, params, response)
+
+    response.raise_for_status()
+
+    try:
+        return loads(response.content)
+    except ValueError as e:
+        raise requests.exceptions.InvalidJSONError(f"Invalid JSON from {url}: {e}", response=response)
@@ -0,0 +1,297 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+from oddsApi.settings import ODDS_INCREMENTAL_PRICING, ODDS_INCREMENTAL_STREAMS
+from .pricing_engine import PricedProps, price_matched, _decimal_to_american
+from .prop_index import POINT_KEY_SCALE, _ranges
+from .ranking import best_positions, top_k_rows
+
+LEANS = np.array(["n/a", "over", "under"])
+RANK_SLACK = 32  # Candidates kept past the top k, so most polls can re-rank without a full sort
+
+
+def _mix(values):
+    """
+    splitmix64 finalizer over a uint64 array (wraps around like the C version).
+    """
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def _pool_hashes(values):
+    # hash() is salted per process, which is fine for a cache that lives in the process
+    return np.array([hash(value) & 0xFFFFFFFFFFFFFFFF for value in values] or [0], dtype=np.uint64)
+
+
+def prop_keys(matched):
+    """
+    Identity of every prop of a MatchedProps batch across snapshots: a 64-bit hash of its event, DFS site,
+    player, market and line, independent of the codes the slate's pools happen to give them.
+    """
+    dfs = matched.dfs
+    rows = matched.dfs_rows
+    points = np.rint(np.nan_to_num(dfs.point[rows], nan=-1.0) * POINT_KEY_SCALE).astype(np.int64).view(np.uint64)
+
+    key = _mix(_pool_hashes(dfs.events)[dfs.event[rows]])
+    key = _mix(key ^ _pool_hashes(dfs.bookmakers.values)[dfs.bookmaker[rows]])
+    key = _mix(key ^ _pool_hashes(dfs.players.values)[dfs.player[rows]])
+    key = _mix(key ^ _pool_hashes(dfs.markets.values)[dfs.market[rows]])
+    return _mix(key ^ points)
+
+
+def input_hashes(matched):
+    """
+    Hash of every prop's pricing inputs: the (bookmaker, side, price) of each of its entries, in order.
+    Two snapshots of a prop with the same hash price the same.
+    """
+    odds = matched.odds
+    rows = matched.entries
+    prices = np.nan_to_num(odds.price[rows], nan=0.0).view(np.uint64)
+    sides = odds.side_kinds()[rows].astype(np.int64).view(np.uint64)
+    local = (np.arange(len(rows)) - np.repeat(matched.offsets[:-1], matched.entry_counts)).astype(np.uint64)
+
+    entry = _pool_hashes(odds.bookmakers.values)[odds.bookmaker[rows]] ^ prices
+    entry = _mix(entry ^ (sides * np.uint64(0xD6E8FEB86659FD93)) ^ (local * np.uint64(0x9E3779B97F4A7C15)))
+
+    # XOR of a prop's entries from the running XOR at both ends of its range, the entry count mixed in
+    running = np.concatenate(([np.uint64(0)], np.bitwise_xor.accumulate(entry))) if len(entry) else np.zeros(1, dtype=np.uint64)
+    offsets = matched.offsets
+    return _mix(running[offsets[1:]] ^ running[offsets[:-1]] ^ matched.entry_counts.astype(np.uint64))
+
+
+class PricingDelta:
+    """
+    What incremental pricing did to a batch: every prop's key, which props were re-priced (changed),
+    where the unchanged ones sat in the previous batch (previous, by sorted key), the order that sorts
+    the keys, the generation of the state they were compared against and the generation the batch became.
+    """
+
+    def __init__(self, pricer, keys, changed, previous, order, base_generation, generation):
+        self.pricer = pricer
+        self.keys = keys
+        self.changed = changed
+        self.previous = previous
+        self.order = order
+        self.base_generation = base_generation
+        self.generation = generation
+
+
+class _PricingState:
+    def __init__(self, generation, keys, hashes, leans, average_odds, probabilities, pair_counts, pair_books):
+        self.generation = generation
+        self.keys = keys  # Sorted prop keys, everything below aligned with them
+        self.hashes = hashes
+        self.leans = leans  # Codes into LEANS
+        self.average_odds = average_odds  # 0 when not priced
+        self.probabilities = probabilities
+        self.pair_counts = pair_counts
+        self.pair_offsets = np.concatenate(([0], np.cumsum(pair_counts)[:-1])).astype(np.int64)
+        self.pair_books = pair_books  # Pricer-wide bookmaker ids
+
+
+class _RankingState:
+    def __init__(self, generation, keys, cutoff, eligible):
+        self.generation = generation
+        self.keys = keys  # Keys of the best eligible props, best first
+        self.cutoff = cutoff  # (value, tie) no eligible prop outside keys beats, None when keys hold every eligible prop
+        self.eligible = eligible  # Eligibility of every prop, by sorted key
+
+
+class IncrementalPricer:
+    """
+    Prices the successive snapshots of one stream of props (a sport, a DFS site and the pricing options)
+    re-running the de-vig and weighting only for the props whose inputs changed since the previous snapshot.
+
+    The previous snapshot's inputs (hashed per prop) and outputs are kept sorted by prop key; a new batch
+    is looked up in one searchsorted, its changed props are priced with price_matched and the rest reuse
+    their previous results. The top-k is re-ranked from the previous best props plus the changed ones,
+    and only sorted in full when a change could have promoted a prop from outside them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = None
+        self._rankings = {}  # (rank_by, tie_break) -> _RankingState
+        self._generation = 0
+        self._books = {}  # Bookmaker title -> pricer-wide id
+        self.repriced = 0
+        self.reused = 0
+        self.full_ranks = 0
+        self.incremental_ranks = 0
+
+    def price(self, matched, bookmaker_weights, method):
+        """
+        price_matched for a batch, with the results of its unchanged props carried over. Returns PricedProps
+        identical to price_matched's, with a PricingDelta as priced.delta.
+        """
+        keys = prop_keys(matched)
+        order = np.argsort(keys)
+        sorted_keys = keys[order]
+        if np.any(sorted_keys[1:] == sorted_keys[:-1]):
+            return price_matched(matched, bookmaker_weights, method)  # The same line twice: no identity to carry over
+
+        hashes = input_hashes(matched)
+        with self._lock:
+            state = self._state
+            self._generation += 1
+            generation = self._generation
+            book_ids = np.array([self._books.setdefault(title, len(self._books)) for title in matched.odds.bookmakers.values] or [0], dtype=np.int64)
+            book_count = len(self._books)
+
+        # Match every prop to its previous snapshot, unchanged when its inputs hash the same
+        if state is not None and len(state.keys):
+            found = np.empty(len(keys), dtype=np.int64)
+            found[order] = np.minimum(np.searchsorted(state.keys, sorted_keys), len(state.keys) - 1)  # Sorted needles search faster
+            unchanged = (state.keys[found] == keys) & (state.hashes[found] == hashes)
+        else:
+            found = np.zeros(len(keys), dtype=np.int64)
+            unchanged = np.zeros(len(keys), dtype=bool)
+        changed = ~unchanged
+        changed_props = np.flatnonzero(changed)
+
+        leans = np.zeros(len(keys), dtype=np.int8)
+        average_odds = np.zeros(len(keys), dtype=np.int64)
+        probabilities = np.full(len(keys), np.nan)
+        pair_counts = np.zeros(len(keys), dtype=np.int64)
+        pair_starts = np.zeros(len(keys), dtype=np.int64)
+        cached_books = state.pair_books if state is not None else np.empty(0, dtype=np.int64)
+
+        if state is not None:
+            previous = found[unchanged]
+            leans[unchanged] = state.leans[previous]
+            average_odds[unchanged] = state.average_odds[previous]
+            probabilities[unchanged] = state.probabilities[previous]
+            pair_counts[unchanged] = state.pair_counts[previous]
+            pair_starts[unchanged] = state.pair_offsets[previous]
+
+        fresh_books = np.empty(0, dtype=np.int64)
+        if len(changed_props):
+            fresh = price_matched(matched.select(changed_props), bookmaker_weights, method)
+            leans[changed_props] = np.where(np.array(fresh.lean) == "over", 1, np.where(np.array(fresh.lean) == "under", 2, 0))
+            average_odds[changed_props] = [odds or 0 for odds in fresh.average_odds]
+            probabilities[changed_props] = fresh.values["fair_probability"]
+            pair_counts[changed_props] = fresh.bookmaker_counts
+            pair_starts[changed_props] = len(cached_books) + np.concatenate(([0], np.cumsum(fresh.bookmaker_counts)[:-1]))
+            fresh_books = book_ids[fresh.bookmaker_codes]
+
+        # Bookmakers of every prop, as pricer-wide ids and as codes into this slate's pool
+        pair_books = np.concatenate((cached_books, fresh_books))[_ranges(pair_starts, pair_counts)]
+        slate_codes = np.full(book_count, -1, dtype=np.int64)
+        slate_codes[book_ids[:len(matched.odds.bookmakers)]] = np.arange(len(matched.odds.bookmakers))
+
+        sorted_counts = pair_counts[order]
+        pair_offsets = np.concatenate(([0], np.cumsum(pair_counts)[:-1])).astype(np.int64)
+        new_state = _PricingState(
+            generation, sorted_keys, hashes[order], leans[order], average_odds[order], probabilities[order],
+            sorted_counts, pair_books[_ranges(pair_offsets[order], sorted_counts)],
+        )
+
+        with self._lock:
+            self._state = new_state
+            self.repriced += len(changed_props)
+            self.reused += len(keys) - len(changed_props)
+
+        entry_odds = np.nan_to_num(matched.odds.price[matched.entries], nan=0.0)
+        priced = PricedProps(
+            matched,
+            lean=LEANS[leans].tolist(),
+            average_odds=[odds or None for odds in average_odds.tolist()],
+            values={"fair_probability": probabilities},
+            bookmaker_counts=pair_counts,
+            bookmaker_codes=slate_codes[pair_books],
+            entry_odds=_decimal_to_american(entry_odds).tolist(),
+        )
+        priced.delta = PricingDelta(self, keys, changed, found, order, state.generation if state is not None else None, generation)
+        return priced
+
+    def top_k(self, priced, k, rank_by, tie_break=None, eligible=None):
+        """
+        top_k_rows for a batch this pricer priced. The previous batch's best props that didn't change, plus
+        the changed ones and the unchanged ones that just became eligible, are ranked; that is the exact top k
+        when its k-th prop beats the best (value, tie) left outside the previous candidates, otherwise the
+        whole batch is sorted again.
+        """
+        delta = priced.delta
+        values = np.nan_to_num(priced.values[rank_by], nan=-np.inf)
+        ties = np.nan_to_num(priced.values[tie_break], nan=-np.inf) if tie_break else np.zeros(len(values))
+        eligible = np.ones(len(values), dtype=bool) if eligible is None else np.asarray(eligible, dtype=bool)
+        keep = max(2 * k, k + RANK_SLACK)
+
+        with self._lock:
+            ranking = self._rankings.get((rank_by, tie_break))
+
+        ranked = None
+        if ranking is not None and ranking.generation == delta.base_generation and k > 0:
+            # The cutoff only bounds the props that were eligible, the others are ranked as if they changed
+            newly_eligible = eligible & ~delta.changed & ~ranking.eligible[delta.previous]
+            candidates = np.flatnonzero(eligible & (delta.changed | newly_eligible | np.isin(delta.keys, ranking.keys)))
+            candidates = candidates[np.lexsort((candidates, -ties[candidates], -values[candidates]))]
+            cutoff = ranking.cutoff
+
+            if cutoff is not None:
+                # Only the candidates strictly above the cutoff are sure to beat every prop left outside
+                value, tie = cutoff
+                above = (values[candidates] > value) | ((values[candidates] == value) & (ties[candidates] > tie))
+                candidates = candidates[above]
+
+            if cutoff is None or len(candidates) >= k:
+                ranked = candidates[:keep]
+                if len(candidates) > keep:
+                    cutoff = (values[ranked[-1]], ties[ranked[-1]])
+                self.incremental_ranks += 1
+
+        if ranked is None:
+            positions = np.flatnonzero(eligible)
+            ranked = best_positions(values, ties, positions, keep)
+            cutoff = (values[ranked[-1]], ties[ranked[-1]]) if len(positions) > keep else None
+            self.full_ranks += 1
+
+        with self._lock:
+            self._rankings[(rank_by, tie_break)] = _RankingState(delta.generation, delta.keys[ranked], cutoff, eligible[delta.order])
+
+        return ranked[:k].tolist() if k > 0 else []
+
+
+_pricers = OrderedDict()
+_pricers_lock = threading.Lock()
+
+
+def get_incremental_pricer(stream):
+    """
+    Return the pricer of a stream (any hashable, e.g. (sport, dfs_site, devig, entry_type, legs)).
+    The ODDS_INCREMENTAL_STREAMS most recently used streams are kept.
+    """
+    with _pricers_lock:
+        pricer = _pricers.get(stream)
+        if pricer is None:
+            pricer = _pricers[stream] = IncrementalPricer()
+            while len(_pricers) > ODDS_INCREMENTAL_STREAMS:
+                _pricers.popitem(last=False)
+        _pricers.move_to_end(stream)
+
+    return pricer
+
+
+def price_incremental(stream, matched, bookmaker_weights, method):
+    """
+    price_matched for one snapshot of a stream, re-pricing only the props that changed since its previous
+    snapshot. Plain price_matched when ODDS_INCREMENTAL_PRICING is off.
+    """
+    if not ODDS_INCREMENTAL_PRICING:
+        return price_matched(matched, bookmaker_weights, method)
+
+    stream = (stream, method, tuple(sorted(bookmaker_weights.items())))
+    return get_incremental_pricer(stream).price(matched, bookmaker_weights, method)
+
+
+def top_k_incremental(priced, k, rank_by, tie_break=None, eligible=None):
+    """
+    top_k_rows, re-ranked incrementally when priced came from price_incremental.
+    """
+    delta = getattr(priced, "delta", None)
+    if delta is None:
+        return top_k_rows(priced, k, rank_by, tie_break, eligible)
+    return delta.pricer.top_k(priced, k, rank_by, tie_break, eligible)
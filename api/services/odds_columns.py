@@ -0,0 +1,155 @@
+from array import array
+import numpy as np
+
+OVER = 0
+UNDER = 1
+OTHER_SIDE = -1  # Outcomes that are neither over nor under (yes/no markets...)
+SIDE_KINDS = {"over": OVER, "under": UNDER}
+
+COLUMNS = [
+    ("event", "i", np.int32),
+    ("player", "i", np.int32),
+    ("market", "i", np.int32),
+    ("bookmaker", "i", np.int32),
+    ("side", "i", np.int32),
+    ("point", "d", np.float64),
+    ("price", "d", np.float64),
+]
+
+
+class StringPool:
+    """
+    Interns strings to dense integer codes, in order of first appearance.
+    """
+
+    def __init__(self, values=()):
+        self.values = []
+        self._codes = {}
+        for value in values:
+            self.code(value)
+
+    def code(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def get(self, value, default=None):
+        return self._codes.get(value, default)
+
+    def __getitem__(self, code):
+        return self.values[code]
+
+    def __len__(self):
+        return len(self.values)
+
+
+class OddsColumns:
+    """
+    Columnar odds of one event or of a whole slate, one row per outcome in the order the parser saw them.
+
+    player, market, bookmaker and side (the outcome name, "Over"/"Under") are codes into string pools,
+    event is the index of the event in the slate, point and price are float64 (NaN when upstream sent none).
+    Rows are appended into compact array.array buffers while parsing; freeze() turns the columns into
+    NumPy arrays, after which no more rows can be added.
+    """
+
+    def __init__(self, players=None, markets=None, bookmakers=None, sides=None, events=None):
+        self.players = players if players is not None else StringPool()
+        self.markets = markets if markets is not None else StringPool()
+        self.bookmakers = bookmakers if bookmakers is not None else StringPool()
+        self.sides = sides if sides is not None else StringPool()
+        self.events = events if events is not None else []  # Event ids, by event code
+
+        self.frozen = False
+        for name, typecode, _ in COLUMNS:
+            setattr(self, name, array(typecode))
+
+        self._side_kinds = None
+
+    def append(self, player, market, bookmaker, side, point, price, event=0):
+        self.event.append(event)
+        self.player.append(self.players.code(player))
+        self.market.append(self.markets.code(market))
+        self.bookmaker.append(self.bookmakers.code(bookmaker))
+        self.side.append(self.sides.code(side))
+        self.point.append(float("nan") if point is None else point)
+        self.price.append(float("nan") if price is None else price)
+
+    def freeze(self):
+        """
+        Swap the append buffers for NumPy arrays. Returns self.
+        """
+        if not self.frozen:
+            for name, _, dtype in COLUMNS:
+                setattr(self, name, np.array(getattr(self, name), dtype=dtype))
+            self.frozen = True
+        return self
+
+    def __len__(self):
+        return len(self.price)
+
+    def nbytes(self):
+        """
+        Size of the column data in bytes (pools excluded, they are shared by every row).
+        """
+        return sum(getattr(self, name).itemsize * len(self) for name, _, _ in COLUMNS)
+
+    def side_kinds(self):
+        """
+        OVER, UNDER or OTHER_SIDE for every row, from the outcome names regardless of case.
+        """
+        if self._side_kinds is None:
+            kinds = np.array([SIDE_KINDS.get(side.lower(), OTHER_SIDE) for side in self.sides.values] or [OTHER_SIDE], dtype=np.int8)
+            self._side_kinds = kinds[self.freeze().side]
+        return self._side_kinds
+
+    def rows(self):
+        """
+        Iterate the rows as (player, market, bookmaker, side, point, price) with plain Python values.
+        """
+        self.freeze()
+        columns = zip(self.player.tolist(), self.market.tolist(), self.bookmaker.tolist(),
+                      self.side.tolist(), self.point.tolist(), self.price.tolist())
+
+        for player, market, bookmaker, side, point, price in columns:
+            yield (
+                self.players[player], self.markets[market], self.bookmakers[bookmaker], self.sides[side],
+                None if point != point else point, None if price != price else price,  # NaN back to None
+            )
+
+    @classmethod
+    def concat(cls, parts, event_ids=None, like=None):
+        """
+        Stack per-event columns into one slate. Part i becomes event i.
+        Codes are re-encoded into fresh pools, or into the pools of `like` so both slates share codes.
+        """
+        if like is not None:
+            slate = cls(like.players, like.markets, like.bookmakers, like.sides, like.events)
+        else:
+            slate = cls(events=list(event_ids) if event_ids is not None else list(range(len(parts))))
+
+        stacked = {name: [] for name, _, _ in COLUMNS}
+
+        for event, part in enumerate(parts):
+            part.freeze()
+            stacked["event"].append(np.full(len(part), event, dtype=np.int32))
+            for name, pool in [("player", "players"), ("market", "markets"), ("bookmaker", "bookmakers"), ("side", "sides")]:
+                stacked[name].append(_recode(getattr(part, pool), getattr(slate, pool))[getattr(part, name)])
+            stacked["point"].append(part.point)
+            stacked["price"].append(part.price)
+
+        for name, _, dtype in COLUMNS:
+            setattr(slate, name, np.concatenate(stacked[name]).astype(dtype, copy=False) if parts else np.empty(0, dtype=dtype))
+        slate.frozen = True
+
+        return slate
+
+
+def _recode(source, target):
+    """
+    Map the codes of one pool onto another, as an array indexed by source code.
+    """
+    return np.array([target.code(value) for value in source.values] or [0], dtype=np.int32)
+
@@ -0,0 +1,220 @@
+import threading
+from datetime import timedelta
+from django.db import connection, transaction
+from django.db.models import DateTimeField, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from api.models import OddsChange, OddsKeyframe
+from oddsApi.settings import ODDS_HISTORY_KEYFRAME_INTERVAL, ODDS_HISTORY_WINDOW, ODDS_STORE_BATCH_SIZE
+from .player_index import normalize_player_name, player_keys
+
+_states = {}  # sport -> {event pk: ({outcome key: price}, polls since its last keyframe)}, as last written
+_states_lock = threading.Lock()
+
+
+def write_history(sport, event_pks, rows, fetched_at):
+    """
+    Append one snapshot of a sport to the line-movement history. rows are the outcomes write_slate stores,
+    (event, bookmaker, market, player, side, point, price, is_dfs, stamp) with lookup ids.
+
+    Each event is compared with its previous state, kept in memory (rebuilt from the history after a restart):
+    only new, re-priced and removed outcomes are written, and every ODDS_HISTORY_KEYFRAME_INTERVAL polls
+    (and the first time an event is seen) all of its outcomes go in again as a keyframe.
+    An outcome is only removed when the slate fetched its event and market without it: the markets a
+    fetch left out (the low-value ones dropped while the quota runs low) keep their previous outcomes.
+    Runs inside write_slate's transaction, the in-memory states move on once it commits.
+    Returns the number of history rows written.
+    """
+    with _states_lock:
+        known = dict(_states.get(sport, {}))
+
+    missing = [event for event in event_pks if event not in known]
+    if missing:
+        loaded = load_event_states(missing)
+        for event in missing:
+            known[event] = (loaded[event], 0) if event in loaded else None
+
+    current = {event: {} for event in event_pks}
+    fetched = {event: set() for event in event_pks}  # Markets the slate holds for each event
+    for event, bookmaker, market, player, side, point, price, is_dfs, _ in rows:
+        current[event][(bookmaker, market, player, side, point, is_dfs)] = price
+        fetched[event].add(market)
+
+    stamp = connection.ops.adapt_datetimefield_value(fetched_at)
+    changes, keyframes, states = [], [], {}
+    for event, state in current.items():
+        previous = known[event]
+        keyframe = previous is None or previous[1] + 1 >= ODDS_HISTORY_KEYFRAME_INTERVAL
+        prior = previous[0] if previous is not None else {}
+
+        for key, price in prior.items():
+            if key not in state:
+                if key[1] in fetched[event]:
+                    changes.append(_change_row(event, key, None, True, False, stamp))
+                else:
+                    state[key] = price  # Not fetched this time, still quoted as far as the history knows
+
+        # The delta rows alone are the full change log, a keyframe only lets a replay start later
+        for key, price in state.items():
+            if key not in prior or prior[key] != price:
+                changes.append(_change_row(event, key, price, False, False, stamp))
+            if keyframe:
+                changes.append(_change_row(event, key, price, False, True, stamp))
+
+        if keyframe:
+            keyframes.append(OddsKeyframe(event_id=event, taken_at=fetched_at))
+        states[event] = (state, 0 if keyframe else previous[1] + 1)
+
+    table = connection.ops.quote_name(OddsChange._meta.db_table)
+    with connection.cursor() as cursor:
+        for start in range(0, len(changes), ODDS_STORE_BATCH_SIZE):
+            cursor.executemany(
+                f"INSERT INTO {table} (event_id, bookmaker_id, market_id, player, player_key, side, point, price, "
+                "is_dfs, removed, keyframe, changed_at) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+                changes[start:start + ODDS_STORE_BATCH_SIZE],
+            )
+    OddsKeyframe.objects.bulk_create(keyframes)
+
+    transaction.on_commit(lambda: _remember_states(sport, states))
+    return len(changes)
+
+
+def _change_row(event, key, price, removed, keyframe, stamp):
+    bookmaker, market, player, side, point, is_dfs = key
+    return (event, bookmaker, market, player, normalize_player_name(player), side, point, price, is_dfs, removed, keyframe, stamp)
+
+
+def _remember_states(sport, states):
+    # Only the events of the latest slate are kept, the others are rebuilt from the history if they come back
+    with _states_lock:
+        _states[sport] = states
+
+
+def load_event_states(event_pks, at=None):
+    """
+    The state of events as the history holds it, {event pk: {outcome key: price}}, now or as of at,
+    replayed from each event's latest keyframe (at or before at) in one query. Events without one are left out.
+    """
+    keyframes = OddsKeyframe.objects.filter(event__in=event_pks)
+    changes = OddsChange.objects.filter(event__in=event_pks)
+    if at is not None:
+        keyframes = keyframes.filter(taken_at__lte=at)
+        changes = changes.filter(changed_at__lte=at)
+
+    latest = keyframes.filter(event=OuterRef("event")).order_by("-taken_at").values("taken_at")[:1]
+    rows = (
+        changes.alias(start=Subquery(latest))
+        .filter(changed_at__gte=F("start"))
+        .filter(Q(keyframe=False) | Q(changed_at=F("start")))  # Later keyframes repeat what the replay already holds
+    )
+
+    states = {event: {} for event in keyframes.values_list("event", flat=True).distinct()}
+    rows = rows.order_by("changed_at", "id").values_list(
+        "event", "bookmaker", "market", "player", "side", "point", "price", "is_dfs", "removed"
+    )
+    for event, bookmaker, market, player, side, point, price, is_dfs, removed in rows.iterator(chunk_size=ODDS_STORE_BATCH_SIZE):
+        key = (bookmaker, market, player, side, point, is_dfs)
+        if removed:
+            states[event].pop(key, None)
+        else:
+            states[event][key] = price
+
+    return states
+
+
+def player_history(sport, player, market=None, bookmaker=None, since=None, at=None):
+    """
+    How a player's lines moved between since and at: the lines quoted at since ("opening") and at ("lines"),
+    and every change in between ("moves"), optionally for one market and/or bookmaker.
+
+    One query over the player's history rows: each event replays from its latest keyframe at or before since,
+    so the state at any time costs at most ODDS_HISTORY_KEYFRAME_INTERVAL polls of deltas.
+    """
+    at = at or timezone.now()
+    since = since or at - timedelta(seconds=ODDS_HISTORY_WINDOW)
+
+    keyframe = OddsKeyframe.objects.filter(event=OuterRef("event"), taken_at__lte=since).order_by("-taken_at").values("taken_at")[:1]
+    rows = (
+        OddsChange.objects.filter(event__sport=sport, player_key__in=player_keys(player), changed_at__lte=at)
+        .alias(start=Coalesce(Subquery(keyframe), Value(since, output_field=DateTimeField())))
+        .filter(changed_at__gte=F("start"))
+        .filter(Q(keyframe=False) | Q(changed_at=F("start")))
+    )
+    if market:
+        rows = rows.filter(market__key=market)
+    if bookmaker:
+        rows = rows.filter(bookmaker__title__iexact=bookmaker)
+
+    state = {}
+    opening = None
+    moves = []
+    rows = rows.order_by("changed_at", "id").values_list(
+        "event__event_id", "bookmaker__title", "market__key", "player", "side", "point", "price", "removed", "changed_at"
+    )
+    for event_id, bookmaker_title, market_key, player_name, side, point, price, removed, changed_at in rows.iterator(chunk_size=ODDS_STORE_BATCH_SIZE):
+        key = (event_id, bookmaker_title, market_key, player_name, side, point)
+
+        if changed_at > since and opening is None:
+            opening = _lines(state)
+
+        if removed:
+            if key not in state:
+                continue
+            del state[key]
+        else:
+            if key in state and state[key] == price:
+                continue
+            state[key] = price
+
+        if changed_at > since:
+            moves.append({**_line(key, None if removed else price), "removed": removed, "time": changed_at.isoformat()})
+
+    return {
+        "player": player,
+        "market": market,
+        "since": since.isoformat(),
+        "at": at.isoformat(),
+        "opening": _lines(state) if opening is None else opening,
+        "lines": _lines(state),
+        "moves": moves,
+    }
+
+
+def _line(key, price):
+    event_id, bookmaker, market, player, side, point = key
+    return {"event_id": event_id, "bookmaker": bookmaker, "market": market, "player": player, "side": side, "point": point, "price": price}
+
+
+def _lines(state):
+    ordered = sorted(state.items(), key=lambda item: (item[0][:5], float("-inf") if item[0][5] is None else item[0][5]))
+    return [_line(key, price) for key, price in ordered]
+
+
+def history_options(request):
+    """
+    Read ?player= (required), ?market=, ?bookmaker=, ?since= and ?at= (ISO 8601 times) of a history request.
+    Raises ValueError on a missing player or a bad time.
+    """
+    player = request.GET.get("player", "").strip()
+    if not player:
+        raise ValueError("player is required")
+
+    at = _time_option(request, "at") or timezone.now()
+    since = _time_option(request, "since") or at - timedelta(seconds=ODDS_HISTORY_WINDOW)
+    if since > at:
+        raise ValueError("since must not be after at")
+
+    return player, request.GET.get("market") or None, request.GET.get("bookmaker") or None, since, at
+
+
+def _time_option(request, name):
+    value = request.GET.get(name, None)
+    if not value:
+        return None
+
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"{name} must be an ISO 8601 time, got {value!r}")
+
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
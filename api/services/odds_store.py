@@ -0,0 +1,209 @@
+import atexit
+import threading
+from datetime import timedelta
+from django.db import connection, transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+from api.models import Bookmaker, Event, Market, OddsSnapshot
+from oddsApi.settings import ODDS_STORE_ENABLED, ODDS_STORE_BATCH_SIZE, ODDS_STORE_MAX_AGE, ODDS_STORE_SOURCE
+from .odds_columns import OddsColumns
+from .odds_history import write_history
+from .player_index import player_name_matches
+
+STORE_SOURCES = ["live", "store"]
+
+
+def write_slate(sport, event_results, fetched_at=None, events=None):
+    """
+    Insert every outcome of a fetched slate ([(event_id, odds, dfs_lines)], OddsColumns per event) as
+    OddsSnapshot rows sharing one fetched_at, in one transaction with bulk inserts.
+    Events, bookmakers and markets are created on first sight; events (the upcoming events the slate was
+    fetched for, with "id", "home_team", "away_team" and "commence_time") fill in and refresh the Event rows.
+    Returns the number of rows written.
+
+    Only each event's latest snapshot is kept: the older rows are dropped once the changes since them
+    are in the line-movement history (api.services.odds_history).
+    """
+    fetched_at = fetched_at or timezone.now()
+    event_results = [(event_id, odds, dfs_lines) for event_id, odds, dfs_lines in event_results if odds is not None]
+    if not event_results:
+        return 0
+
+    with transaction.atomic():
+        event_ids = [event_id for event_id, _, _ in event_results]
+        details = {event["id"]: event for event in events or []}
+        Event.objects.bulk_create(
+            [
+                Event(sport=sport, event_id=event_id, home_team=details[event_id].get("home_team") or "",
+                      away_team=details[event_id].get("away_team") or "", commence_time=details[event_id].get("commence_time"))
+                for event_id in event_ids if event_id in details
+            ],
+            update_conflicts=True, unique_fields=["sport", "event_id"], update_fields=["home_team", "away_team", "commence_time"],
+        )
+        Event.objects.bulk_create([Event(sport=sport, event_id=event_id) for event_id in event_ids if event_id not in details], ignore_conflicts=True)
+        events = dict(Event.objects.filter(sport=sport, event_id__in=event_ids).values_list("event_id", "id"))
+
+        parts = [(events[event_id], columns, is_dfs) for event_id, odds, dfs_lines in event_results
+                 for columns, is_dfs in [(odds, False), (dfs_lines, True)] if columns is not None]
+        bookmakers = _lookup_ids(Bookmaker, "title", {title for _, columns, _ in parts for title in columns.bookmakers.values})
+        markets = _lookup_ids(Market, "key", {key for _, columns, _ in parts for key in columns.markets.values})
+
+        rows = []
+        stamp = connection.ops.adapt_datetimefield_value(fetched_at)
+        for event, columns, is_dfs in parts:
+            for player, market, bookmaker, side, point, price in columns.rows():
+                rows.append((event, bookmakers[bookmaker], markets[market], player, side, point, price, is_dfs, stamp))
+
+        # The rows go straight to executemany: building a model instance per outcome costs more than the insert
+        table = connection.ops.quote_name(OddsSnapshot._meta.db_table)
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), ODDS_STORE_BATCH_SIZE):
+                cursor.executemany(
+                    f"INSERT INTO {table} (event_id, bookmaker_id, market_id, player, side, point, price, is_dfs, fetched_at) "
+                    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)",
+                    rows[start:start + ODDS_STORE_BATCH_SIZE],
+                )
+
+        write_history(sport, list(events.values()), rows, fetched_at)
+        OddsSnapshot.objects.filter(event__in=list(events.values()), fetched_at__lt=fetched_at).delete()
+
+    return len(rows)
+
+
+def _lookup_ids(model, field, values):
+    """
+    {value: id} for a lookup table, creating the missing values with one bulk insert.
+    """
+    model.objects.bulk_create([model(**{field: value}) for value in values], ignore_conflicts=True)
+    return dict(model.objects.filter(**{f"{field}__in": values}).values_list(field, "id"))
+
+
+def load_latest_slate(sport, event_ids=None, max_age=ODDS_STORE_MAX_AGE, player_name_filter=None):
+    """
+    The latest stored snapshot of every event of a sport (or of event_ids), fetched within max_age seconds,
+    as the [(event_id, odds, dfs_lines)] the views get from the network, events in the order given
+    (or first stored) and outcomes in the order they were parsed.
+    player_name_filter (?player_name=) keeps the sportsbook odds of the matching players only, as the live parsers do.
+
+    One query: the correlated subquery picks each event's newest fetched_at off the (event, fetched_at) index.
+    """
+    latest = OddsSnapshot.objects.filter(event=OuterRef("event")).order_by("-fetched_at").values("fetched_at")[:1]
+    snapshot = OddsSnapshot.objects.filter(
+        event__sport=sport,
+        fetched_at=Subquery(latest),
+        fetched_at__gte=timezone.now() - timedelta(seconds=max_age),
+    )
+    if event_ids is not None:
+        snapshot = snapshot.filter(event__event_id__in=list(event_ids))
+
+    columns = {}
+    rows = snapshot.order_by("event_id", "id").values_list(
+        "event__event_id", "player", "market__key", "bookmaker__title", "side", "point", "price", "is_dfs"
+    )
+    for event_id, player, market, bookmaker, side, point, price, is_dfs in rows.iterator(chunk_size=ODDS_STORE_BATCH_SIZE):
+        if player_name_filter and not is_dfs and not player_name_matches(player_name_filter, player):
+            continue
+        event_columns = columns.get(event_id)
+        if event_columns is None:
+            event_columns = columns[event_id] = (OddsColumns(), OddsColumns())
+        event_columns[1 if is_dfs else 0].append(player, market, bookmaker, side, point, price)
+
+    order = list(event_ids) if event_ids is not None else list(columns)
+    return [(event_id, columns[event_id][0].freeze(), columns[event_id][1].freeze()) for event_id in order if event_id in columns]
+
+
+def store_option(request, default=ODDS_STORE_SOURCE):
+    """
+    Read the ?source= override of a request: "store" answers from the stored snapshots, "live" fetches.
+    Raises ValueError on anything else.
+    """
+    source = request.GET.get("source", default)
+
+    if source not in STORE_SOURCES:
+        raise ValueError(f"source must be one of {', '.join(STORE_SOURCES)}")
+
+    return source == "store"
+
+
+class OddsStoreWriter:
+    """
+    Writes fetched slates to the snapshot store on a background thread, off the request path.
+    Each slate (one poll cycle of a sport) goes in as one batch; if a sport's next slate arrives
+    before the previous one was written, only the newer one is kept.
+    """
+
+    def __init__(self):
+        self._pending = {}  # sport -> (event_results, fetched_at, events)
+        self._writing = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self.written = 0
+        self.coalesced = 0
+
+    def submit(self, sport, event_results, fetched_at=None, events=None):
+        with self._cond:
+            if sport in self._pending:
+                self.coalesced += 1
+            self._pending[sport] = (event_results, fetched_at or timezone.now(), events)
+
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="odds-store-writer", daemon=True)
+                self._thread.start()
+
+            self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """
+        Wait for everything pending to be written. Returns False if it didn't finish within timeout.
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._writing, timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+
+                sport = next(iter(self._pending))
+                event_results, fetched_at, events = self._pending.pop(sport)
+                self._writing += 1
+
+            try:
+                self.written += write_slate(sport, event_results, fetched_at, events)
+            except Exception as e:
+                print(f"Error storing {sport} odds: {e}")
+            finally:
+                with self._cond:
+                    self._writing -= 1
+                    self._cond.notify_all()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_odds_store_writer():
+    """
+    Return the process-wide background store writer.
+    """
+    global _writer
+
+    with _writer_lock:
+        if _writer is None:
+            _writer = OddsStoreWriter()
+            atexit.register(_writer.flush, 10)  # Don't lose the last poll cycle when the process stops
+
+    return _writer
+
+
+def record_slate(sport, event_results, events=None):
+    """
+    Queue a freshly fetched slate for the store, with the upcoming events it was fetched for (teams and
+    start times for the Event rows). Does nothing unless ODDS_STORE_ENABLED.
+    Only complete slates belong here (the poller's cycles): each one replaces the stored snapshot of its events,
+    and the outcomes missing from it go into the history as removed.
+    """
+    if not ODDS_STORE_ENABLED:
+        return
+    get_odds_store_writer().submit(sport, event_results, events=events)
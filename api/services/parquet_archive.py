@@ -0,0 +1,253 @@
+import atexit
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from oddsApi.settings import ODDS_ARCHIVE_DIR, ODDS_ARCHIVE_ROW_GROUP_SIZE, ODDS_ARCHIVE_FLUSH_SECONDS
+
+# pyarrow is optional: it writes and streams Parquet row group by row group, otherwise pandas
+# goes through whichever Parquet engine it finds (fastparquet) one file at a time
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:
+    pyarrow = None
+
+PARQUET_ENGINE = "pyarrow" if pyarrow is not None else "pandas"
+
+
+def archive_priced(sport, dfs_site, priced, eligible, **options):
+    """
+    Queue every priced prop of a batch (PricedProps, not only the ranked top) for the Parquet archive,
+    one row per prop stamped with the snapshot time. options (devig, entry type...) become constant columns.
+    Does nothing unless ODDS_ARCHIVE_DIR is set.
+    """
+    if not ODDS_ARCHIVE_DIR or not len(priced.lean):
+        return
+
+    matched = priced.matched
+    dfs = matched.dfs
+    rows = matched.dfs_rows
+
+    frame = pd.DataFrame({
+        "snapshot_at": pd.Timestamp.now(tz="UTC"),
+        "dfs_site": dfs_site,
+        "event_id": np.array([str(event_id) for event_id in dfs.events], dtype=object)[dfs.event[rows]],
+        "player_name": np.array(dfs.players.values, dtype=object)[dfs.player[rows]],
+        "market": np.array(dfs.markets.values, dtype=object)[dfs.market[rows]],
+        "point": dfs.point[rows],
+        "lean": priced.lean,
+        "average_odds": np.array([np.nan if odds is None else odds for odds in priced.average_odds], dtype=np.float64),
+        **priced.values,
+        "interpolated": priced.interpolated,
+        "eligible": np.asarray(eligible, dtype=bool),
+        "bookmaker_count": priced.bookmaker_counts,
+        # None would give the column a null type in some files and a string type in others
+        **{name: "" if value is None else value for name, value in options.items()},
+    })
+
+    get_archive_writer().submit(sport, frame)
+
+
+def write_partition(root, sport, day, frame, row_group_size=ODDS_ARCHIVE_ROW_GROUP_SIZE):
+    """
+    Write archived rows as a new file of the sport/day partition (<root>/sport=<sport>/date=<day>/),
+    row groups of row_group_size rows. The file is written under a dotted temp name and renamed in,
+    so readers never see a half-written file. Returns its path.
+    """
+    directory = os.path.join(root, f"sport={sport}", f"date={day}")
+    os.makedirs(directory, exist_ok=True)
+
+    # Files sort by the time of their first snapshot, so a day's files list in order
+    name = f"part-{frame['snapshot_at'].iloc[0]:%H%M%S%f}-{uuid.uuid4().hex[:8]}.parquet"
+    path = os.path.join(directory, name)
+    tmp_path = os.path.join(directory, f".{name}.tmp")
+
+    try:
+        if pyarrow is not None:
+            table = pyarrow.Table.from_pandas(frame, preserve_index=False)
+            pq.write_table(table, tmp_path, row_group_size=row_group_size, compression="zstd")
+        else:
+            frame.to_parquet(tmp_path, index=False, row_group_offsets=row_group_size)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return path
+
+
+class ParquetArchiveWriter:
+    """
+    Writes archived snapshots on a background thread, off the request path.
+    Rows are buffered per sport and day until they fill a row group or have waited flush_seconds,
+    so the archive holds a few large files per day rather than one small file per poll.
+    """
+
+    def __init__(self, root=ODDS_ARCHIVE_DIR, row_group_size=ODDS_ARCHIVE_ROW_GROUP_SIZE, flush_seconds=ODDS_ARCHIVE_FLUSH_SECONDS):
+        self.root = root
+        self.row_group_size = row_group_size
+        self.flush_seconds = flush_seconds
+        self._pending = {}  # (sport, day) -> (due_at, frames, row count)
+        self._writing = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self.written = 0
+
+    def submit(self, sport, frame):
+        key = (sport, frame["snapshot_at"].iloc[0].date().isoformat())
+
+        with self._cond:
+            due_at, frames, count = self._pending.get(key, (time.monotonic() + self.flush_seconds, [], 0))
+            frames.append(frame)
+            count += len(frame)
+
+            # A full row group goes out right away
+            self._pending[key] = (0 if count >= self.row_group_size else due_at, frames, count)
+
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="parquet-archive-writer", daemon=True)
+                self._thread.start()
+
+            self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """
+        Write everything buffered now and wait for it. Returns False if it didn't finish within timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._cond:
+            self._pending = {key: (0, frames, count) for key, (_, frames, count) in self._pending.items()}
+            self._cond.notify_all()
+
+            while self._pending or self._writing:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+
+                key, (due_at, frames, _) = min(self._pending.items(), key=lambda item: item[1][0])
+                delay = due_at - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+
+                del self._pending[key]
+                self._writing += 1
+
+            try:
+                sport, day = key
+                write_partition(self.root, sport, day, pd.concat(frames, ignore_index=True), self.row_group_size)
+                self.written += 1
+            except Exception as e:
+                print(f"Error archiving {key[0]} odds: {e}")
+            finally:
+                with self._cond:
+                    self._writing -= 1
+                    self._cond.notify_all()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_archive_writer():
+    """
+    Return the process-wide background archive writer.
+    """
+    global _writer
+
+    with _writer_lock:
+        if _writer is None:
+            _writer = ParquetArchiveWriter()
+            atexit.register(_writer.flush, 30)  # Don't lose the buffered rows when the process stops
+
+    return _writer
+
+
+def archive_paths(sport, start, end=None, root=ODDS_ARCHIVE_DIR):
+    """
+    The archive files of a sport from start to end (dates or datetimes, both days included), oldest first.
+    Only the directories of the days in range are listed.
+    """
+    if not root:
+        return []
+
+    start_day, end_day = _day(start).isoformat(), _day(end or start).isoformat()
+    base = os.path.join(root, f"sport={sport}")
+    if not os.path.isdir(base):
+        return []
+
+    paths = []
+    for partition in sorted(os.listdir(base)):
+        if partition.startswith("date=") and start_day <= partition[len("date="):] <= end_day:
+            directory = os.path.join(base, partition)
+            paths.extend(os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                         if name.endswith(".parquet") and not name.startswith("."))
+
+    return paths
+
+
+def iter_archive(sport, start, end=None, columns=None, batch_size=ODDS_ARCHIVE_ROW_GROUP_SIZE, root=ODDS_ARCHIVE_DIR):
+    """
+    Stream the archived rows of a sport from start to end as DataFrames of at most batch_size rows,
+    reading only the given columns, so a long range is analysed without holding it all in memory.
+    Dates cover whole days, datetimes (UTC when naive) also bound snapshot_at.
+    """
+    low = _bound(start)
+    high = _bound(end) if end is not None else None
+    read_columns = columns
+    if columns is not None and (low is not None or high is not None) and "snapshot_at" not in columns:
+        read_columns = list(columns) + ["snapshot_at"]
+
+    for path in archive_paths(sport, start, end, root):
+        if pyarrow is not None:
+            frames = (batch.to_pandas() for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size, columns=read_columns))
+        else:
+            frame = pd.read_parquet(path, columns=read_columns)
+            frames = (frame.iloc[offset:offset + batch_size] for offset in range(0, len(frame), batch_size))
+
+        for frame in frames:
+            if low is not None:
+                frame = frame[frame["snapshot_at"] >= low]
+            if high is not None:
+                frame = frame[frame["snapshot_at"] <= high]
+            if read_columns is not columns:
+                frame = frame[list(columns)]
+            if len(frame):
+                yield frame.reset_index(drop=True)
+
+
+def read_archive(sport, start, end=None, columns=None, root=ODDS_ARCHIVE_DIR):
+    """
+    The archived rows of a sport from start to end as one DataFrame (see iter_archive), only the given columns.
+    """
+    frames = list(iter_archive(sport, start, end, columns, root=root))
+    if not frames:
+        return pd.DataFrame(columns=columns or [])
+    return pd.concat(frames, ignore_index=True)
+
+
+def _day(value):
+    if isinstance(value, datetime):
+        return _bound(value).date()
+    return value
+
+
+def _bound(value):
+    # Datetimes bound snapshot_at, plain dates only pick partitions
+    if not isinstance(value, datetime):
+        return None
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
@@ -0,0 +1,198 @@
+import json
+import os
+import re
+import threading
+import unicodedata
+from difflib import SequenceMatcher
+from functools import lru_cache
+import numpy as np
+from oddsApi.settings import PLAYER_ALIASES_FILE, PLAYER_FUZZY_CUTOFF
+
+NAME_SUFFIXES = {"jr", "sr", "ii", "iii", "iv", "v"}
+_PUNCTUATION = re.compile(r"[.'`’]")
+_SEPARATORS = re.compile(r"[^a-z0-9]+")
+
+
+@lru_cache(maxsize=65536)
+def normalize_player_name(name):
+    """
+    Comparable form of a player name: accents, case, punctuation and suffixes dropped, initials joined.
+    "P.J. Washington Jr." and "PJ Washington" both give "pj washington".
+    """
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii").lower()
+    tokens = _SEPARATORS.split(_PUNCTUATION.sub("", name))
+    tokens = [token for token in tokens if token]
+
+    # Drop generational suffixes, but never the whole name
+    while len(tokens) > 1 and tokens[-1] in NAME_SUFFIXES:
+        tokens.pop()
+
+    # Runs of single letters are initials spelled with spaces ("p j tucker"): join them back up
+    joined = []
+    previous_initial = False
+    for token in tokens:
+        initial = len(token) == 1
+        if initial and previous_initial:
+            joined[-1] += token
+        else:
+            joined.append(token)
+        previous_initial = initial
+
+    return " ".join(joined)
+
+
+def load_aliases(path=PLAYER_ALIASES_FILE):
+    """
+    The alias table ({alias: canonical name} in a JSON file) keyed and valued by normalized names.
+    """
+    if not path or not os.path.exists(path):
+        return {}
+
+    with open(path, encoding="utf-8") as f:
+        aliases = json.load(f)
+
+    return {normalize_player_name(alias): normalize_player_name(canonical) for alias, canonical in aliases.items()}
+
+
+_aliases_lock = threading.Lock()
+PLAYER_ALIASES = load_aliases()
+
+
+def save_alias(alias, canonical, path=PLAYER_ALIASES_FILE):
+    """
+    Add an alias to the persistent table (written atomically) and to the live one.
+    """
+    with _aliases_lock:
+        aliases = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                aliases = json.load(f)
+
+        aliases[alias] = canonical
+
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(aliases, f, indent=2, sort_keys=True, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+        PLAYER_ALIASES[normalize_player_name(alias)] = normalize_player_name(canonical)
+        _resolve_key.cache_clear()
+        player_name_matches.cache_clear()
+
+
+@lru_cache(maxsize=65536)
+def _resolve_key(name):
+    key = normalize_player_name(name)
+    return PLAYER_ALIASES.get(key, key)
+
+
+def player_key(name):
+    """
+    The canonical normalized key of a player name, through the alias table.
+    """
+    return _resolve_key(name)
+
+
+def player_keys(name):
+    """
+    Every normalized key that names the same player as name: its own, its canonical key and the aliases of that key.
+    """
+    key = normalize_player_name(name)
+    canonical = PLAYER_ALIASES.get(key, key)
+    return sorted({key, canonical} | {alias for alias, target in PLAYER_ALIASES.items() if target == canonical})
+
+
+def suggest_alias(name, candidates):
+    """
+    The one candidate name that looks like another spelling of name, or None: same last name, same first
+    initial and first names at least PLAYER_FUZZY_CUTOFF alike. When several candidates qualify the name is
+    ambiguous ("Jalen" could be "Jaylen" or "Jalin"), so nothing is suggested.
+    Only suggests aliases for the player_alias command; the join itself never matches fuzzily, as two
+    players of the same team can have names this close.
+    """
+    key = _resolve_key(name)
+    tokens = key.split(" ")
+    matches = set()
+
+    for candidate in candidates:
+        candidate_key = _resolve_key(candidate)
+        candidate_tokens = candidate_key.split(" ")
+        if candidate_key == key or len(tokens) < 2 or len(candidate_tokens) < 2:
+            continue
+        if candidate_tokens[-1] != tokens[-1] or candidate_tokens[0][0] != tokens[0][0]:
+            continue
+
+        first_names = SequenceMatcher(None, " ".join(tokens[:-1]), " ".join(candidate_tokens[:-1])).ratio()
+        if first_names >= PLAYER_FUZZY_CUTOFF:
+            matches.add(candidate_key)
+
+    return matches.pop() if len(matches) == 1 else None
+
+
+class PlayerIndex:
+    """
+    Canonical player ids of one snapshot. The sportsbook names define the players; every other name
+    (DFS lines) resolves by normalized key, then through the alias table. A name neither matches is
+    a player of its own (see suggest_alias for finding the aliases it may need).
+    """
+
+    def __init__(self):
+        self._ids = {}  # Normalized key -> canonical id
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, name):
+        key = _resolve_key(name)
+        player_id = self._ids.get(key)
+        if player_id is None:
+            player_id = self._ids[key] = len(self._ids)
+        return player_id
+
+    def lookup(self, name):
+        """
+        Canonical id of a name, or None when no player of the index matches it.
+        """
+        return self._ids.get(_resolve_key(name))
+
+    def resolve(self, name):
+        """
+        Canonical id of a name, adding it as a new player when nothing matches.
+        """
+        player_id = self.lookup(name)
+        return self.add(name) if player_id is None else player_id
+
+
+def slate_player_ids(odds):
+    """
+    Canonical id of every name in the players pool shared by a slate's odds and DFS columns, as an
+    array indexed by player code. Names quoted by the sportsbooks are indexed first, the DFS-only
+    names are resolved against them.
+    """
+    names = odds.players.values
+    index = PlayerIndex()
+    player_ids = np.empty(max(len(names), 1), dtype=np.int64)
+
+    sportsbook_codes = np.unique(odds.player).tolist() if len(odds) else []
+    for code in sportsbook_codes:
+        player_ids[code] = index.add(names[code])
+
+    quoted = set(sportsbook_codes)
+    for code in range(len(names)):
+        if code not in quoted:
+            player_ids[code] = index.resolve(names[code])
+
+    return player_ids
+
+
+@lru_cache(maxsize=65536)
+def player_name_matches(player_name_filter, player_name):
+    """
+    The ?player_name= filter: the filter is part of the name, compared as is or normalized (or part of its canonical name).
+    Cached per (filter, name), so each distinct name of a payload is only normalized once.
+    """
+    if player_name_filter.lower() in player_name.lower():
+        return True
+
+    wanted = normalize_player_name(player_name_filter)
+    return wanted in normalize_player_name(player_name) or wanted in _resolve_key(player_name)
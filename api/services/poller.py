@@ -0,0 +1,150 @@
+import heapq
+import importlib
+import os
+import threading
+import time
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+from oddsApi.settings import ODDS_POLL_SPORTS, ODDS_POLL_STAGGER, ODDS_POLL_MIN_GAP, ODDS_POLL_IDLE_INTERVAL, ODDS_POLLER_LOCK_FILE
+from .snapshots import save_snapshot
+
+# fcntl is POSIX only: elsewhere every process that asks to poll does
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# (seconds until the next event starts, poll interval in seconds), checked in order
+POLL_SCHEDULE = [
+    (30 * 60, 30),
+    (2 * 60 * 60, 60),
+    (6 * 60 * 60, 300),
+    (24 * 60 * 60, 900),
+]
+POLL_RETRY_INTERVAL = 60  # seconds, after a failed poll
+
+
+def poll_interval(seconds_to_start):
+    """
+    How long to wait before polling a sport again, given how soon its next event starts.
+    """
+    for horizon, interval in POLL_SCHEDULE:
+        if seconds_to_start <= horizon:
+            return interval
+    return ODDS_POLL_IDLE_INTERVAL
+
+
+class SnapshotPoller:
+    """
+    Keeps a fresh priced dfs-player-props snapshot per sport so views don't pay for the fan-out.
+    Every sport shares one scheduler: polls run one at a time, staggered, so sports never hit the API together.
+    """
+
+    def __init__(self, sports=None):
+        self.sports = sports or ODDS_POLL_SPORTS
+        self._stop = threading.Event()
+        self._thread = None
+
+    def poll(self, sport):
+        """
+        Refresh one sport's snapshot. Returns the number of seconds until it should be polled again.
+        """
+        views = importlib.import_module(f"api.{sport}.views")
+        events_service = importlib.import_module(f"api.{sport}.services.{sport}_events")
+        request = HttpRequest()  # No filters, the snapshot is what an unfiltered request would see
+        request.GET = QueryDict("source=live")  # Always fetch, even when the views answer from the store by default
+
+        # Games that already started are skipped, their pre-game lines are gone
+        events = getattr(events_service, f"get_{sport}_upcoming_events")(request)
+        if not events:
+            return ODDS_POLL_IDLE_INTERVAL
+
+        soonest = min(event["commence_time"] for event in events)
+        interval = poll_interval((soonest - timezone.now()).total_seconds())
+
+        compute = getattr(views, f"compute_{sport}_player_props_value")
+        data = compute(request, [event["id"] for event in events], events)
+
+        # Keep serving this snapshot until well after the next poll is due
+        save_snapshot(sport, data, interval * 2)
+
+        return interval
+
+    def run(self):
+        now = time.monotonic()
+        queue = [(now + i * ODDS_POLL_STAGGER, sport) for i, sport in enumerate(self.sports)]
+        heapq.heapify(queue)
+
+        while queue and not self._stop.is_set():
+            run_at, sport = heapq.heappop(queue)
+
+            if self._stop.wait(max(0, run_at - time.monotonic())):
+                break
+
+            try:
+                interval = self.poll(sport)
+            except Exception as e:
+                print(f"Error polling {sport}: {e}")
+                interval = POLL_RETRY_INTERVAL
+
+            heapq.heappush(queue, (time.monotonic() + interval, sport))
+
+            # Leave a gap before the next poll so back-to-back sports don't burst the API
+            self._stop.wait(ODDS_POLL_MIN_GAP)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name="snapshot-poller", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+_poller = None
+_poller_lock = threading.Lock()
+_lock_file = None
+
+
+def acquire_poller_lock(path=ODDS_POLLER_LOCK_FILE):
+    """
+    Take the host-wide poller lock (an exclusive flock on path), held until the process exits.
+    Returns False when another process (a web worker or poll_odds) already polls on this host.
+    """
+    global _lock_file
+
+    if _lock_file is not None or fcntl is None:
+        return True
+
+    lock_file = open(path, "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+
+    lock_file.truncate(0)
+    lock_file.write(f"{os.getpid()}\n")
+    lock_file.flush()
+    _lock_file = lock_file
+    return True
+
+
+def start_poller(sports=None):
+    """
+    Start the background poller thread, in one process per host: with several web workers, the first one
+    to take the poller lock polls and the others return None.
+    """
+    global _poller
+
+    with _poller_lock:
+        if not acquire_poller_lock():
+            print("Snapshot poller already running in another process, not starting one here")
+            return None
+
+        if _poller is None:
+            _poller = SnapshotPoller(sports)
+        _poller.start()
+
+    return _poller
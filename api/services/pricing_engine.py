@@ -0,0 +1,278 @@
+import numpy as np
+from .odds_columns import OVER, UNDER
+from .prop_index import MatchedProps
+from .devig import MULTIPLICATIVE, fair_probabilities
+
+
+def price_packed(prices, weights, method=MULTIPLICATIVE):
+    """
+    Pricing kernel on packed arrays: prices is (props x bookmakers x sides) decimal odds (0 = missing),
+    weights is (props x bookmakers).
+    Returns (lean_over, lean_under, average_odds): two boolean arrays and the weighted fair odds of
+    the lean in American format (0 when no weighted book quotes both sides).
+    """
+    priced, avg_over, avg_under = weighted_fair_odds(prices, weights, method)
+
+    lean_over = priced & (avg_over < avg_under)
+    lean_under = priced & (avg_over > avg_under)
+    average_odds = np.where(priced, _decimal_to_american(np.where(lean_over, avg_over, avg_under)), 0)
+
+    return lean_over, lean_under, average_odds
+
+
+def weighted_fair_odds(prices, weights, method=MULTIPLICATIVE):
+    """
+    De-vig every book of packed prices and average the fair odds of each side with the book weights.
+    Returns (priced, avg_over, avg_under): whether any weighted book quotes both sides, and the
+    weighted fair decimal odds of each side rounded to two decimals (NaN where not priced).
+    """
+    over_odds = prices[:, :, OVER]
+    under_odds = prices[:, :, UNDER]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # De-vig every book at once (multiplicative is the same operations as calculate_fair_odds)
+        fair_over_prob, fair_under_prob = fair_probabilities(1 / over_odds, 1 / under_odds, method)
+        fair_over = 1 / fair_over_prob
+        fair_under = 1 / fair_under_prob
+
+    # Only books quoting both sides, present in the weights and with a usable de-vig count towards the average
+    counted = (over_odds != 0) & (under_odds != 0) & (weights > 0) & np.isfinite(fair_over) & np.isfinite(fair_under)
+
+    # Accumulate book by book in order of appearance so the float sums match the scalar path bit for bit
+    weighted_over = np.zeros(len(prices))
+    weighted_under = np.zeros(len(prices))
+    total_weight = np.zeros(len(prices))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for slot in range(prices.shape[1]):
+            mask = counted[:, slot]
+            weight = weights[:, slot]
+            weighted_over = np.where(mask, weighted_over + fair_over[:, slot] * weight, weighted_over)
+            weighted_under = np.where(mask, weighted_under + fair_under[:, slot] * weight, weighted_under)
+            total_weight = np.where(mask, total_weight + weight, total_weight)
+
+        priced = total_weight > 0
+        avg_over = _round_2dp(weighted_over / total_weight)
+        avg_under = _round_2dp(weighted_under / total_weight)
+
+    return priced, avg_over, avg_under
+
+
+def pack_entries(entry_counts, entry_odds, entry_books, sides, book_weights):
+    """
+    Lay the entries out as a dense (props x bookmakers x sides) price array. Entries are flat and grouped by prop
+    (entry_counts per prop): decimal price (0 = missing), bookmaker code, side (OVER, UNDER or -1 to skip).
+    book_weights is indexed by bookmaker code.
+
+    Returns (prices, weights, pair_counts, pair_books): the (props x bookmakers x sides) prices,
+    the (props x bookmakers) weights, and the bookmaker codes of every prop in slot order
+    (pair_counts[i] of them for prop i).
+    """
+    prop_count = len(entry_counts)
+    book_count = max(len(book_weights), 1)
+    entry_rows = np.repeat(np.arange(prop_count), entry_counts)
+
+    # One (prop, bookmaker) pair per distinct bookmaker of a prop; slot = its rank by first appearance within the prop
+    pair_keys = entry_rows * book_count + entry_books
+    unique_keys, first_seen, entry_pairs = np.unique(pair_keys, return_index=True, return_inverse=True)
+    entry_pairs = entry_pairs.reshape(-1)
+    pair_order = np.argsort(first_seen, kind="stable")
+    ordered_keys = unique_keys[pair_order]
+    pair_rows = ordered_keys // book_count
+    pair_counts = np.bincount(pair_rows, minlength=prop_count)
+    row_starts = np.concatenate(([0], np.cumsum(pair_counts)[:-1])).astype(np.int64)
+    pair_slots = np.empty(len(unique_keys), dtype=np.int64)
+    pair_slots[pair_order] = np.arange(len(unique_keys)) - row_starts[pair_rows]
+
+    max_books = max(int(pair_counts.max()) if len(pair_counts) else 1, 1)
+    entry_slots = pair_slots[entry_pairs]
+
+    # Last price per (prop, slot, side): keep the last occurrence of every cell
+    valid = sides >= 0
+    cells = (entry_rows * max_books + entry_slots) * 2 + sides
+    reversed_cells = cells[valid][::-1]
+    _, last_seen = np.unique(reversed_cells, return_index=True)
+    prices = np.zeros(prop_count * max_books * 2)
+    prices[reversed_cells[last_seen]] = entry_odds[valid][::-1][last_seen]
+
+    book_weights = np.concatenate((np.asarray(book_weights, dtype=float), [0]))
+    weights = np.zeros(prop_count * max_books)
+    weights[unique_keys // book_count * max_books + pair_slots] = book_weights[unique_keys % book_count]
+
+    return (
+        prices.reshape(prop_count, max_books, 2),
+        weights.reshape(prop_count, max_books),
+        pair_counts,
+        ordered_keys % book_count,
+    )
+
+
+class PricedProps:
+    """
+    Pricing results of a MatchedProps batch, one array (or list) entry per prop.
+        lean: "over", "under" or "n/a"
+        average_odds: odds of the lean in American format (None when the prop couldn't be priced)
+        values: rankable fields by name ("fair_probability"...), float arrays with NaN where missing
+        bookmaker_counts / bookmaker_codes: distinct bookmakers of every prop, codes into the odds bookmaker pool
+        entry_odds: the American odds of every matched entry, aligned with MatchedProps.entries
+        interpolated: whether each prop was priced off an alternate-line ladder rather than quotes at its line
+    """
+
+    def __init__(self, matched, lean, average_odds, values, bookmaker_counts, bookmaker_codes, entry_odds, interpolated=None):
+        self.matched = matched
+        self.lean = lean
+        self.average_odds = average_odds
+        self.values = values
+        self.bookmaker_counts = bookmaker_counts
+        self.bookmaker_codes = bookmaker_codes
+        self.entry_odds = entry_odds
+        self.interpolated = interpolated if interpolated is not None else np.zeros(len(lean), dtype=bool)
+
+    @classmethod
+    def concat(cls, parts):
+        """
+        Stack priced batches of the same slate into one, props in order (see MatchedProps.concat).
+        """
+        return cls(
+            MatchedProps.concat([part.matched for part in parts]),
+            lean=[lean for part in parts for lean in part.lean],
+            average_odds=[odds for part in parts for odds in part.average_odds],
+            values={field: np.concatenate([part.values[field] for part in parts]) for field in parts[0].values},
+            bookmaker_counts=np.concatenate([part.bookmaker_counts for part in parts]),
+            bookmaker_codes=np.concatenate([part.bookmaker_codes for part in parts]),
+            entry_odds=[odds for part in parts for odds in part.entry_odds],
+            interpolated=np.concatenate([part.interpolated for part in parts]),
+        )
+
+    def value(self, field, i):
+        value = self.values[field][i].item()
+        return None if value != value else value
+
+    def quoted_by_any(self, titles):
+        """
+        Boolean mask of the props quoted by at least one of the given bookmaker titles.
+        """
+        codes = [self.matched.odds.bookmakers.get(title) for title in titles]
+        hits = np.isin(self.bookmaker_codes, [code for code in codes if code is not None])
+        pair_props = np.repeat(np.arange(len(self.bookmaker_counts)), self.bookmaker_counts)
+        return np.bincount(pair_props[hits], minlength=len(self.bookmaker_counts)) > 0
+
+
+def price_matched(matched, bookmaker_weights, method=MULTIPLICATIVE):
+    """
+    De-vig (with the given devig method), weight and pick the better lean of every matched prop in one batch.
+    The entries are gathered straight from the odds columns, with no per-entry dicts.
+    Returns PricedProps with "fair_probability" as the rankable value.
+    """
+    book_weights = [bookmaker_weights.get(title, 0) for title in matched.odds.bookmakers.values]
+    lean, average_odds, probability, pair_counts, pair_books, entry_odds = _price_columns(matched, book_weights, method)
+
+    return PricedProps(matched, lean, average_odds, {"fair_probability": probability}, pair_counts, pair_books, entry_odds)
+
+
+def average_matched(matched, method=None):
+    """
+    Plain (vigged) average of each side's decimal odds over every matched entry, with the lean on the
+    shorter average, as the NCAA selection filters price props.
+    With a de-vig method, every book quoting both sides is de-vigged first and the fair odds are
+    averaged with equal weights instead.
+    Returns PricedProps with "implied_probability" as the rankable value; lean is "" when neither side is quoted.
+    """
+    if method:
+        book_weights = [1] * len(matched.odds.bookmakers)
+        lean, average_odds, probability, pair_counts, pair_books, entry_odds = _price_columns(matched, book_weights, method)
+        return PricedProps(matched, lean, average_odds, {"implied_probability": probability}, pair_counts, pair_books, entry_odds)
+
+    odds = matched.odds
+    rows = matched.entries
+    entry_odds = odds.price[rows]
+    sides = odds.side_kinds()[rows]
+    entry_props = matched.entry_props()
+    prop_count = len(matched)
+
+    # bincount adds the entries in order, the same sums as a running total per prop
+    over_total = np.bincount(entry_props, weights=np.where(sides == OVER, entry_odds, 0), minlength=prop_count)
+    under_total = np.bincount(entry_props, weights=np.where(sides == UNDER, entry_odds, 0), minlength=prop_count)
+    over_count = np.bincount(entry_props[sides == OVER], minlength=prop_count)
+    under_count = np.bincount(entry_props[sides == UNDER], minlength=prop_count)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg_over = np.where(over_count > 0, _round_2dp(over_total / over_count), 0)
+        avg_under = np.where(under_count > 0, _round_2dp(under_total / under_count), 0)
+
+    both = (avg_over != 0) & (avg_under != 0)
+    lean = np.where(both, np.where(avg_over < avg_under, "over", np.where(avg_over > avg_under, "under", "n/a")),
+                    np.where(avg_over != 0, "over", np.where(avg_under != 0, "under", "")))
+    average_odds = np.where(lean == "over", _decimal_to_american(avg_over), _decimal_to_american(avg_under))
+    priced = (lean == "over") | (lean == "under")
+
+    return PricedProps(
+        matched,
+        lean=lean.tolist(),
+        average_odds=[int(odds) if ok else None for odds, ok in zip(average_odds.tolist(), priced.tolist())],
+        values={"implied_probability": np.where(priced, _implied_probabilities(average_odds), np.nan)},
+        bookmaker_counts=None,
+        bookmaker_codes=None,
+        entry_odds=_decimal_to_american(np.nan_to_num(entry_odds, nan=0.0)).tolist(),
+    )
+
+
+def _price_columns(matched, book_weights, method):
+    """
+    Pack the matched entries from the odds columns and run the pricing kernel.
+    book_weights is indexed by bookmaker code.
+    """
+    odds = matched.odds
+    rows = matched.entries
+
+    entry_odds = np.nan_to_num(odds.price[rows], nan=0.0)  # Missing price (None)
+    sides = odds.side_kinds()[rows].astype(np.int64)
+
+    prices, weights, pair_counts, pair_books = pack_entries(matched.entry_counts, entry_odds, odds.bookmaker[rows], sides, book_weights)
+    lean_over, lean_under, average_odds = price_packed(prices, weights, method)
+
+    return (
+        np.where(lean_over, "over", np.where(lean_under, "under", "n/a")).tolist(),
+        [american or None for american in average_odds.tolist()],
+        np.where(average_odds != 0, _implied_probabilities(average_odds), np.nan),
+        pair_counts,
+        pair_books,
+        _decimal_to_american(entry_odds).tolist(),
+    )
+
+
+def _round_2dp(values):
+    """
+    round(value, 2) for every value of an array, with the exact results of Python's round().
+    np.round scales by 100 first, which can land on the wrong side of a half; those few values
+    are rounded with round() instead.
+    """
+    rounded = np.round(values, 2)
+    with np.errstate(invalid="ignore"):
+        near_half = np.abs(values * 100 % 1 - 0.5) < 1e-6
+
+    for i in np.flatnonzero(near_half).tolist():
+        rounded[i] = round(float(values[i]), 2)
+
+    return rounded
+
+
+def _decimal_to_american(decimal_odds):
+    """
+    Vectorized decimal_to_american. np.rint rounds half to even like round(), so the results match exactly.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        american = np.where(decimal_odds >= 2.0, (decimal_odds - 1) * 100, -(100 / (decimal_odds - 1)))
+    american = np.rint(american)
+    return np.where(np.isfinite(american), american, 0).astype(np.int64)
+
+
+def _implied_probabilities(american_odds):
+    """
+    Vectorized implied_probability, same operations and rounding.
+    """
+    american_odds = american_odds.astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        probability = np.where(american_odds > 0, 100 / (american_odds + 100), -american_odds / (-american_odds + 100))
+    return _round_2dp(probability * 100)
+
@@ -0,0 +1,203 @@
+import numpy as np
+from .odds_columns import OVER, OddsColumns
+from .player_index import slate_player_ids
+
+POINT_KEY_SCALE = 100  # Lines are quoted in halves/quarters, two decimals is plenty
+
+
+def point_key(point):
+    """
+    Normalize a prop line to a fixed-precision integer so lines from different feeds
+    compare equal even when their floats don't (25.5 vs 25.499999...).
+    """
+    if point is None:
+        return None
+    return int(round(float(point) * POINT_KEY_SCALE))
+
+
+class MatchedProps:
+    """
+    DFS lines matched to the sportsbook rows quoting the same player, market and line, both held as OddsColumns.
+    Prop i is DFS row dfs_rows[i]; its sportsbook rows are entries[offsets[i]:offsets[i + 1]],
+    in the order the parser saw them. unmatched_rows are the DFS 'over' lines no sportsbook quotes at that line.
+    player_ids maps the shared players pool to canonical player ids (see player_index), by player code.
+    """
+
+    def __init__(self, odds, dfs, dfs_rows, entry_counts, entries, unmatched_rows=None, player_ids=None):
+        self.odds = odds
+        self.dfs = dfs
+        self.dfs_rows = dfs_rows
+        self.entry_counts = entry_counts
+        self.entries = entries
+        self.offsets = np.concatenate(([0], np.cumsum(entry_counts))).astype(np.int64)
+        self.unmatched_rows = unmatched_rows if unmatched_rows is not None else np.empty(0, dtype=np.int64)
+        self.player_ids = player_ids if player_ids is not None else np.arange(max(len(dfs.players), 1))
+
+    @classmethod
+    def concat(cls, parts):
+        """
+        Stack matched props of the same slate (same odds and DFS columns) into one batch, props in order.
+        """
+        return cls(
+            parts[0].odds,
+            parts[0].dfs,
+            np.concatenate([part.dfs_rows for part in parts]),
+            np.concatenate([part.entry_counts for part in parts]),
+            np.concatenate([part.entries for part in parts]),
+            np.unique(np.concatenate([part.unmatched_rows for part in parts])),
+            parts[0].player_ids,
+        )
+
+    def __len__(self):
+        return len(self.dfs_rows)
+
+    def select(self, props):
+        """
+        The matched props at the given positions (or boolean mask), in that order.
+        """
+        props = np.flatnonzero(props) if np.asarray(props).dtype == bool else np.asarray(props, dtype=np.int64)
+        counts = self.entry_counts[props]
+        entries = self.entries[_ranges(self.offsets[props], counts)]
+        return MatchedProps(self.odds, self.dfs, self.dfs_rows[props], counts, entries, self.unmatched_rows, self.player_ids)
+
+    def for_site(self, site):
+        """
+        The props whose DFS line comes from the given site ("underdog", "prizepicks"...).
+        """
+        codes = [code for code, title in enumerate(self.dfs.bookmakers.values) if title.lower() == site]
+        site_props = self.select(np.isin(self.dfs.bookmaker[self.dfs_rows], codes))
+        site_props.unmatched_rows = self.unmatched_rows[np.isin(self.dfs.bookmaker[self.unmatched_rows], codes)]
+        return site_props
+
+    def entry_props(self):
+        """
+        Position of the prop every entry belongs to.
+        """
+        return np.repeat(np.arange(len(self)), self.entry_counts)
+
+    def prop(self, i):
+        """
+        (player_name, market, prop_line) of prop i.
+        """
+        row = self.dfs_rows[i]
+        return self.dfs.players[self.dfs.player[row]], self.dfs.markets[self.dfs.market[row]], self.dfs.point[row].item()
+
+    def entries_of(self, i):
+        """
+        Iterate the sportsbook entries of prop i as (position in entries, outcome name, bookmaker title, decimal price).
+        """
+        odds = self.odds
+        for position in range(self.offsets[i], self.offsets[i + 1]):
+            row = self.entries[position]
+            price = odds.price[row].item()
+            yield position, odds.sides[odds.side[row]], odds.bookmakers[odds.bookmaker[row]], None if price != price else price
+
+    def entry_point(self, position):
+        """
+        The line the sportsbook quoted for an entry (position in entries).
+        """
+        return self.odds.point[self.entries[position]].item()
+
+    def player_props(self, side_key="lean"):
+        """
+        The props as the list of dicts the views used to build before the columnar snapshot
+        ({"player_name", "market", "prop_line", "bookmaker_odds": [{side_key, "market", "point", "odds", "bookmaker"}]}).
+        """
+        player_props = []
+        points = self.odds.point[self.entries].tolist()
+
+        for i in range(len(self)):
+            player_name, market, prop_line = self.prop(i)
+            player_props.append({
+                "player_name": player_name,
+                "market": market,
+                "prop_line": prop_line,
+                "bookmaker_odds": [
+                    {side_key: side, "market": market, "point": points[position], "odds": price, "bookmaker": bookmaker}
+                    for position, side, bookmaker, price in self.entries_of(i)
+                ],
+            })
+
+        return player_props
+
+
+def match_slate(event_odds, sort_players=False):
+    """
+    Stack the per-event (event_id, odds, dfs_lines) columns of a slate and match all its DFS lines at once.
+    Events without sportsbook odds (failed fetch, nothing quoted yet) are left out.
+    """
+    event_odds = [(event_id, odds, dfs_lines) for event_id, odds, dfs_lines in event_odds if odds is not None and len(odds)]
+
+    odds = OddsColumns.concat([odds for _, odds, _ in event_odds], event_ids=[event_id for event_id, _, _ in event_odds])
+    dfs_lines = OddsColumns.concat([dfs_lines for _, _, dfs_lines in event_odds], like=odds)
+
+    return match_dfs_lines(odds, dfs_lines, sort_players)
+
+
+def match_dfs_lines(odds, dfs, sort_players=False, player_ids=None):
+    """
+    Match every DFS 'over' line of a slate to the sportsbook rows of the same event, player, market and line.
+    odds and dfs must share their string pools (OddsColumns.concat(..., like=odds)). Players are compared
+    by canonical id (player_ids, built from the pool with slate_player_ids when not given), so spellings
+    that only differ by accents, suffixes, initials or a known alias still match.
+
+    Props come out in the order the per-player dicts used to give: events in slate order, players by first
+    appearance in their event's DFS lines (by name with sort_players), then lines in order.
+    """
+    odds.freeze()
+    dfs.freeze()
+
+    if player_ids is None:
+        player_ids = slate_player_ids(odds)
+
+    dfs_rows = np.flatnonzero((dfs.side_kinds() == OVER) & ~np.isnan(dfs.point))
+
+    if sort_players:
+        names = dfs.players.values
+        name_ranks = np.empty(max(len(names), 1), dtype=np.int64)
+        name_ranks[sorted(range(len(names)), key=names.__getitem__)] = np.arange(len(names))
+        player_order = dfs.event.astype(np.int64) * max(len(names), 1) + name_ranks[dfs.player]
+    else:
+        player_keys = dfs.event.astype(np.int64) * max(len(dfs.players), 1) + dfs.player
+        _, first_seen, inverse = np.unique(player_keys, return_index=True, return_inverse=True)
+        player_order = first_seen[inverse.reshape(-1)]
+
+    dfs_rows = dfs_rows[np.lexsort((dfs_rows, player_order[dfs_rows]))]
+
+    odds_rows = np.flatnonzero(~np.isnan(odds.point))
+    # Lines compared at fixed precision, as point_key does
+    odds_points = np.rint(odds.point[odds_rows] * POINT_KEY_SCALE).astype(np.int64)
+    dfs_points = np.rint(dfs.point[dfs_rows] * POINT_KEY_SCALE).astype(np.int64)
+    point_values, point_codes = np.unique(np.concatenate((odds_points, dfs_points)), return_inverse=True)
+    point_codes = point_codes.reshape(-1)
+
+    odds_keys = _line_keys(odds, odds_rows, point_codes[:len(odds_rows)], len(point_values), player_ids)
+    dfs_keys = _line_keys(dfs, dfs_rows, point_codes[len(odds_rows):], len(point_values), player_ids)
+
+    # Stable sort: the entries of a line keep the order the parser saw them in
+    order = np.argsort(odds_keys, kind="stable")
+    sorted_keys = odds_keys[order]
+    starts = np.searchsorted(sorted_keys, dfs_keys, side="left")
+    counts = np.searchsorted(sorted_keys, dfs_keys, side="right") - starts
+
+    matched = counts > 0
+    entries = odds_rows[order[_ranges(starts[matched], counts[matched])]]
+
+    return MatchedProps(odds, dfs, dfs_rows[matched], counts[matched], entries, dfs_rows[~matched], player_ids)
+
+
+def _line_keys(columns, rows, point_codes, point_count, player_ids):
+    keys = columns.event[rows].astype(np.int64) * max(len(columns.players), 1) + player_ids[columns.player[rows]]
+    keys = keys * max(len(columns.markets), 1) + columns.market[rows]
+    return keys * max(point_count, 1) + point_codes
+
+
+def _ranges(starts, counts):
+    """
+    Concatenation of range(start, start + count) for every pair, as one index array.
+    """
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    return np.repeat(starts - offsets, counts) + np.arange(total)
@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import OrderedDict
+from oddsApi.settings import ODDS_QUOTA_LOW_THRESHOLD, ODDS_QUOTA_CRITICAL_THRESHOLD, ODDS_QUOTA_TTL_MULTIPLIER, ODDS_QUOTA_COST_ENTRIES
+
+QUOTA_NORMAL = "normal"
+QUOTA_LOW = "low"
+QUOTA_CRITICAL = "critical"
+
+
+class QuotaTracker:
+    """
+    Tracks the odds API usage headers (x-requests-remaining / x-requests-used / x-requests-last)
+    and the cost of every call per (sport, endpoint, event). Only the ODDS_QUOTA_COST_ENTRIES most recently
+    called events are kept apart, the older ones roll up into one entry per (sport, endpoint) with event_id None.
+
+    When the remaining budget drops below ODDS_QUOTA_LOW_THRESHOLD the fetch layer widens cache TTLs
+    and drops low-value markets. Below ODDS_QUOTA_CRITICAL_THRESHOLD it also serves stale cached data
+    rather than going upstream.
+    """
+
+    def __init__(self, low_threshold=ODDS_QUOTA_LOW_THRESHOLD, critical_threshold=ODDS_QUOTA_CRITICAL_THRESHOLD,
+                 max_cost_entries=ODDS_QUOTA_COST_ENTRIES):
+        self.low_threshold = low_threshold
+        self.critical_threshold = critical_threshold
+        self.max_cost_entries = max_cost_entries
+        self._lock = threading.Lock()
+        self.remaining = None
+        self.used = None
+        self.updated_at = None
+        self._costs = OrderedDict()  # (sport, endpoint, event_id) -> {"requests": n, "cost": c}, least recently called first
+        self._rolled_up = {}  # (sport, endpoint, None) -> {"requests": n, "cost": c} of the evicted events
+
+    def record(self, headers, quota_key=None, params=None):
+        """
+        Record the usage headers of an upstream response and the cost of the call.
+        """
+        remaining = _header_number(headers, "x-requests-remaining")
+        used = _header_number(headers, "x-requests-used")
+        cost = _header_number(headers, "x-requests-last")
+
+        # Older responses don't carry x-requests-last, fall back to the documented markets x regions cost
+        if cost is None:
+            cost = estimate_cost(params)
+
+        with self._lock:
+            if remaining is not None:
+                self.remaining = remaining
+            if used is not None:
+                self.used = used
+            self.updated_at = time.time()
+
+            if quota_key is not None:
+                key = tuple(quota_key)
+                entry = self._costs.setdefault(key, {"requests": 0, "cost": 0})
+                entry["requests"] += 1
+                entry["cost"] += cost
+                self._costs.move_to_end(key)
+
+                while len(self._costs) > self.max_cost_entries:
+                    (sport, endpoint, _), evicted = self._costs.popitem(last=False)
+                    total = self._rolled_up.setdefault((sport, endpoint, None), {"requests": 0, "cost": 0})
+                    total["requests"] += evicted["requests"]
+                    total["cost"] += evicted["cost"]
+
+    def level(self):
+        remaining = self.remaining
+
+        if remaining is None:
+            return QUOTA_NORMAL  # Nothing fetched yet, assume we're fine
+        if remaining < self.critical_threshold:
+            return QUOTA_CRITICAL
+        if remaining < self.low_threshold:
+            return QUOTA_LOW
+        return QUOTA_NORMAL
+
+    def adjust_ttl(self, ttl):
+        """
+        Widen cache TTLs while the budget is running low.
+        """
+        if ttl and self.level() != QUOTA_NORMAL:
+            return ttl * ODDS_QUOTA_TTL_MULTIPLIER
+        return ttl
+
+    def serve_stale(self):
+        return self.level() == QUOTA_CRITICAL
+
+    def select_markets(self, markets, low_value_markets):
+        """
+        Drop the low-value markets from a comma-separated markets string while the budget is running low.
+        Never drops every market.
+        """
+        if self.level() == QUOTA_NORMAL or not low_value_markets:
+            return markets
+
+        kept = [market for market in markets.split(",") if market not in low_value_markets]
+        return ",".join(kept) if kept else markets
+
+    def summary(self):
+        with self._lock:
+            totals = {key: dict(entry) for key, entry in self._rolled_up.items()}
+            for key, entry in self._costs.items():
+                total = totals.setdefault(key, {"requests": 0, "cost": 0})  # Calls without an event share the rolled-up key
+                total["requests"] += entry["requests"]
+                total["cost"] += entry["cost"]
+
+            costs = [{"sport": key[0], "endpoint": key[1], "event_id": key[2], **entry} for key, entry in totals.items()]
+
+        return {
+            "remaining": self.remaining,
+            "used": self.used,
+            "level": self.level(),
+            "low_threshold": self.low_threshold,
+            "critical_threshold": self.critical_threshold,
+            "updated_at": self.updated_at,
+            "costs": sorted(costs, key=lambda x: x["cost"], reverse=True),
+        }
+
+
+def estimate_cost(params):
+    """
+    Cost of an odds call as documented by the odds API: one credit per market per region.
+    Calls without markets (e.g. the events list) are free.
+    """
+    params = params or {}
+    markets = [m for m in str(params.get("markets") or "").split(",") if m]
+    regions = [r for r in str(params.get("regions") or "").split(",") if r]
+
+    if not markets:
+        return 0
+    return len(markets) * max(len(regions), 1)
+
+
+def _header_number(headers, name):
+    value = headers.get(name)
+    try:
+        return int(float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+_tracker = QuotaTracker()
+
+
+def get_quota_tracker():
+    return _tracker
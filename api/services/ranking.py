@@ -0,0 +1,59 @@
+import numpy as np
+
+MAX_TOP = 500  # Upper bound for ?top=, responses past this are never useful and only cost encoding time
+
+
+def top_k_rows(priced, k, rank_by, tie_break=None, eligible=None):
+    """
+    Return the positions of the k best eligible props of a PricedProps batch by priced.values[rank_by], best first.
+    Ties go to the higher tie_break value when given, then to the earlier prop, which is the order a stable
+    descending sort would give. Props without a value for rank_by rank last.
+    Only the props that make the cut need to be built as dicts afterwards.
+    """
+    if k <= 0:
+        return []
+
+    values = np.nan_to_num(priced.values[rank_by], nan=-np.inf)
+    ties = np.nan_to_num(priced.values[tie_break], nan=-np.inf) if tie_break else np.zeros(len(values))
+    positions = np.arange(len(values)) if eligible is None else np.flatnonzero(eligible)
+
+    return best_positions(values, ties, positions, k).tolist()
+
+
+def best_positions(values, ties, positions, k):
+    """
+    The k best of positions by values, then ties, then position, best first, in O(n + c log c):
+    argpartition finds the k-th best value, and only the c candidates at or above it
+    (every prop tied with the cutoff included) are sorted.
+    """
+    if len(positions) > k:
+        candidate_values = values[positions]
+        cutoff = candidate_values[np.argpartition(-candidate_values, k - 1)[:k]].min()
+        positions = positions[candidate_values >= cutoff]
+
+    order = np.lexsort((positions, -ties[positions], -values[positions]))
+    return positions[order[:k]]
+
+
+def ranking_options(request, default_top, default_rank_by, rank_by_options):
+    """
+    Read the ?top=, ?rank_by= and ?tie_break= overrides of a request, falling back to the sport's defaults.
+    Raises ValueError on an invalid value.
+    """
+    top = request.GET.get("top", default_top)
+    rank_by = request.GET.get("rank_by", default_rank_by)
+    tie_break = request.GET.get("tie_break", None)
+
+    try:
+        top = int(top)
+    except (TypeError, ValueError):
+        raise ValueError(f"top must be an integer, got {top!r}")
+
+    if not 1 <= top <= MAX_TOP:
+        raise ValueError(f"top must be between 1 and {MAX_TOP}")
+
+    for name, value in [("rank_by", rank_by), ("tie_break", tie_break)]:
+        if value is not None and value not in rank_by_options:
+            raise ValueError(f"{name} must be one of {', '.join(rank_by_options)}")
+
+    return top, rank_by, tie_break
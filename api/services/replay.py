@@ -0,0 +1,130 @@
+import hashlib
+import io
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse, parse_qsl
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+from .cache import make_cache_key
+
+RECORDED_HEADERS = ["content-type", "x-requests-remaining", "x-requests-used", "x-requests-last"]
+
+
+def recording_key(url, params=None):
+    """
+    Key a recording by URL path and normalized params (apiKey dropped).
+    The host is left out so recordings replay behind any base URL, e.g. a local stand-in server.
+    """
+    parsed = urlparse(url)
+    query = dict(parse_qsl(parsed.query))
+    query.update(params or {})
+    return make_cache_key(parsed.path, query)
+
+
+def recording_filename(key):
+    return hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json"
+
+
+def record_response(directory, url, params, response):
+    """
+    Save an upstream response to disk so it can be replayed offline later.
+    """
+    key = recording_key(url, params)
+    recording = {
+        "key": key,
+        "url": url,
+        "params": {k: v for k, v in (params or {}).items() if k != "apiKey"},
+        "status": response.status_code,
+        "headers": {name: response.headers[name] for name in RECORDED_HEADERS if name in response.headers},
+        "body": response.text,
+        "recorded_at": time.time(),
+    }
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, recording_filename(key))
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(recording, f)
+    os.replace(tmp_path, path)  # Never leave a half-written recording behind
+
+
+class ReplayStore:
+    """
+    Recorded responses of a directory, looked up by recording_key.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def lookup(self, url, params=None):
+        path = os.path.join(self.directory, recording_filename(recording_key(url, params)))
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+
+class FaultInjector:
+    """
+    Adds latency (fixed + random jitter, in ms) and random errors to replayed responses.
+    """
+
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0.0, error_status=503):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+    def delay(self):
+        return (self.latency_ms + random.uniform(0, self.jitter_ms)) / 1000
+
+    def should_fail(self):
+        return self.error_rate > 0 and random.random() < self.error_rate
+
+
+class ReplayAdapter(HTTPAdapter):
+    """
+    requests transport adapter that answers from recordings instead of the network.
+    Unknown requests get a 404, like an unknown event ID would upstream.
+    """
+
+    def __init__(self, directory, faults=None, **kwargs):
+        super().__init__(**kwargs)
+        self.store = ReplayStore(directory)
+        self.faults = faults or FaultInjector()
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        delay = self.faults.delay()
+        read_timeout = timeout[1] if isinstance(timeout, tuple) else timeout
+
+        if read_timeout is not None and delay > read_timeout:
+            time.sleep(read_timeout)
+            raise requests.exceptions.ReadTimeout(f"Replay latency {delay:.2f}s exceeded the read timeout", request=request)
+        time.sleep(delay)
+
+        if self.faults.should_fail():
+            return self._build(request, self.faults.error_status, {"content-type": "application/json"},
+                               json.dumps({"message": "Injected replay error"}))
+
+        recording = self.store.lookup(request.url)
+        if recording is None:
+            return self._build(request, 404, {"content-type": "application/json"},
+                               json.dumps({"message": "No recording for this request"}))
+
+        return self._build(request, recording["status"], recording["headers"], recording["body"])
+
+    def _build(self, request, status, headers, body):
+        raw = HTTPResponse(
+            body=io.BytesIO(body.encode("utf-8")),
+            headers=headers,
+            status=status,
+            preload_content=False,
+            decode_content=False,
+        )
+        return self.build_response(request, raw)
@@ -0,0 +1,195 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+import requests
+from django.utils import timezone
+from oddsApi.settings import (
+    ODDS_RETRY_MAX_ATTEMPTS, ODDS_RETRY_BASE_DELAY, ODDS_RETRY_MAX_DELAY, ODDS_RETRY_MAX_ELAPSED,
+    ODDS_BREAKER_FAILURE_THRESHOLD, ODDS_BREAKER_RESET_TIMEOUT,
+)
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """
+    Raised instead of calling a host whose circuit is open.
+    A RequestException, so callers handle it like any other upstream failure.
+    """
+
+
+def is_transient(error):
+    """
+    Whether a failed call is worth retrying: connection errors, timeouts, 429 and 5xx.
+    Other 4xx (bad key, unknown event...) fail the same way every time.
+    """
+    if isinstance(error, requests.exceptions.HTTPError):
+        return error.response is not None and error.response.status_code in RETRYABLE_STATUSES
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+def retry_after_seconds(response):
+    """
+    Parse a Retry-After header (delay in seconds or HTTP date). Returns None when absent or invalid.
+    """
+    if response is None:
+        return None
+
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - timezone.now()).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    Bounded retries with full-jitter exponential backoff.
+    A Retry-After header from upstream replaces the computed backoff. If the wait would take
+    the call past max_elapsed seconds, it fails right away instead of holding the worker.
+    """
+
+    def __init__(self, max_attempts=ODDS_RETRY_MAX_ATTEMPTS, base_delay=ODDS_RETRY_BASE_DELAY,
+                 max_delay=ODDS_RETRY_MAX_DELAY, max_elapsed=ODDS_RETRY_MAX_ELAPSED):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_elapsed = max_elapsed
+
+    def backoff(self, attempt, retry_after=None):
+        """
+        Seconds to wait before the attempt after `attempt` (1-based).
+        """
+        if retry_after is not None:
+            # Small jitter on top so callers told the same Retry-After don't come back together
+            return retry_after + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker.
+    After failure_threshold consecutive transient failures the circuit opens and calls fail fast.
+    Once reset_timeout seconds have passed a single probe call is let through (half open):
+    success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, host, failure_threshold=ODDS_BREAKER_FAILURE_THRESHOLD, reset_timeout=ODDS_BREAKER_RESET_TIMEOUT):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == BREAKER_CLOSED:
+                return True
+
+            if self.state == BREAKER_OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = BREAKER_HALF_OPEN
+
+            if self.state == BREAKER_HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != BREAKER_CLOSED:
+                print(f"Circuit for {self.host} closed")
+            self.state = BREAKER_CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+
+            if self.state == BREAKER_HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != BREAKER_OPEN:
+                    print(f"Circuit for {self.host} opened after {self.failures} failures")
+                self.state = BREAKER_OPEN
+                self.opened_at = time.monotonic()
+
+    def status(self):
+        with self._lock:
+            return {"state": self.state, "failures": self.failures}
+
+
+def call_with_retries(send, breaker, policy=None):
+    """
+    Call send() until it succeeds, retrying transient failures per the policy and
+    reporting every outcome to the host's circuit breaker.
+    Raises CircuitOpenError when the breaker refuses the call, or the last error once retries run out.
+    """
+    policy = policy or RetryPolicy()
+    started = time.monotonic()
+    attempt = 0
+
+    while True:
+        attempt += 1
+
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit for {breaker.host} is open")
+
+        try:
+            result = send()
+        except requests.exceptions.RequestException as e:
+            if not is_transient(e):
+                breaker.record_success()  # The host answered, the request itself is wrong
+                raise
+
+            breaker.record_failure()
+            if breaker.state == BREAKER_OPEN:
+                raise  # No point waiting to retry a host we just gave up on
+
+            delay = policy.backoff(attempt, retry_after_seconds(getattr(e, "response", None)))
+            if attempt >= policy.max_attempts or time.monotonic() - started + delay > policy.max_elapsed:
+                raise
+
+            print(f"Retrying {breaker.host} in {delay:.2f}s (attempt {attempt} failed: {e})")
+            time.sleep(delay)
+            continue
+
+        breaker.record_success()
+        return result
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(host):
+    """
+    Return the process-wide circuit breaker for a host.
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = _breakers[host] = CircuitBreaker(host)
+        return breaker
+
+
+def breaker_summary():
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.host: breaker.status() for breaker in breakers}
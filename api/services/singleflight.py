@@ -0,0 +1,61 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into a single execution.
+    The first caller runs the function, everyone who arrives while it is still running
+    waits on that call and receives the same result (or the same exception).
+    Works for threads (do) and for asyncio callers (do_async), and both kinds share the same in-flight calls.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}  # key -> concurrent.futures.Future
+
+    def _claim(self, key):
+        # Returns the in-flight future for the key and whether this caller has to run the call
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future, False
+
+            future = Future()
+            self._in_flight[key] = future
+            return future, True
+
+    def _run(self, key, future, fn, args, kwargs):
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def do(self, key, fn, *args, **kwargs):
+        future, leader = self._claim(key)
+
+        if not leader:
+            return future.result()
+
+        return self._run(key, future, fn, args, kwargs)
+
+    async def do_async(self, key, fn, *args, **kwargs):
+        future, leader = self._claim(key)
+
+        if not leader:
+            return await asyncio.wrap_future(future)
+
+        # Run the blocking call off the event loop so other coroutines keep going
+        return await asyncio.to_thread(self._run, key, future, fn, args, kwargs)
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._in_flight)
@@ -0,0 +1,26 @@
+import time
+from .cache import get_cache, MemoryCache
+from .quota import get_quota_tracker
+
+# Used when the response cache is disabled, so the poller still has somewhere to publish
+_fallback_store = MemoryCache(max_entries=64)
+
+
+def _store():
+    return get_cache() or _fallback_store
+
+
+def save_snapshot(sport, data, ttl):
+    """
+    Publish the latest priced dfs-player-props payload for a sport, valid for ttl seconds.
+    Stored in the response cache, so with the sqlite backend every worker process sees it.
+    """
+    _store().set(f"snapshot:{sport}", {"fetched_at": time.time(), "data": data}, ttl)
+
+
+def get_snapshot(sport):
+    """
+    Return the latest snapshot for a sport, or None when there is no fresh one.
+    """
+    entry = _store().get(f"snapshot:{sport}", allow_stale=get_quota_tracker().serve_stale())
+    return entry["data"] if entry is not None else None
@@ -0,0 +1,118 @@
+import importlib
+import random
+from .prop_index import match_slate
+
+SYNTHETIC_BOOKMAKERS = [
+    ("pinnacle", "Pinnacle"),
+    ("williamhill_us", "Caesars"),
+    ("draftkings", "DraftKings"),
+    ("fanduel", "FanDuel"),
+    ("betmgm", "BetMGM"),
+    ("betrivers", "BetRivers"),
+    ("bovada", "Bovada"),
+    ("betonlineag", "BetOnline.ag"),
+    ("lowvig", "LowVig.ag"),
+    ("mybookieag", "MyBookie.ag"),
+    ("betus", "BetUS"),
+    ("betfair_ex_eu", "Betfair"),
+]
+SYNTHETIC_DFS_BOOKMAKERS = [
+    ("underdog", "Underdog"),
+    ("prizepicks", "PrizePicks"),
+]
+
+
+def build_events_payload(event_count, seed=0):
+    """
+    Build an odds API shaped events list for a synthetic slate.
+    """
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"synthetic{i:04d}",
+            "home_team": f"Home Team {i}",
+            "away_team": f"Away Team {i}",
+            "commence_time": f"2099-01-01T{rng.randint(0, 23):02d}:00:00Z",
+        }
+        for i in range(event_count)
+    ]
+
+
+def build_event_payload(event_id, markets, players=12, bookmakers=SYNTHETIC_BOOKMAKERS,
+                        dfs_bookmakers=SYNTHETIC_DFS_BOOKMAKERS, seed=0):
+    """
+    Build an odds API shaped event odds payload with sportsbook and DFS bookmakers.
+    Every book prices each player/market around a shared "true" line with ~4.5% vig,
+    and some books hang the line half a point or a point off the consensus.
+    """
+    rng = random.Random(f"{seed}:{event_id}")
+    player_names = [f"Player {event_id} {i}" for i in range(players)]
+
+    # Consensus line and over probability per player/market, shared by every book
+    lines = {}
+    for player_name in player_names:
+        for market in markets:
+            lines[(player_name, market)] = (rng.randint(1, 30) + 0.5, rng.uniform(0.35, 0.65))
+
+    payload_bookmakers = []
+
+    for key, title in bookmakers:
+        payload_markets = []
+        for market in markets:
+            outcomes = []
+            for player_name in player_names:
+                point, over_prob = lines[(player_name, market)]
+
+                if rng.random() < 0.2:
+                    point += rng.choice([-1, -0.5, 0.5, 1])  # Book hangs an off-consensus line
+                    over_prob = min(max(over_prob + rng.uniform(-0.05, 0.05), 0.05), 0.95)
+
+                vig = 1.045
+                outcomes.append({"name": "Over", "description": player_name, "price": round(1 / (over_prob * vig), 2), "point": point})
+                outcomes.append({"name": "Under", "description": player_name, "price": round(1 / ((1 - over_prob) * vig), 2), "point": point})
+
+            payload_markets.append({"key": market, "last_update": "2099-01-01T00:00:00Z", "outcomes": outcomes})
+
+        payload_bookmakers.append({"key": key, "title": title, "last_update": "2099-01-01T00:00:00Z", "markets": payload_markets})
+
+    for key, title in dfs_bookmakers:
+        payload_markets = []
+        for market in markets:
+            outcomes = []
+            for player_name in player_names:
+                point, _ = lines[(player_name, market)]
+                outcomes.append({"name": "Over", "description": player_name, "price": 1.83, "point": point})
+                outcomes.append({"name": "Under", "description": player_name, "price": 1.83, "point": point})
+
+            payload_markets.append({"key": market, "last_update": "2099-01-01T00:00:00Z", "outcomes": outcomes})
+
+        payload_bookmakers.append({"key": key, "title": title, "last_update": "2099-01-01T00:00:00Z", "markets": payload_markets})
+
+    return {
+        "id": event_id,
+        "sport_key": "synthetic",
+        "commence_time": "2099-01-01T00:00:00Z",
+        "bookmakers": payload_bookmakers,
+    }
+
+
+def build_matched_props(sport, prop_count, players=16, seed=0):
+    """
+    Build a synthetic slate of Underdog lines matched to their sportsbook odds (MatchedProps),
+    as the dfs-player-props views hand them to the pricing functions. Returns exactly prop_count props.
+    """
+    utils = importlib.import_module(f"api.{sport}.utils")
+    event_odds = importlib.import_module(f"api.{sport}.services.{sport}_event_odds")
+    split_event_odds = getattr(event_odds, f"split_{sport}_event_odds")
+    markets = getattr(utils, f"{sport.upper()}_PLAYER_MARKETS").split(",")
+
+    events = []
+    matched_count = 0
+
+    while matched_count < prop_count:
+        event_id = f"synthetic{len(events):04d}"
+        event = split_event_odds(build_event_payload(event_id, markets, players=players, seed=seed))
+        events.append((event_id, event["odds"], event["dfs_lines"]))
+        matched_count += len(match_slate(events[-1:]).for_site("underdog"))
+
+    return match_slate(events).for_site("underdog").select(list(range(prop_count)))
@@ -1,3 +1,537 @@
-from django.test import TestCase
+import csv
+import os
+import random
+import tempfile
+from datetime import timedelta
+from unittest import mock
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from api.models import Bookmaker, Market, OddsChange, OddsKeyframe
+from api.nba.utils import NBA_BOOKMAKER_WEIGHTS, calculate_fair_odds, decimal_to_american, implied_probability
+from api.nfl.utils import NFL_BOOKMAKER_WEIGHTS
+from api.mlb.utils import MLB_BOOKMAKER_WEIGHTS
+from api.nhl.utils import NHL_BOOKMAKER_WEIGHTS
+from api.services import backtest, odds_history
+from api.services.odds_columns import OddsColumns
+from api.services.odds_store import write_slate
+from api.services.player_index import suggest_alias
+from api.services.pricing_engine import price_matched
+from api.services.prop_index import match_slate
+from api.services.expected_value import add_expected_value, break_even_probability
+from api.services.incremental_pricing import IncrementalPricer
+from api.services.ranking import top_k_rows
+from api.services.synthetic_slate import SYNTHETIC_BOOKMAKERS
 
-# Create your tests here.
+MARKETS = ["player_points", "player_rebounds", "player_assists", "player_threes"]
+
+
+def original_filter_better_odds_lean(player_props, bookmaker_weights):
+    """
+    The per-prop loop filter_better_odds_lean ran before the NumPy pricing (Excel export left out).
+    Returns every prop's (lean, average fair odds, fair probability) and the ranked props it kept.
+    """
+    priced_props = []
+    filtered_props = []
+
+    for prop in player_props:
+        bookmaker_odds = prop["bookmaker_odds"]
+
+        bookmaker_groups = {}  # Store "over" and "under" odds together by bookmaker
+
+        # Group odds by bookmaker
+        for odds_entry in bookmaker_odds:
+            bookmaker = odds_entry["bookmaker"]
+            lean = odds_entry["lean"].lower()  # "over" or "under"
+            odds = odds_entry["odds"]
+
+            if bookmaker not in bookmaker_groups:
+                bookmaker_groups[bookmaker] = {"over": None, "under": None}
+
+            bookmaker_groups[bookmaker][lean] = odds
+
+        # Calculate fair odds for each bookmaker
+        fair_odds_per_bookmaker = []
+        for bookmaker, odds_pair in bookmaker_groups.items():
+            over_odds = odds_pair["over"]
+            under_odds = odds_pair["under"]
+
+            if over_odds and under_odds:  # Ensure both exist
+                fair_over, fair_under = calculate_fair_odds(over_odds, under_odds)
+
+                fair_odds_per_bookmaker.append({
+                    "bookmaker": bookmaker,
+                    "fair_over": fair_over,
+                    "fair_under": fair_under
+                })
+
+        # Calculate weighted fair odds (only consider bookmakers that exist in the odds data)
+        weighted_fair_over = 0
+        weighted_fair_under = 0
+        total_weight = 0
+
+        for fair_odds in fair_odds_per_bookmaker:
+            bookmaker = fair_odds["bookmaker"]
+
+            if bookmaker in bookmaker_weights:
+                weight = bookmaker_weights[bookmaker]
+                weighted_fair_over += fair_odds["fair_over"] * weight
+                weighted_fair_under += fair_odds["fair_under"] * weight
+                total_weight += weight
+
+        avg_fair_over_odds = weighted_fair_over / total_weight if total_weight > 0 else None
+        avg_fair_under_odds = weighted_fair_under / total_weight if total_weight > 0 else None
+
+        avg_fair_over_odds = round(avg_fair_over_odds, 2) if avg_fair_over_odds is not None else None
+        avg_fair_under_odds = round(avg_fair_under_odds, 2) if avg_fair_under_odds is not None else None
+
+        # Determine better lean based on fair odds averages
+        better_lean = ""
+        if avg_fair_over_odds is not None and avg_fair_under_odds is not None:
+            if avg_fair_over_odds < avg_fair_under_odds:
+                better_lean = "over"
+            elif avg_fair_over_odds > avg_fair_under_odds:
+                better_lean = "under"
+            else:
+                better_lean = "n/a"
+        elif avg_fair_over_odds:
+            better_lean = "over"
+        elif avg_fair_under_odds:
+            better_lean = "under"
+        else:
+            better_lean = "n/a"
+
+        if avg_fair_over_odds:
+            average_odds = decimal_to_american(avg_fair_over_odds) if better_lean == "over" else decimal_to_american(avg_fair_under_odds)
+        else:
+            average_odds = None
+
+        fair_probability = implied_probability(average_odds) if average_odds else None
+        priced_props.append((better_lean, average_odds, fair_probability))
+
+        # Check if at least two bookmakers exist, and one of them must be Pinnacle, BetMGM, or Caesars
+        if len(bookmaker_groups) >= 2 and any(bookmaker in ["Pinnacle", "Caesars"] for bookmaker in bookmaker_groups):
+            filtered_props.append({"prop": len(priced_props) - 1, "fair_probability": fair_probability})
+
+            # Sort by implied probability in descending order
+            filtered_props.sort(key=lambda x: x["fair_probability"], reverse=True)
+
+            filtered_props = filtered_props[:15]
+
+    return priced_props, [prop["prop"] for prop in filtered_props]
+
+
+def random_slate(rng, events=3, players=10):
+    """
+    A random slate of sportsbook odds and Underdog lines as [(event_id, odds, dfs_lines)]: each player/market
+    is quoted by a random set of books, some of them on other lines or with one side missing, and always
+    by one weighted book on both sides (the original loop can't rank a prop without fair odds).
+    """
+    weighted = ["Pinnacle", "Caesars", "DraftKings", "FanDuel"]
+    titles = [title for _, title in SYNTHETIC_BOOKMAKERS]
+    slate = []
+
+    for event in range(events):
+        odds, dfs_lines = OddsColumns(), OddsColumns()
+
+        for player in range(players):
+            player_name = f"Player {event} {player}"
+            for market in MARKETS:
+                point = rng.randint(1, 30) + 0.5
+                dfs_lines.append(player_name, market, "Underdog", "Over", point, 1.83)
+                dfs_lines.append(player_name, market, "Underdog", "Under", point, 1.83)
+
+                books = {rng.choice(weighted)} | set(rng.sample(titles, rng.randint(0, 6)))
+                for book in sorted(books):
+                    book_point = point if rng.random() < 0.85 else point + rng.choice([-1, 1])
+                    over_prob = rng.uniform(0.3, 0.7)
+                    sides = ["Over", "Under"] if rng.random() < 0.85 else [rng.choice(["Over", "Under"])]
+                    if book in weighted and book_point == point:
+                        sides = ["Over", "Under"]
+                    for side in sides:
+                        probability = over_prob if side == "Over" else 1 - over_prob
+                        odds.append(player_name, market, book, side, book_point, round(1 / (probability * rng.uniform(1.02, 1.08)), 2))
+
+        slate.append((f"event{event}", odds.freeze(), dfs_lines.freeze()))
+
+    return slate
+
+
+def churn_slate(rng, slate):
+    """
+    The next poll of a random_slate: some prices move, some quotes go away or change lines, new players
+    come in and the events come back in another order, some of them not at all.
+    """
+    churned = []
+
+    for event, odds, dfs_lines in slate:
+        moved = OddsColumns()
+        for player_name, market, book, side, point, price in odds.rows():
+            draw = rng.random()
+            if draw < 0.03:
+                continue
+            if draw < 0.06:
+                point += rng.choice([-1, 1])
+            elif draw < 0.2:
+                price = round(max(1.01, price + rng.choice([-0.05, 0.05, -0.2, 0.2])), 2)
+            moved.append(player_name, market, book, side, point, price)
+
+        lines = OddsColumns()
+        for row in dfs_lines.rows():
+            lines.append(*row)
+        for player_name, market, book, side, point, price in random_slate(rng, events=1, players=1)[0][1].rows():
+            moved.append(f"{player_name} {event}", market, book, side, point, price)
+
+        churned.append((event, moved.freeze(), lines.freeze()))
+
+    rng.shuffle(churned)
+    return churned[:len(churned) - (rng.random() < 0.2)]
+
+
+class PricingEquivalenceTests(SimpleTestCase):
+    """
+    The columnar pricing (price_matched + top_k_rows) against the per-prop loop it replaced, on random slates.
+    """
+
+    def test_fair_odds_and_leans_match_the_original_loop(self):
+        rng = random.Random(12)
+
+        for _ in range(20):
+            matched = match_slate(random_slate(rng)).for_site("underdog")
+            player_props = matched.player_props()
+
+            for weights in [NBA_BOOKMAKER_WEIGHTS, NFL_BOOKMAKER_WEIGHTS, MLB_BOOKMAKER_WEIGHTS, NHL_BOOKMAKER_WEIGHTS]:
+                expected, _ = original_filter_better_odds_lean(player_props, weights)
+                priced = price_matched(matched, weights)
+
+                self.assertEqual(
+                    [(priced.lean[i], priced.average_odds[i], priced.value("fair_probability", i)) for i in range(len(matched))],
+                    expected,
+                )
+
+    def test_ranking_matches_the_original_loop(self):
+        rng = random.Random(13)
+
+        for _ in range(20):
+            matched = match_slate(random_slate(rng)).for_site("underdog")
+            _, expected = original_filter_better_odds_lean(matched.player_props(), NBA_BOOKMAKER_WEIGHTS)
+
+            priced = price_matched(matched, NBA_BOOKMAKER_WEIGHTS)
+            eligible = (priced.bookmaker_counts >= 2) & priced.quoted_by_any(["Pinnacle", "Caesars"])
+
+            self.assertEqual(top_k_rows(priced, 15, "fair_probability", None, eligible), expected)
+
+    def test_incremental_pricing_matches_a_full_reprice(self):
+        rng = random.Random(14)
+        pricer = IncrementalPricer()
+        slate = random_slate(rng, events=4)
+
+        for poll in range(30):
+            if poll:
+                slate = churn_slate(rng, slate)
+            matched = match_slate(slate).for_site("underdog")
+
+            full = price_matched(matched, NBA_BOOKMAKER_WEIGHTS)
+            incremental = pricer.price(matched, NBA_BOOKMAKER_WEIGHTS, "multiplicative")
+            self.assertEqual(incremental.lean, full.lean)
+            self.assertEqual(incremental.average_odds, full.average_odds)
+            self.assertTrue(np.array_equal(incremental.values["fair_probability"], full.values["fair_probability"], equal_nan=True))
+            self.assertTrue(np.array_equal(incremental.bookmaker_counts, full.bookmaker_counts))
+            self.assertTrue(np.array_equal(incremental.bookmaker_codes, full.bookmaker_codes))
+            self.assertEqual(incremental.entry_odds, full.entry_odds)
+
+            for priced in (full, incremental):
+                add_expected_value(priced, "ud", "power", 2)
+
+            # The NBA rule and the lean rule of the other sports, both flip as the quotes come and go
+            for eligible in [
+                (full.bookmaker_counts >= 2) & full.quoted_by_any(["Pinnacle", "Caesars"]),
+                np.array(full.lean) != "n/a",
+            ]:
+                for k, rank_by, tie_break in [(15, "fair_probability", None), (5, "ev", "fair_probability"), (3, "edge", None)]:
+                    self.assertEqual(
+                        pricer.top_k(incremental, k, rank_by, tie_break, eligible), top_k_rows(full, k, rank_by, tie_break, eligible),
+                    )
+
+        self.assertGreater(pricer.reused, 0)
+        self.assertGreater(pricer.incremental_ranks, 0)
+
+
+class PlayerMatchingTests(SimpleTestCase):
+    """
+    Names of different players that are spelled alike must never share a prop.
+    """
+
+    def slate(self, sportsbook_names, dfs_name):
+        odds, dfs_lines = OddsColumns(), OddsColumns()
+        for name in sportsbook_names:
+            odds.append(name, "player_points", "Pinnacle", "Over", 10.5, 1.9)
+            odds.append(name, "player_points", "Pinnacle", "Under", 10.5, 1.9)
+        dfs_lines.append(dfs_name, "player_points", "Underdog", "Over", 10.5, 1.83)
+        dfs_lines.append(dfs_name, "player_points", "Underdog", "Under", 10.5, 1.83)
+        return [("event", odds.freeze(), dfs_lines.freeze())]
+
+    def test_similar_names_of_different_players_are_not_joined(self):
+        for sportsbook_name, dfs_name in [("Jaylin Williams", "Jalen Williams"), ("Jalen Johnson", "Jaylen Johnson")]:
+            self.assertEqual(len(match_slate(self.slate([sportsbook_name], dfs_name)).for_site("underdog")), 0)
+
+    def test_normalized_spellings_are_joined(self):
+        matched = match_slate(self.slate(["P.J. Washington Jr."], "PJ Washington")).for_site("underdog")
+        self.assertEqual(len(matched), 1)
+
+    def test_alias_suggestions(self):
+        self.assertIsNone(suggest_alias("Jalen Williams", ["Jaylin Williams"]))
+        self.assertIsNone(suggest_alias("Jalen Johnson", ["Jaylen Johnson", "Jallen Johnson"]))
+        self.assertIsNone(suggest_alias("Jalen Johnson", ["Galen Johnson"]))
+        self.assertEqual(suggest_alias("Jaylen Johnson", ["Jalen Johnson", "Jaylin Williams"]), "jalen johnson")
+
+
+def odds_slate(lines):
+    """
+    A one-event slate ("e1") of sportsbook odds from {(player, market, bookmaker, side, point): price}.
+    """
+    odds = OddsColumns()
+    for (player, market, bookmaker, side, point), price in lines.items():
+        odds.append(player, market, bookmaker, side, point, price)
+    return [("e1", odds.freeze(), OddsColumns().freeze())]
+
+
+@mock.patch.object(odds_history, "ODDS_HISTORY_KEYFRAME_INTERVAL", 3)
+class OddsHistoryTests(TestCase):
+    """
+    The line-movement history written by write_slate, against the line states the slates held.
+    """
+
+    POINTS = {
+        ("Player A", "player_points", "Pinnacle", "Over", 20.5): 1.9,
+        ("Player A", "player_points", "Pinnacle", "Under", 20.5): 1.9,
+        ("Player A", "player_points", "Caesars", "Over", 20.5): 1.85,
+        ("Player A", "player_points", "Caesars", "Under", 20.5): 1.95,
+    }
+    REBOUNDS = {
+        ("Player A", "player_rebounds", "Pinnacle", "Over", 8.5): 2.0,
+        ("Player A", "player_rebounds", "Pinnacle", "Under", 8.5): 1.8,
+    }
+
+    def setUp(self):
+        odds_history._states.clear()
+        self.addCleanup(odds_history._states.clear)
+        self.start = timezone.now() - timedelta(hours=1)
+
+    def write(self, poll, lines):
+        # write_history only moves its in-memory states on once the slate's transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            write_slate("nba", odds_slate(lines), self.start + timedelta(minutes=poll))
+
+    def stored_state(self, at=None):
+        bookmakers = dict(Bookmaker.objects.values_list("id", "title"))
+        markets = dict(Market.objects.values_list("id", "key"))
+        states = odds_history.load_event_states(OddsKeyframe.objects.values("event").distinct(), at)
+        return {
+            (player, markets[market], bookmakers[bookmaker], side, point): price
+            for state in states.values() for (bookmaker, market, player, side, point, _), price in state.items()
+        }
+
+    def test_only_changes_are_written_between_keyframes(self):
+        lines = {**self.POINTS, **self.REBOUNDS}
+        self.write(0, lines)
+        self.assertEqual(OddsChange.objects.filter(keyframe=False).count(), 6)
+        self.assertEqual(OddsChange.objects.filter(keyframe=True).count(), 6)
+
+        lines[("Player A", "player_points", "Pinnacle", "Over", 20.5)] = 1.8
+        self.write(1, lines)
+        self.write(2, lines)
+        self.assertEqual(OddsChange.objects.filter(keyframe=False).count(), 7)
+
+        # Every third poll of the event is a keyframe again
+        self.write(3, lines)
+        self.assertEqual(OddsKeyframe.objects.count(), 2)
+        self.assertEqual(OddsChange.objects.filter(keyframe=True).count(), 12)
+        self.assertEqual(self.stored_state(), lines)
+
+    def test_removals_are_only_logged_for_fetched_markets(self):
+        self.write(0, {**self.POINTS, **self.REBOUNDS})
+
+        # The rebounds market was left out of this fetch (low quota), one points outcome went away
+        points = dict(self.POINTS)
+        del points[("Player A", "player_points", "Caesars", "Under", 20.5)]
+        self.write(1, points)
+
+        removed = OddsChange.objects.filter(removed=True)
+        self.assertEqual(list(removed.values_list("market__key", "bookmaker__title", "side")), [("player_points", "Caesars", "Under")])
+        self.assertEqual(self.stored_state(), {**points, **self.REBOUNDS})
+
+        # Fetching the rebounds again changes nothing
+        self.write(2, {**points, **self.REBOUNDS})
+        self.assertEqual(OddsChange.objects.filter(keyframe=False).count(), 7)
+
+    def test_state_is_rebuilt_from_the_history_after_a_restart(self):
+        lines = {**self.POINTS, **self.REBOUNDS}
+        self.write(0, lines)
+        changed = {**lines, ("Player A", "player_rebounds", "Pinnacle", "Over", 8.5): 2.1}
+        self.write(1, changed)
+
+        odds_history._states.clear()
+        self.write(2, changed)
+        self.assertEqual(OddsChange.objects.filter(keyframe=False).count(), 7)
+
+        self.assertEqual(self.stored_state(self.start + timedelta(seconds=30)), lines)
+        self.assertEqual(self.stored_state(self.start + timedelta(minutes=1)), changed)
+        self.assertEqual(self.stored_state(self.start - timedelta(minutes=1)), {})
+
+    def test_player_history_opens_at_since(self):
+        lines = dict(self.POINTS)
+        self.write(0, lines)
+        lines[("Player A", "player_points", "Pinnacle", "Over", 20.5)] = 1.8
+        self.write(1, lines)
+        self.write(2, lines)
+        self.write(3, lines)  # Keyframe, the replay of a since after it starts here
+        lines[("Player A", "player_points", "Pinnacle", "Over", 20.5)] = 1.75
+        del lines[("Player A", "player_points", "Caesars", "Under", 20.5)]
+        self.write(4, lines)
+
+        for since in [timedelta(seconds=90), timedelta(seconds=210)]:
+            history = odds_history.player_history(
+                "nba", "player a", market="player_points", bookmaker="pinnacle",
+                since=self.start + since, at=self.start + timedelta(minutes=5),
+            )
+            self.assertEqual([(line["side"], line["price"]) for line in history["opening"]], [("Over", 1.8), ("Under", 1.9)])
+            self.assertEqual([(line["side"], line["price"]) for line in history["lines"]], [("Over", 1.75), ("Under", 1.9)])
+            self.assertEqual([(move["side"], move["price"], move["removed"]) for move in history["moves"]], [("Over", 1.75, False)])
+
+        history = odds_history.player_history("nba", "Player A", market="player_points", since=self.start - timedelta(minutes=1),
+                                              at=self.start + timedelta(minutes=5))
+        self.assertEqual(history["opening"], [])
+        self.assertEqual([(move["bookmaker"], move["side"], move["removed"]) for move in history["moves"][-2:]],
+                         [("Caesars", "Under", True), ("Pinnacle", "Over", False)])
+        self.assertEqual(len(history["moves"]), 7)  # The four opening lines, the move of poll 1 and the two of poll 4
+
+
+def event_slate(event_id, lines, dfs_lines=()):
+    """
+    One event of a slate from sportsbook {(player, market, bookmaker, side, point): price} and Underdog (player, market, point) lines.
+    """
+    odds, dfs = OddsColumns(), OddsColumns()
+    for (player, market, bookmaker, side, point), price in lines.items():
+        odds.append(player, market, bookmaker, side, point, price)
+    for player, market, point in dfs_lines:
+        dfs.append(player, market, "Underdog", "Over", point, 1.83)
+        dfs.append(player, market, "Underdog", "Under", point, 1.83)
+    return event_id, odds.freeze(), dfs.freeze()
+
+
+def two_way(player, over, under, point=20.5):
+    # The same two-way points line at Pinnacle and Caesars
+    return {
+        (player, "player_points", bookmaker, side, point): price
+        for bookmaker in ["Pinnacle", "Caesars"] for side, price in [("Over", over), ("Under", under)]
+    }
+
+
+@mock.patch.object(backtest, "ODDS_HISTORY_KEYFRAME_INTERVAL", 2)
+@mock.patch.object(odds_history, "ODDS_HISTORY_KEYFRAME_INTERVAL", 2)
+class BacktestTests(TestCase):
+    """
+    The backtest's replay of a small stored history and its grading of the picks.
+    """
+
+    def setUp(self):
+        odds_history._states.clear()
+        self.addCleanup(odds_history._states.clear)
+        self.start = timezone.now() - timedelta(hours=1)
+
+    def minute(self, minutes):
+        return self.start + timedelta(minutes=minutes)
+
+    def write(self, poll, event_results, events=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            write_slate("nba", event_results, self.minute(poll), events)
+
+    def write_polls(self):
+        """
+        Eight polls: e1 every time with a moving price, e2 (stored commence time at 3.5 minutes) every time,
+        e3 at the first two polls only.
+        """
+        for poll in range(8):
+            event_results = [
+                event_slate("e1", two_way("Player A", 1.5 + poll / 100, 3.0)),
+                event_slate("e2", two_way("Player B", 1.8, 2.0)),
+            ]
+            if poll < 2:
+                event_results.append(event_slate("e3", two_way("Player C", 1.9, 1.9)))
+            self.write(poll, event_results, [{"id": "e2", "commence_time": self.minute(3.5)}])
+
+    def test_replay_drops_started_and_inactive_events(self):
+        self.write_polls()
+
+        slates = list(backtest.replay_slates("nba", commence_times={"e1": self.minute(6.5)}))
+
+        self.assertEqual([at for at, _ in slates], [self.minute(poll) for poll in range(8)])
+        self.assertEqual(
+            [[event_id for event_id, _, _ in event_results] for _, event_results in slates],
+            # e2 once it started, e3 (unchanged, last written by the keyframe of poll 0) after two keyframe
+            # intervals of polls without a row, e1 at the commence_time of its results
+            [["e1", "e2", "e3"]] * 4 + [["e1", "e3"]] + [["e1"]] * 2 + [[]],
+        )
+
+    def test_replay_from_start_is_seeded_with_the_stored_state(self):
+        self.write_polls()
+
+        slates = list(backtest.replay_slates("nba", start=self.minute(2.5)))
+
+        self.assertEqual([at for at, _ in slates], [self.minute(poll) for poll in range(3, 8)])
+        self.assertEqual([sorted(event_id for event_id, _, _ in event_results) for _, event_results in slates],
+                         [["e1", "e2"]] + [["e1"]] * 4)  # e3 has no row after start, e2 starts at 3.5 minutes
+        for poll, (_, event_results) in zip(range(3, 8), slates):
+            odds = dict((event_id, odds) for event_id, odds, _ in event_results)["e1"]
+            prices = {(bookmaker, side): price for _, _, bookmaker, side, _, price in odds.rows()}
+            self.assertEqual(prices[("Pinnacle", "Over")], 1.5 + poll / 100)
+            self.assertEqual(len(prices), 4)
+
+    def test_report_grades_the_picks_against_the_results(self):
+        dfs_lines = [(player, "player_points", 20.5) for player in ["Player A", "Player B", "Player C", "Player D"]]
+        lines = {**two_way("Player A", 1.5, 3.0), **two_way("Player B", 1.5, 3.0), **two_way("Player C", 3.0, 1.5),
+                 **two_way("Player D", 1.25, 5.0)}
+        for poll in range(3):
+            self.write(poll, [event_slate("e1", lines, dfs_lines)])
+
+        path = os.path.join(tempfile.mkdtemp(), "results.csv")
+        self.addCleanup(os.remove, path)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["event_id", "player_name", "market", "actual"])
+            writer.writerow(["e1", "PLAYER A", "player_points", 25])  # Over 20.5 at 66.67%: win
+            writer.writerow(["e1", "Player B", "player_points", 20.5])  # Push
+            writer.writerow(["e1", "Player C", "player_points", 25])  # Under 20.5 at 66.67%: loss
+            # Player D (over at 80%) has no result
+
+        results, commence_times = backtest.load_results(path)
+        config = backtest.grid_configs("nba")[0]
+        report = backtest.backtest_configs("nba", [config], results, commence_times)[0]
+
+        payout = 1 / break_even_probability("underdog", config["entry_type"], config["legs"])
+        self.assertEqual(report["snapshots"], 2)  # Poll 1 changed nothing and left no history row
+        self.assertEqual(report["sites"]["prizepicks"]["picks"], 0)
+        self.assertEqual(report["sites"]["underdog"], {
+            "picks": 4,
+            "graded": 3,
+            "no_lean": 0,
+            "wins": 1,
+            "losses": 1,
+            "pushes": 1,
+            "hit_rate": 50.0,
+            "roi": round((payout + 1 - 3) / 3 * 100, 2),
+            "brier": round(((0.6667 - 1) ** 2 + 0.6667 ** 2) / 2, 4),
+            "calibration": [{"bucket": "65-70", "picks": 2, "predicted": 66.67, "hit_rate": 50.0}],
+        })
+
+    def test_picks_without_a_lean_are_not_graded(self):
+        picks = {("e1", "player a", "player_points", 20.5): ("n/a", 50.0), ("e1", "player b", "player_points", 20.5): ("over", 62.5)}
+        results = {("e1", "player a", "player_points"): 25.0, ("e1", "player b", "player_points"): 19.0}
+
+        metrics = backtest.grade_picks(picks, results, "underdog", "power", 2)
+
+        self.assertEqual((metrics["picks"], metrics["graded"], metrics["no_lean"], metrics["losses"]), (2, 1, 1, 1))
+        self.assertEqual(metrics["roi"], -100.0)
+        self.assertEqual(metrics["brier"], 0.3906)
+        self.assertEqual(metrics["calibration"], [{"bucket": "60-65", "picks": 1, "predicted": 62.5, "hit_rate": 0.0}])
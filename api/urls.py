@@ -1,29 +1,41 @@
 from django.urls import path
-from .nba.views import HomeView, get_nba_events_info, get_nba_player_props_value
-from .nfl.views import get_nfl_events_info, get_nfl_player_props_value
-from .mlb.views import get_mlb_events_info, get_mlb_player_props_value
-from .nhl.views import get_nhl_events_info, get_nhl_player_props_value
-from .ncaaf.views import get_ncaaf_events_info, get_ncaaf_player_props_value
-from .ncaab.views import get_ncaab_events_info, get_ncaab_player_props_value
+from .views import get_quota_info
+from .nba.views import HomeView, get_nba_events_info, get_nba_player_props_value, get_nba_dfs_entries, get_nba_history
+from .nfl.views import get_nfl_events_info, get_nfl_player_props_value, get_nfl_dfs_entries, get_nfl_history
+from .mlb.views import get_mlb_events_info, get_mlb_player_props_value, get_mlb_dfs_entries, get_mlb_history
+from .nhl.views import get_nhl_events_info, get_nhl_player_props_value, get_nhl_dfs_entries, get_nhl_history
+from .ncaaf.views import get_ncaaf_events_info, get_ncaaf_player_props_value, get_ncaaf_history
+from .ncaab.views import get_ncaab_events_info, get_ncaab_player_props_value, get_ncaab_history
 
 urlpatterns = [
     path("", HomeView.as_view(), name="home"),
+    path("quota", get_quota_info, name="quota"),
     #nba
     path("nba/events", get_nba_events_info, name="nba_events"),
     path("nba/dfs-player-props", get_nba_player_props_value, name="nba_player_props_value"),
+    path("nba/dfs-entries", get_nba_dfs_entries, name="nba_dfs_entries"),
+    path("nba/history", get_nba_history, name="nba_history"),
     #nfl
     path("nfl/events", get_nfl_events_info, name="nfl_events"),
     path("nfl/dfs-player-props", get_nfl_player_props_value, name="nfl_player_props_value"),
+    path("nfl/dfs-entries", get_nfl_dfs_entries, name="nfl_dfs_entries"),
+    path("nfl/history", get_nfl_history, name="nfl_history"),
     #mlb
     path("mlb/events", get_mlb_events_info, name="mlb_events"),
     path("mlb/dfs-player-props", get_mlb_player_props_value, name="mlb_player_props_value"),
+    path("mlb/dfs-entries", get_mlb_dfs_entries, name="mlb_dfs_entries"),
+    path("mlb/history", get_mlb_history, name="mlb_history"),
     #nhl
     path("nhl/events", get_nhl_events_info, name="nhl_events"),
     path("nhl/dfs-player-props", get_nhl_player_props_value, name="nhl_player_props_value"),
+    path("nhl/dfs-entries", get_nhl_dfs_entries, name="nhl_dfs_entries"),
+    path("nhl/history", get_nhl_history, name="nhl_history"),
     #ncaaf
     path("ncaaf/events", get_ncaaf_events_info, name="ncaaf_events"),
     path("ncaaf/dfs-player-props", get_ncaaf_player_props_value, name="ncaaf_player_props_value"),
+    path("ncaaf/history", get_ncaaf_history, name="ncaaf_history"),
     #ncaab
     path("ncaab/events", get_ncaab_events_info, name="ncaab_events"),
     path("ncaab/dfs-player-props", get_ncaab_player_props_value, name="ncaab_player_props_value"),
+    path("ncaab/history", get_ncaab_history, name="ncaab_history"),
 ]
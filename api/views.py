@@ -0,0 +1,18 @@
+from api.services.fast_json import FastJsonResponse
+from api.services.cache import get_cache
+from api.services.quota import get_quota_tracker
+from api.services.resilience import breaker_summary
+
+
+def get_quota_info(request):
+    """
+    Report the remaining odds API budget, the cost recorded per sport/endpoint/event, the cache stats
+    and the state of each upstream host's circuit breaker.
+    """
+    cache = get_cache()
+
+    return FastJsonResponse({
+        "quota": get_quota_tracker().summary(),
+        "cache": cache.stats() if cache else None,
+        "circuits": breaker_summary(),
+    })
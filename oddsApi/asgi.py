@@ -14,3 +14,11 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'oddsApi.settings')
 
 application = get_asgi_application()
+
+from oddsApi.settings import ODDS_POLLER_ENABLED
+
+if ODDS_POLLER_ENABLED:
+    # Keep per-sport snapshots fresh in the background so views serve them without the fan-out,
+    # from the one worker per host that takes the poller lock
+    from api.services.poller import start_poller
+    start_poller()
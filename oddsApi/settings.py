@@ -18,36 +18,103 @@ from dotenv import load_dotenv
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '../.env'))
 
 API_KEY = os.getenv('API_KEY')
+#HTTP client
+ODDS_API_POOL_SIZE = int(os.getenv('ODDS_API_POOL_SIZE', 32))
+ODDS_API_CONNECT_TIMEOUT = float(os.getenv('ODDS_API_CONNECT_TIMEOUT', 3.05))
+ODDS_API_READ_TIMEOUT = float(os.getenv('ODDS_API_READ_TIMEOUT', 15))
+ODDS_RECORD_DIR = os.getenv('ODDS_RECORD_DIR')  # Save every upstream response here when set
+ODDS_REPLAY_DIR = os.getenv('ODDS_REPLAY_DIR')  # Answer every request from these recordings instead of the network
+ODDS_REPLAY_LATENCY_MS = float(os.getenv('ODDS_REPLAY_LATENCY_MS', 0))
+ODDS_REPLAY_JITTER_MS = float(os.getenv('ODDS_REPLAY_JITTER_MS', 0))
+ODDS_REPLAY_ERROR_RATE = float(os.getenv('ODDS_REPLAY_ERROR_RATE', 0))  # 0..1
+ODDS_REPLAY_ERROR_STATUS = int(os.getenv('ODDS_REPLAY_ERROR_STATUS', 503))
+#Response cache
+ODDS_CACHE_BACKEND = os.getenv('ODDS_CACHE_BACKEND', 'memory')  # memory, sqlite or none
+ODDS_CACHE_PATH = os.getenv('ODDS_CACHE_PATH', os.path.join(os.path.dirname(__file__), '../odds_cache.sqlite3'))
+ODDS_CACHE_MAX_ENTRIES = int(os.getenv('ODDS_CACHE_MAX_ENTRIES', 1024))
+ODDS_EVENTS_CACHE_TTL = int(os.getenv('ODDS_EVENTS_CACHE_TTL', 300))  # seconds
+ODDS_PROPS_CACHE_TTL = int(os.getenv('ODDS_PROPS_CACHE_TTL', 30))  # seconds
+#Quota
+ODDS_QUOTA_LOW_THRESHOLD = int(os.getenv('ODDS_QUOTA_LOW_THRESHOLD', 2000))  # remaining requests
+ODDS_QUOTA_CRITICAL_THRESHOLD = int(os.getenv('ODDS_QUOTA_CRITICAL_THRESHOLD', 500))  # remaining requests
+ODDS_QUOTA_TTL_MULTIPLIER = float(os.getenv('ODDS_QUOTA_TTL_MULTIPLIER', 4))
+ODDS_QUOTA_COST_ENTRIES = int(os.getenv('ODDS_QUOTA_COST_ENTRIES', 1000))  # per-event cost entries kept, older ones roll up per endpoint
+#Retries and circuit breaker
+ODDS_RETRY_MAX_ATTEMPTS = int(os.getenv('ODDS_RETRY_MAX_ATTEMPTS', 3))  # attempts per upstream call, including the first
+ODDS_RETRY_BASE_DELAY = float(os.getenv('ODDS_RETRY_BASE_DELAY', 0.5))  # seconds, doubled on every retry
+ODDS_RETRY_MAX_DELAY = float(os.getenv('ODDS_RETRY_MAX_DELAY', 4))  # seconds, cap on a single backoff
+ODDS_RETRY_MAX_ELAPSED = float(os.getenv('ODDS_RETRY_MAX_ELAPSED', 10))  # seconds, give up rather than wait past this
+ODDS_BREAKER_FAILURE_THRESHOLD = int(os.getenv('ODDS_BREAKER_FAILURE_THRESHOLD', 5))  # consecutive failures that open a host's circuit
+ODDS_BREAKER_RESET_TIMEOUT = float(os.getenv('ODDS_BREAKER_RESET_TIMEOUT', 30))  # seconds before a probe request is let through
+#Excel exports
+ODDS_EXPORT_COALESCE_SECONDS = float(os.getenv('ODDS_EXPORT_COALESCE_SECONDS', 1))  # Exports of the same file within this window are merged into one write
+#Incremental pricing
+ODDS_INCREMENTAL_PRICING = os.getenv('ODDS_INCREMENTAL_PRICING', 'true').lower() == 'true'  # Re-price only the props whose odds changed since the previous snapshot
+ODDS_INCREMENTAL_STREAMS = int(os.getenv('ODDS_INCREMENTAL_STREAMS', 32))  # (sport, site, pricing options) combinations whose previous snapshot is kept
+#Parquet archive
+ODDS_ARCHIVE_DIR = os.getenv('ODDS_ARCHIVE_DIR')  # Every priced snapshot goes to Parquet files under <dir>/sport=<sport>/date=<day>/ when set
+ODDS_ARCHIVE_ROW_GROUP_SIZE = int(os.getenv('ODDS_ARCHIVE_ROW_GROUP_SIZE', 131072))  # rows per Parquet row group (and per file at most)
+ODDS_ARCHIVE_FLUSH_SECONDS = float(os.getenv('ODDS_ARCHIVE_FLUSH_SECONDS', 300))  # seconds archived rows may wait to fill a row group before being written
+#DFS payouts
+DFS_ENTRY_TYPE = os.getenv('DFS_ENTRY_TYPE', 'power')  # power or flex, the entry EV is priced for (?entry=)
+DFS_ENTRY_LEGS = int(os.getenv('DFS_ENTRY_LEGS', 2))  # picks per entry (?legs=)
+DFS_PAYOUT_TABLES_FILE = os.getenv('DFS_PAYOUT_TABLES_FILE')  # JSON payout tables replacing the built-in ones when set
+DFS_ENTRY_POOL_SIZE = int(os.getenv('DFS_ENTRY_POOL_SIZE', 200))  # Most likely props the entry optimizer combines legs from
+DFS_ENTRY_MIN_GAMES = int(os.getenv('DFS_ENTRY_MIN_GAMES', 1))  # Distinct games an optimized entry must cover (?min_games=)
+DFS_ENTRY_MAX_PER_GAME = int(os.getenv('DFS_ENTRY_MAX_PER_GAME', 0))  # Legs allowed from one game, 0 for no limit (?max_per_game=)
+#Odds store
+ODDS_STORE_ENABLED = os.getenv('ODDS_STORE_ENABLED', 'false').lower() == 'true'  # Keep every slate the snapshot poller fetches in the database (see api.models)
+ODDS_STORE_BATCH_SIZE = int(os.getenv('ODDS_STORE_BATCH_SIZE', 2000))  # rows per bulk insert
+ODDS_STORE_MAX_AGE = int(os.getenv('ODDS_STORE_MAX_AGE', 900))  # seconds, older stored snapshots are not served
+ODDS_STORE_SOURCE = os.getenv('ODDS_STORE_SOURCE', 'live')  # live or store, where the views get odds from (?source=)
+ODDS_HISTORY_KEYFRAME_INTERVAL = int(os.getenv('ODDS_HISTORY_KEYFRAME_INTERVAL', 30))  # polls between full snapshots of an event in the history
+ODDS_HISTORY_WINDOW = int(os.getenv('ODDS_HISTORY_WINDOW', 86400))  # seconds of movement the history endpoints return by default (?since=)
+#Player names
+PLAYER_ALIASES_FILE = os.getenv('PLAYER_ALIASES_FILE', os.path.join(os.path.dirname(__file__), '../player_aliases.json'))  # {alias: canonical name}, see the player_alias command
+PLAYER_FUZZY_CUTOFF = float(os.getenv('PLAYER_FUZZY_CUTOFF', 0.85))  # 0..1 similarity of the first names for player_alias --suggest to propose a sportsbook name with the same last name
+#Snapshot poller
+ODDS_POLLER_ENABLED = os.getenv('ODDS_POLLER_ENABLED', 'false').lower() == 'true'  # Start the poller thread with the web app
+ODDS_POLL_SPORTS = [sport for sport in os.getenv('ODDS_POLL_SPORTS', 'nba,nfl,mlb,nhl,ncaaf,ncaab').split(',') if sport]
+ODDS_POLL_STAGGER = float(os.getenv('ODDS_POLL_STAGGER', 5))  # seconds between each sport's first poll
+ODDS_POLL_MIN_GAP = float(os.getenv('ODDS_POLL_MIN_GAP', 2))  # seconds between any two polls
+ODDS_POLL_IDLE_INTERVAL = float(os.getenv('ODDS_POLL_IDLE_INTERVAL', 1800))  # seconds, when nothing starts soon
+ODDS_POLLER_LOCK_FILE = os.getenv('ODDS_POLLER_LOCK_FILE', os.path.join(os.path.dirname(__file__), '../odds_poller.lock'))  # held by the one process per host that polls
 #NBA
 NBA_UNDERDOG_PROPS_FILE_PATH = os.getenv('NBA_UNDERDOG_PROPS_FILE_PATH')
 NBA_PRIZEPICKS_PROPS_FILE_PATH = os.getenv('NBA_PRIZEPICKS_PROPS_FILE_PATH')
 NBA_EVENTS_API_URL = os.getenv('NBA_EVENTS_API_URL')
 NBA_PLAYER_PROPS_URL = os.getenv('NBA_PLAYER_PROPS_URL')
+NBA_MAX_CONCURRENT_EVENTS = int(os.getenv('NBA_MAX_CONCURRENT_EVENTS', 8))
 #NFL
 NFL_UNDERDOG_PROPS_FILE_PATH = os.getenv('NFL_UNDERDOG_PROPS_FILE_PATH')
 NFL_PRIZEPICKS_PROPS_FILE_PATH = os.getenv('NFL_PRIZEPICKS_PROPS_FILE_PATH')
 NFL_EVENTS_API_URL = os.getenv('NFL_EVENTS_API_URL')
 NFL_PLAYER_PROPS_URL = os.getenv('NFL_PLAYER_PROPS_URL')
+NFL_MAX_CONCURRENT_EVENTS = int(os.getenv('NFL_MAX_CONCURRENT_EVENTS', 8))
 #MLB
 MLB_UNDERDOG_PROPS_FILE_PATH = os.getenv('MLB_UNDERDOG_PROPS_FILE_PATH')
 MLB_PRIZEPICKS_PROPS_FILE_PATH = os.getenv('MLB_PRIZEPICKS_PROPS_FILE_PATH')
 MLB_EVENTS_API_URL = os.getenv('MLB_EVENTS_API_URL')
 MLB_PLAYER_PROPS_URL = os.getenv('MLB_PLAYER_PROPS_URL')
+MLB_MAX_CONCURRENT_EVENTS = int(os.getenv('MLB_MAX_CONCURRENT_EVENTS', 8))
 #NHL
 NHL_UNDERDOG_PROPS_FILE_PATH = os.getenv('NHL_UNDERDOG_PROPS_FILE_PATH')
 NHL_PRIZEPICKS_PROPS_FILE_PATH = os.getenv('NHL_PRIZEPICKS_PROPS_FILE_PATH')
 NHL_EVENTS_API_URL = os.getenv('NHL_EVENTS_API_URL')
 NHL_PLAYER_PROPS_URL = os.getenv('NHL_PLAYER_PROPS_URL')
+NHL_MAX_CONCURRENT_EVENTS = int(os.getenv('NHL_MAX_CONCURRENT_EVENTS', 8))
 #NCAAF
 NCAAF_UNDERDOG_PROPS_FILE_PATH = os.getenv('NCAAF_UNDERDOG_PROPS_FILE_PATH')
 NCAAF_PRIZEPICKS_PROPS_FILE_PATH = os.getenv('NCAAF_PRIZEPICKS_PROPS_FILE_PATH')
 NCAAF_EVENTS_API_URL = os.getenv('NCAAF_EVENTS_API_URL')
 NCAAF_PLAYER_PROPS_URL = os.getenv('NCAAF_PLAYER_PROPS_URL')
+NCAAF_MAX_CONCURRENT_EVENTS = int(os.getenv('NCAAF_MAX_CONCURRENT_EVENTS', 8))
 #NCAAB
 NCAAB_UNDERDOG_PROPS_FILE_PATH = os.getenv('NCAAB_UNDERDOG_PROPS_FILE_PATH')
 NCAAB_PRIZEPICKS_PROPS_FILE_PATH = os.getenv('NCAAB_PRIZEPICKS_PROPS_FILE_PATH')
 NCAAB_EVENTS_API_URL = os.getenv('NCAAB_EVENTS_API_URL')
 NCAAB_PLAYER_PROPS_URL = os.getenv('NCAAB_PLAYER_PROPS_URL')
+NCAAB_MAX_CONCURRENT_EVENTS = int(os.getenv('NCAAB_MAX_CONCURRENT_EVENTS', 8))
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent